@@ -1,33 +1,67 @@
 import os
 import secrets
 import string
-from datetime import datetime, date
+import time
+from datetime import datetime, timedelta
 from functools import wraps
 
+import click
+import msgspec
 from flask import (
-    Flask, render_template, request, redirect,
-    url_for, flash, session, Response
+    Blueprint, Flask, current_app, render_template, request, redirect,
+    url_for, flash, session, Response, send_file, stream_with_context
 )
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
+from sqlalchemy import inspect as sa_inspect, text, tuple_
+from sqlalchemy.orm import sessionmaker
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 
+from archive import ColdStorage, is_restore
+from assets import Assets, prune as prune_assets
+from chunked_upload import ChunkedUploads, UploadError
 from config import Config
+from database import configure_engine
+import export
+import facets
+import livefeed
+import pdf_bundle
+from metrics import Metrics
+from group_commit import GroupCommitter
+from livefeed import LiveFeed
+from pdf_writer import PdfPool
+from render_cache import RenderCache
+from outbox import MailOutbox
+from pages import PageCache
+from pending_store import PendingStore
+from ratelimit import RateLimiter
+from upload_refs import UploadReferences
+from upload_store import UploadStore
+import rollups
+import schema
+import search
+import upload_refs
 
 # -------------------------------------------------------------------
-# App / extensions setup (single app instance)
+# Extensions (bound to an app in create_app)
 # -------------------------------------------------------------------
 
-app = Flask(__name__)
-app.config.from_object(Config)
-app.config["TEMPLATES_AUTO_RELOAD"] = True
-app.jinja_env.auto_reload = True
-app.config["UPLOAD_FOLDER"] = Config.UPLOAD_FOLDER
-app.config["MAX_CONTENT_LENGTH"] = Config.MAX_CONTENT_LENGTH
-
-mail = Mail(app)
-
-db = SQLAlchemy(app)
+db = SQLAlchemy()
+metrics = Metrics()
+assets = Assets()
+outbox = MailOutbox()
+pending = PendingStore()
+limiter = RateLimiter()
+uploads = UploadStore()
+upload_references = UploadReferences()
+cold_storage = ColdStorage()
+chunked_uploads = ChunkedUploads()
+render_cache = RenderCache()
+page_cache = PageCache()
+live_feed = LiveFeed()
+pdf_pool = PdfPool()
+
+bp = Blueprint("main", __name__, cli_group=None)
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf"}
 
@@ -113,15 +147,176 @@ class Submission(db.Model):
     files = db.Column(db.JSON)
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Backs the keyset pagination on the admin list: (submitted_at, id) DESC
+        db.Index("ix_submissions_submitted_at_id", "submitted_at", "id"),
+    )
+
 
-with app.app_context():
-    try:
-        db.create_all()
-    except Exception as e:
-        print(f"Error creating database tables: {e}")
-        print("Please check your database connection and credentials.")
+class OutboxMessage(db.Model):
+    __tablename__ = "mail_outbox"
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255))
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text)
+    html = db.Column(db.Text)
+    status = db.Column(db.String(16), nullable=False, default="pending")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index("ix_mail_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class PendingSubmission(db.Model):
+    __tablename__ = "pending_submissions"
+
+    token = db.Column(db.String(32), primary_key=True)
+    email = db.Column(db.String(255), nullable=False)
+    otp = db.Column(db.String(6), nullable=False)
+    # MEDIUMBLOB on MySQL (BLOB stops at 64 KiB); holds any form under MAX_CONTENT_LENGTH
+    payload = db.Column(db.LargeBinary(length=2**24 - 1), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+
+class SubmissionRollup(db.Model):
+    __tablename__ = "submission_rollups"
+
+    dimension = db.Column(db.String(32), primary_key=True)
+    bucket = db.Column(db.String(255), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Top-N per dimension for the dashboard breakdowns
+        db.Index("ix_submission_rollups_dimension_count", "dimension", "count"),
+    )
+
+
+class RateLimitBucket(db.Model):
+    __tablename__ = "rate_limits"
+
+    name = db.Column(db.String(255), primary_key=True)
+    # Double: epoch seconds need more than MySQL's single-precision FLOAT
+    tokens = db.Column(db.Double, nullable=False)
+    updated_at = db.Column(db.Double, nullable=False, index=True)
+
+
+class SubmissionProject(db.Model):
+    __tablename__ = "submission_projects"
+
+    submission_id = db.Column(
+        db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(255))
+    role = db.Column(db.String(255))
+    url = db.Column(db.String(512))
 
-os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+
+class SubmissionProjectTech(db.Model):
+    __tablename__ = "submission_project_tech"
+
+    submission_id = db.Column(
+        db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = db.Column(db.Integer, primary_key=True)
+    tech = db.Column(db.String(100), primary_key=True)  # lowercased, one per technology
+
+    __table_args__ = (
+        db.Index("ix_submission_project_tech_tech", "tech", "submission_id"),
+    )
+
+
+class SubmissionItem(db.Model):
+    """A requested page or feature."""
+
+    __tablename__ = "submission_items"
+
+    submission_id = db.Column(
+        db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+    kind = db.Column(db.String(16), primary_key=True)
+    value = db.Column(db.String(255), primary_key=True)  # lowercased
+
+    __table_args__ = (
+        db.Index("ix_submission_items_kind_value", "kind", "value", "submission_id"),
+    )
+
+
+class SubmissionSocialLink(db.Model):
+    __tablename__ = "submission_social_links"
+
+    submission_id = db.Column(
+        db.Integer, db.ForeignKey("submissions.id", ondelete="CASCADE"), primary_key=True
+    )
+    network = db.Column(db.String(32), primary_key=True)
+    url = db.Column(db.String(512))
+
+    __table_args__ = (
+        db.Index("ix_submission_social_links_network", "network", "submission_id"),
+    )
+
+
+class ArchivedSubmission(db.Model):
+    """Index of submissions moved to cold storage (archive.py); the data is in ``archive``."""
+
+    __tablename__ = "submission_archive"
+
+    id = db.Column(db.Integer, primary_key=True)  # the submission's original id
+    public_id = db.Column(db.String(8), nullable=False, unique=True)
+    full_name = db.Column(db.String(255))
+    email = db.Column(db.String(255), index=True)
+    submitted_at = db.Column(db.DateTime, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+    archive = db.Column(db.String(255), nullable=False)  # ZIP file name in ARCHIVE_DIR
+
+
+class AdminEvent(db.Model):
+    """Cross-worker channel for the live admin feed (livefeed.py); pruned after an hour."""
+
+    __tablename__ = "admin_events"
+    # Ids must never be reused once old rows are pruned; pollers track the last one seen
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+    payload = db.Column(db.Text, nullable=False)
+
+
+class UploadReference(db.Model):
+    """One use of a stored upload (upload_refs.py); a file with none left is deleted."""
+
+    __tablename__ = "upload_references"
+
+    digest = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(64), primary_key=True)  # submission:<id>, pending:<token>, upload:<id>
+    expires_at = db.Column(db.DateTime, index=True)  # NULL while the owner exists
+
+    __table_args__ = (
+        db.Index("ix_upload_references_owner", "owner"),
+    )
+
+
+FACET_MODELS = {
+    "projects": SubmissionProject,
+    "tech": SubmissionProjectTech,
+    "items": SubmissionItem,
+    "links": SubmissionSocialLink,
+}
+
+search.register(Submission)
+rollups.register(Submission, SubmissionRollup)
+facets.register(Submission, FACET_MODELS)
+livefeed.register(Submission, AdminEvent, skip=is_restore)
+upload_refs.register(Submission, UploadReference)
 
 # -------------------------------------------------------------------
 # Helpers
@@ -136,408 +331,834 @@ def generate_public_id(length: int = 8) -> str:
 def allowed_file(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def submission_stats():
+    return rollups.totals(db.session, SubmissionRollup)
+
+
+# Dashboard breakdowns: (title, rollup dimension)
+BREAKDOWNS = (
+    ("Professions", "profession"),
+    ("Budget ranges", "budget_range"),
+    ("Industries", "industry"),
+    ("Requested pages", "page"),
+    ("Requested features", "feature"),
+)
+
+
+def submission_breakdowns(limit=5):
+    return [
+        (title, rollups.breakdown(db.session, SubmissionRollup, dimension, limit=limit))
+        for title, dimension in BREAKDOWNS
+    ]
+
+
+def find_submission(public_id):
+    """The submission from the hot table, else rehydrated from cold storage (read-only)."""
+    submission = Submission.query.filter_by(public_id=public_id).first()
+    if submission is None:
+        submission = cold_storage.load(public_id)
+    return submission
+
+
+def schedule_pdf(public_id, data):
+    """Queue PDF generation off the request path; returns the Future (None if already on disk)."""
+    try:
+        return pdf_pool.ensure(public_id, data, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    except Exception as e:
+        print(f"Scheduling PDF for {public_id} failed: {e}")
+        return None
+
+
+def encode_cursor(submitted_at: datetime, submission_id: int) -> str:
+    return f"{submitted_at.isoformat()}_{submission_id}"
+
+
+def decode_cursor(cursor):
+    """Parse an admin list cursor back into (submitted_at, id), or None."""
+    if not cursor:
+        return None
+    try:
+        ts, _, raw_id = cursor.rpartition("_")
+        return datetime.fromisoformat(ts), int(raw_id)
+    except ValueError:
+        return None
+
+
+def init_db():
+    """Create directories, tables, indexes and the search index (idempotent)."""
+    config = current_app.config
+    if db.engine.dialect.name == "sqlite":
+        os.makedirs(os.path.dirname(config["SQLITE_PATH"]), exist_ok=True)
+    os.makedirs(config["UPLOAD_FOLDER"], exist_ok=True)
+    backfill_facets = not sa_inspect(db.engine).has_table(SubmissionProject.__tablename__)
+    backfill_refs = not sa_inspect(db.engine).has_table(UploadReference.__tablename__)
+    db.create_all()
+    # create_all() skips indexes on tables that already exist
+    for model in (
+        Submission, OutboxMessage, PendingSubmission, SubmissionRollup, RateLimitBucket,
+        ArchivedSubmission, AdminEvent, UploadReference, *FACET_MODELS.values(),
+    ):
+        for index in model.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+    if db.engine.dialect.name == "mysql":
+        columns = sa_inspect(db.engine).get_columns(PendingSubmission.__tablename__)
+        if any(c["name"] == "payload" and str(c["type"]) == "BLOB" for c in columns):
+            # Created when the column was a plain 64 KiB BLOB
+            with db.engine.begin() as connection:
+                connection.execute(text("ALTER TABLE pending_submissions MODIFY payload MEDIUMBLOB NOT NULL"))
+    if search.is_supported(db.engine):
+        with db.engine.begin() as connection:
+            created_index = search.create_index(connection)
+        if created_index and db.session.query(Submission.id).first():
+            count = search.rebuild(db.session, Submission)
+            print(f"Indexed {count} existing submission(s) for search.")
+    if rollups.is_empty(db.session, SubmissionRollup) and db.session.query(Submission.id).first():
+        count = rollups.rebuild(db.session, SubmissionRollup, Submission)
+        print(f"Backfilled dashboard counters from {count} submission(s).")
+    if not backfill_facets and facets.needs_rebuild(db.session, FACET_MODELS):
+        backfill_facets = True  # page/feature values from before they were lowercased
+    if backfill_facets and db.session.query(Submission.id).first():
+        count = facets.rebuild(db.session, Submission, FACET_MODELS)
+        print(f"Backfilled project, page and link tables from {count} submission(s).")
+    if backfill_refs and db.session.query(Submission.id).first():
+        count = upload_refs.rebuild(db.session, Submission, UploadReference)
+        print(f"Recorded the stored uploads of {count} submission(s).")
+
 # -------------------------------------------------------------------
 # Routes
 # -------------------------------------------------------------------
 
 
-@app.route("/", methods=["GET"])
+# endpoint -> config key of the per-IP limit on its POSTs/PUTs
+IP_LIMITS = {
+    "main.submit": "RATELIMIT_SUBMIT_IP",
+    "main.verify_email": "RATELIMIT_VERIFY_IP",
+    "main.upload_create": "RATELIMIT_UPLOAD_IP",
+    "main.upload_chunk": "RATELIMIT_UPLOAD_CHUNK_IP",
+    "main.upload_complete": "RATELIMIT_UPLOAD_COMPLETE_IP",
+}
+
+
+def too_many_requests(retry_after, message="Too many requests. Please try again later."):
+    headers = {"Retry-After": str(retry_after)} if retry_after else {}
+    if request.path.startswith("/uploads"):
+        return {"error": message}, 429, headers
+    return Response(message + "\n", 429, headers)
+
+
+def refund_limits(keys):
+    """Give back the per-address tokens a submit spent before it failed."""
+    for key in keys:
+        try:
+            limiter.refund(key)
+        except Exception as e:
+            print(f"Refunding rate limit {key} failed: {e}")
+
+
+@bp.before_request
+def throttle_by_ip():
+    # Runs before the body is read: no form parsing, file I/O or mail for rejected requests
+    rule = IP_LIMITS.get(request.endpoint)
+    if rule is None or request.method not in ("POST", "PUT"):
+        return None
+    allowed, retry_after = limiter.hit(
+        f"ip:{request.endpoint}:{request.remote_addr}", current_app.config[rule]
+    )
+    if not allowed:
+        return too_many_requests(retry_after)
+    return None
+
+
+@bp.route("/", methods=["GET"])
+@page_cache.cached
 def intake_form():
     return render_template("intake_form.html")
 
 
-@app.route("/submit", methods=["POST"])
+@bp.route("/submit", methods=["POST"])
 def submit():
 
-    # Collect all form data
-    form_data = {
-        "full_name": request.form.get("fullName"),
-        "preferred_name": request.form.get("preferredName"),
-        "profession": request.form.get("profession"),
-        "tagline": request.form.get("tagline"),
-        "email": request.form.get("email"),
-        "phone": request.form.get("phone"),
-        "whatsapp": request.form.get("whatsapp"),
-        "location": request.form.get("location"),
-        "time_zone": request.form.get("timeZone"),
-        "bio_long": request.form.get("bioLong"),
-        "bio_short": request.form.get("bioShort"),
-        "company": request.form.get("company"),
-        "industry": request.form.get("industry"),
-        "website_purpose": request.form.get("websitePurpose"),
-        "target_audience": request.form.get("targetAudience"),
-        "tone_style": request.form.get("toneStyle"),
-        "brand_keywords": request.form.get("brandKeywords"),
-        "color_prefs": request.form.get("colorPrefs"),
-        "dont_use_colors": request.form.get("dontUseColors"),
-        "inspiration": request.form.get("inspiration"),
-        "existing_website": request.form.get("existingWebsite"),
-        "likes_existing": request.form.get("likesExisting"),
-        "dislikes_existing": request.form.get("dislikesExisting"),
-        "experience": request.form.get("experience"),
-        "education": request.form.get("education"),
-        "skills": request.form.get("skills"),
-        "services_offered": request.form.get("servicesOffered"),
-        "achievements": request.form.get("achievements"),
-        "primary_cta": request.form.get("primaryCta"),
-        "secondary_cta": request.form.get("secondaryCta"),
-        "preferred_contact": request.form.get("preferredContact"),
-        "social_links": {
-            "linkedin": request.form.get("linkedin"),
-            "github": request.form.get("github"),
-            "behance": request.form.get("behance"),
-            "dribbble": request.form.get("dribbble"),
-            "instagram": request.form.get("instagram"),
-            "twitter": request.form.get("twitter"),
-            "other": request.form.get("otherSocial"),
-        },
-        "projects_raw": {
-            "titles": request.form.getlist("projectTitle[]"),
-            "roles": request.form.getlist("projectRole[]"),
-            "descs": request.form.getlist("projectDesc[]"),
-            "tech": request.form.getlist("projectTech[]"),
-            "results": request.form.getlist("projectResults[]"),
-            "urls": request.form.getlist("projectUrl[]"),
-        },
-        "pages": request.form.getlist("pages[]"),
-        "features": request.form.getlist("features[]"),
-        "technical_prefs": {
-            "cms": request.form.get("cmsPreference"),
-            "blog": request.form.get("blogPreference"),
-            "ongoingSupport": request.form.get("ongoingSupport"),
-            "seo": request.form.get("seoLevel"),
-            "analytics": request.form.get("analytics"),
-        },
-        "deadline_raw": request.form.get("deadline"),
-        "budget_range": request.form.get("budgetRange"),
-        "content_ready": request.form.get("contentReady"),
-        "other_notes": request.form.get("otherNotes"),
-    }
-
-    # Handle file uploads
+    # Decode and validate the whole form in one pass
+    try:
+        payload = schema.from_form(request.form)
+    except msgspec.ValidationError as e:
+        flash(f"Some answers could not be read ({e}). Please check the form and try again.", "danger")
+        return redirect(url_for(".intake_form"))
+
+    # Per-address limits, spent before any upload, pending row or mail work so
+    # concurrent posts cannot all get through; refunded if no code gets queued
+    config = current_app.config
+    email_key = payload.email.strip().lower()
+    limits = [(
+        f"submit-email:{email_key}",
+        config["RATELIMIT_SUBMIT_EMAIL"],
+        "Too many submissions for this address. Please try again in {} seconds.",
+    )]
+    if config["OTP_RESEND_COOLDOWN"] > 0:
+        limits.insert(0, (
+            f"otp-send:{email_key}",
+            f"1/{config['OTP_RESEND_COOLDOWN']}",
+            "A verification code was already sent to this address. "
+            "Please wait {} seconds before requesting another.",
+        ))
+    spent = []
+    for key, rate, message in limits:
+        allowed, retry_after = limiter.hit(key, rate)
+        if not allowed:
+            refund_limits(spent)
+            flash(message.format(retry_after), "warning")
+            if pending.get(session.get("pending_token")) is not None:
+                return redirect(url_for(".verify_email"))
+            return redirect(url_for(".intake_form"))
+        spent.append(key)
+
+    # Files sent ahead through the chunked upload API arrive as upload ids
     uploaded_files = []
-    for key in request.files:
-        file = request.files[key]
-        if file and file.filename and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            ts_prefix = datetime.now().strftime("%Y%m%d_%H%M%S_")
-            filename = ts_prefix + filename
-            file_path = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-            file.save(file_path)
-            uploaded_files.append(filename)
-
-    form_data["uploaded_files"] = uploaded_files
+    for upload_id in request.form.getlist("uploadIds[]"):
+        meta = chunked_uploads.result(upload_id)
+        if meta is not None:
+            uploaded_files.append(meta)
 
-    # Generate and store OTP in session
+    # Files posted with the form itself (no-JS fallback); content-addressed, stored once
+    for field, file in request.files.items(multi=True):
+        if file and file.filename and allowed_file(file.filename):
+            started = time.perf_counter()
+            meta = uploads.save(file.stream, secure_filename(file.filename))
+            metrics.observe_upload(meta["size"], time.perf_counter() - started)
+            meta["field"] = field
+            uploaded_files.append(meta)
+    schema.attach_files(payload, uploaded_files)
+
+    # Generate the OTP and park the form server-side; the cookie only carries the token
     otp = "".join(secrets.choice(string.digits) for _ in range(6))
-    session["email_otp"] = otp
-    session["email_otp_for"] = form_data["email"]
-    session["pending_form"] = form_data
-    session.modified = True
+    try:
+        token = pending.put(payload, otp, payload.email)
+        # Keep the files for the OTP window; after that, unless verified, they can go
+        expires_at = datetime.utcnow() + timedelta(seconds=config["PENDING_SUBMISSION_TTL"])
+        upload_references.hold(f"pending:{token}", uploaded_files, expires_at)
+    except Exception as e:
+        db.session.rollback()
+        refund_limits(spent)
+        print(f"Saving pending submission failed: {e}")
+        flash("Your answers could not be saved. Please try again.", "danger")
+        return redirect(url_for(".intake_form"))
+    session["pending_token"] = token
+    chunked_uploads.start_collector()
 
 
-    # Send OTP email (no separate HTML file needed)
+    # Queue the OTP email; the outbox workers deliver it off the request path
     try:
         subject = "Portfolio Intake – Email Verification"
-        recipient = form_data["email"]
-
-        plain_body = f"""Thank you for submitting your portfolio intake form!
-
-Your verification code is: {otp}
-
-Please enter this code on the verification page to complete your submission.
-This code is valid for 10 minutes.
-
-If you didn't request this, please ignore this email.
-"""
-
-        html_body = f"""
-<!DOCTYPE html>
-<html lang="en">
-  <head>
-    <meta charset="UTF-8" />
-    <title>{subject}</title>
-  </head>
-  <body style="margin:0; padding:0; background-color:#0b1120; font-family:-apple-system,BlinkMacSystemFont,'Segoe UI',sans-serif;">
-    <table role="presentation" cellspacing="0" cellpadding="0" border="0" align="center" width="100%" style="padding:24px 0;">
-      <tr>
-        <td align="center">
-          <table role="presentation" cellspacing="0" cellpadding="0" border="0" width="100%" style="max-width:520px; background:#020617; border-radius:16px; border:1px solid #1f2937;">
-            <tr>
-              <td style="padding:24px 28px 18px 28px; text-align:left;">
-                <div style="display:inline-flex; align-items:center; justify-content:center; width:36px; height:36px; border-radius:999px; background:linear-gradient(135deg,#38bdf8,#6366f1); margin-bottom:14px;">
-                  <span style="font-size:18px; color:#0b1120; font-weight:600;">PB</span>
-                </div>
-                <h1 style="margin:0 0 8px 0; font-size:20px; font-weight:600; color:#e5e7eb;">
-                  Verify your email
-                </h1>
-                <p style="margin:0; font-size:14px; line-height:1.6; color:#9ca3af;">
-                  Thank you for submitting your portfolio intake form. To keep your details secure, we need to confirm that this email address belongs to you.
-                </p>
-              </td>
-            </tr>
-            <tr>
-              <td style="padding:4px 28px 4px 28px;">
-                <p style="margin:0 0 6px 0; font-size:13px; color:#9ca3af;">
-                  Your verification code:
-                </p>
-                <div style="display:inline-block; padding:10px 18px; border-radius:12px; background:linear-gradient(135deg,#0f172a,#020617); border:1px solid rgba(148,163,184,0.5);">
-                  <span style="font-family:Menlo,Consolas,monospace; font-size:22px; letter-spacing:0.3em; color:#f9fafb;">
-                    {otp}
-                  </span>
-                </div>
-                <p style="margin:10px 0 0 0; font-size:12px; color:#6b7280;">
-                  This code is valid for <strong style="color:#e5e7eb;">10 minutes</strong>. Please enter it on the verification page to complete your submission.
-                </p>
-              </td>
-            </tr>
-            <tr>
-              <td style="padding:18px 28px 10px 28px;">
-                <p style="margin:0 0 4px 0; font-size:12px; color:#6b7280;">
-                  If you didn’t request this, you can safely ignore this email.
-                </p>
-                <p style="margin:10px 0 0 0; font-size:12px; color:#4b5563;">
-                  Best regards,<br/>
-                  <span style="color:#e5e7eb;">Portfolio Builder</span>
-                </p>
-              </td>
-            </tr>
-            <tr>
-              <td style="padding:10px 28px 20px 28px; border-top:1px solid #1f2937;">
-                <p style="margin:0; font-size:11px; color:#4b5563;">
-                  You’re receiving this email because someone submitted the portfolio intake form using this address.
-                </p>
-              </td>
-            </tr>
-          </table>
-        </td>
-      </tr>
-    </table>
-  </body>
-</html>
-"""
-
-        msg = Message(
-            subject,
-            sender=app.config.get("MAIL_DEFAULT_SENDER", "noreply@example.com"),
-            recipients=[recipient],
+        outbox.enqueue(
+            recipient=payload.email,
+            subject=subject,
+            body=render_template("email/otp_verification.txt", otp=otp),
+            html=render_template("email/otp_verification.html", otp=otp, subject=subject),
         )
-        msg.body = plain_body      # text fallback
-        msg.html = html_body       # HTML version
-        mail.send(msg)
-
         flash("Verification code sent to your email. Please check your inbox.", "info")
-    except Exception as e:
-        print(f"Email sending failed: {e}")
-        if app.debug:
+        if current_app.debug and not current_app.config.get("MAIL_SERVER"):
             flash(f"DEBUG: Your verification code is: {otp}", "warning")
-            flash("Email sending failed, but proceeding with verification for testing.", "info")
-        else:
-            flash("Failed to send verification email. Please try again.", "danger")
-        return redirect(url_for("intake_form"))
+    except Exception as e:
+        db.session.rollback()
+        refund_limits(spent)
+        print(f"Queueing verification email failed: {e}")
+        flash("Failed to send verification email. Please try again.", "danger")
+        return redirect(url_for(".intake_form"))
+
+    return redirect(url_for(".verify_email"))
+
+
+
+@bp.route("/uploads", methods=["POST"])
+def upload_create():
+    data = request.get_json(silent=True) or {}
+    filename = secure_filename(data.get("filename") or "")
+    if not filename or not allowed_file(filename):
+        raise UploadError("File type not allowed.")
+    return chunked_uploads.create(filename, data.get("size"), data.get("field")), 201
+
+
+@bp.route("/uploads/<upload_id>", methods=["GET"])
+def upload_status(upload_id):
+    return chunked_uploads.status(upload_id)
+
+
+@bp.route("/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+def upload_chunk(upload_id, index):
+    chunked_uploads.write_chunk(upload_id, index, request.stream, request.content_length)
+    return "", 204
+
+
+@bp.route("/uploads/<upload_id>/complete", methods=["POST"])
+def upload_complete(upload_id):
+    started = time.perf_counter()
+    meta = chunked_uploads.complete(upload_id)
+    metrics.observe_upload(meta["size"], time.perf_counter() - started)
+    return {"id": upload_id, "name": meta["name"], "size": meta["size"], "type": meta["type"]}
 
-    return redirect(url_for("verify_email"))
 
+@bp.errorhandler(UploadError)
+def upload_error(error):
+    return {"error": str(error)}, error.status
 
 
-@app.route("/verify-email", methods=["GET", "POST"])
+@bp.route("/verify-email", methods=["GET", "POST"])
 def verify_email():
     
-    # If there is no pending form in session, send user back
-    if "pending_form" not in session or "email_otp" not in session or "email_otp_for" not in session:
+    # If there is no pending submission for this browser, send user back
+    entry = pending.get(session.get("pending_token"))
+    if entry is None:
+        session.pop("pending_token", None)
         flash("No pending submission to verify.", "warning")
-        return redirect(url_for("intake_form"))
+        return redirect(url_for(".intake_form"))
 
     # GET: show the verify page
     if request.method == "GET":
         try:
-            email_for = session.get("email_otp_for")
-            return render_template("verify_email.html", email=email_for)
+            return render_template("verify_email.html", email=entry.email)
         except Exception as e:
             print(f"Template rendering error: {e}")
             return f"Template error: {e}"
 
-    # POST: user submitted OTP
+    # POST: user submitted OTP; each pending submission gets a fixed number of guesses
+    allowed, _ = limiter.hit(
+        f"otp-attempts:{entry.token}", f"{current_app.config['OTP_MAX_ATTEMPTS']}/0"
+    )
+    if not allowed:
+        pending.discard(entry)
+        db.session.commit()
+        session.pop("pending_token", None)
+        flash("Too many incorrect codes. Please submit the form again.", "danger")
+        return redirect(url_for(".intake_form"))
+
     user_otp = request.form.get("otp", "").strip()
-    session_otp = session.get("email_otp")
-    email_for = session.get("email_otp_for")
-    form_data = session.get("pending_form")
+    # Compared as bytes: compare_digest rejects non-ASCII str
+    if not secrets.compare_digest(user_otp.encode(), entry.otp.encode()):
+        flash("Invalid verification code. Please try again.", "danger")
+        return render_template("verify_email.html", email=entry.email)
 
-    if not form_data or not session_otp or not email_for:
+    payload = pending.load(entry)
+    if payload is None:
+        session.pop("pending_token", None)
         flash("Verification session expired. Please submit the form again.", "warning")
-        return redirect(url_for("intake_form"))
-
-    if user_otp != session_otp:
-        flash("Invalid verification code. Please try again.", "danger")
-        return render_template("verify_email.html", email=email_for)
-
-    # OTP correct → build projects and save Submission
-    pr = form_data["projects_raw"]
-    projects = []
-    for i in range(len(pr["titles"])):
-        title = pr["titles"][i].strip()
-        if not title:
-            continue
-        projects.append(
-            {
-                "title": title,
-                "role": pr["roles"][i],
-                "description": pr["descs"][i],
-                "tech": pr["tech"][i],
-                "results": pr["results"][i],
-                "url": pr["urls"][i],
-            }
-        )
+        return redirect(url_for(".intake_form"))
 
-    deadline = None
-    if form_data.get("deadline_raw"):
-        deadline = datetime.strptime(form_data["deadline_raw"], "%Y-%m-%d").date()
-
-    submission = Submission(
-        public_id=generate_public_id(),
-        full_name=form_data["full_name"],
-        preferred_name=form_data["preferred_name"],
-        profession=form_data["profession"],
-        tagline=form_data["tagline"],
-        email=form_data["email"],
-        phone=form_data["phone"],
-        whatsapp=form_data["whatsapp"],
-        location=form_data["location"],
-        time_zone=form_data["time_zone"],
-        bio_long=form_data["bio_long"],
-        bio_short=form_data["bio_short"],
-        company=form_data["company"],
-        industry=form_data["industry"],
-        website_purpose=form_data["website_purpose"],
-        target_audience=form_data["target_audience"],
-        tone_style=form_data["tone_style"],
-        brand_keywords=form_data["brand_keywords"],
-        color_prefs=form_data["color_prefs"],
-        dont_use_colors=form_data["dont_use_colors"],
-        inspiration=form_data["inspiration"],
-        existing_website=form_data["existing_website"],
-        likes_existing=form_data["likes_existing"],
-        dislikes_existing=form_data["dislikes_existing"],
-        experience=form_data["experience"],
-        education=form_data["education"],
-        skills=form_data["skills"],
-        services_offered=form_data["services_offered"],
-        achievements=form_data["achievements"],
-        primary_cta=form_data["primary_cta"],
-        secondary_cta=form_data["secondary_cta"],
-        preferred_contact=form_data["preferred_contact"],
-        social_links=form_data["social_links"],
-        projects=projects,
-        pages=form_data["pages"],
-        features=form_data["features"],
-        technical_prefs=form_data["technical_prefs"],
-        deadline=deadline,
-        budget_range=form_data["budget_range"],
-        content_ready=form_data["content_ready"],
-        other_notes=form_data["other_notes"],
-        files=form_data.get("uploaded_files", []),
-    )
+    # OTP correct → save Submission
+    submission = Submission(public_id=generate_public_id(), **payload.model_kwargs())
 
     try:
-        db.session.add(submission)
-        db.session.commit()
+        group_committer = current_app.extensions.get("group_committer")
+        if group_committer is not None:
+            group_committer.commit(add=[submission], delete=[(PendingSubmission, entry.token)])
+        else:
+            db.session.add(submission)
+            pending.discard(entry)
+            db.session.commit()
 
-        # Clear OTP and pending data from session
-        session.pop("pending_form", None)
-        session.pop("email_otp", None)
-        session.pop("email_otp_for", None)
+        session.pop("pending_token", None)
+        schedule_pdf(submission.public_id, msgspec.to_builtins(payload))
 
         flash("Email verified and form submitted successfully!", "success")
-        return redirect(url_for("thank_you", public_id=submission.public_id))
+        return redirect(url_for(".thank_you", public_id=submission.public_id))
     except Exception as e:
         db.session.rollback()
         flash(f"Error saving submission: {e}", "danger")
-        return redirect(url_for("intake_form"))
+        return redirect(url_for(".intake_form"))
 
-@app.route("/thank-you/<public_id>")
+@bp.route("/thank-you/<public_id>")
+@page_cache.cached
 def thank_you(public_id):
     return render_template("thank_you.html", public_id=public_id)
 
 
-@app.route("/admin/submissions")
+# Only the columns the admin table renders; bio_long and the JSON blobs stay on disk
+ADMIN_LIST_COLUMNS = (
+    Submission.id,
+    Submission.public_id,
+    Submission.full_name,
+    Submission.email,
+    Submission.profession,
+    Submission.submitted_at,
+)
+
+
+@bp.route("/admin/submissions")
 @admin_required
 def admin_submissions():
-    submissions = Submission.query.order_by(Submission.submitted_at.desc()).all()
-    today = datetime.combine(date.today(), datetime.min.time())
-    return render_template("admin_submissions.html", submissions=submissions, today=today)
+    per_page = request.args.get("per_page", current_app.config["ADMIN_PAGE_SIZE"], type=int)
+    per_page = max(1, min(per_page, current_app.config["ADMIN_MAX_PAGE_SIZE"]))
+    after = decode_cursor(request.args.get("after"))
+    before = decode_cursor(request.args.get("before"))
+
+    # ?tech=react, ?page=blog, ?feature=seo, ?network=github: indexed lookups in the child tables
+    filters = {
+        name: request.args[name].strip()
+        for name in facets.FILTERS
+        if request.args.get(name, "").strip()
+    }
+
+    # Newly verified rows are pushed only onto the unfiltered first page. The
+    # stream starts after the newest event read before the rows, so none is lost
+    live = not (after or before or filters)
+    live_cursor = live_feed.cursor() if live else None
+
+    key = tuple_(Submission.submitted_at, Submission.id)
+    query = db.session.query(*ADMIN_LIST_COLUMNS).filter(Submission.submitted_at.isnot(None))
+    for name, value in filters.items():
+        query = query.filter(Submission.id.in_(facets.matching_ids(FACET_MODELS, name, value)))
+    if before:
+        # Walking back towards newer rows: scan ascending, then flip
+        query = query.filter(key > tuple_(*before)).order_by(
+            Submission.submitted_at.asc(), Submission.id.asc()
+        )
+    else:
+        if after:
+            query = query.filter(key < tuple_(*after))
+        query = query.order_by(Submission.submitted_at.desc(), Submission.id.desc())
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if before:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or before:
+            next_cursor = encode_cursor(rows[-1].submitted_at, rows[-1].id)
+        if after or (before and has_more):
+            prev_cursor = encode_cursor(rows[0].submitted_at, rows[0].id)
+
+    return render_template(
+        "admin_submissions.html",
+        submissions=rows,
+        stats=submission_stats(),
+        breakdowns=submission_breakdowns(),
+        daily_counts=rollups.daily(db.session, SubmissionRollup, days=14),
+        per_page=per_page,
+        filters=filters,
+        live=live,
+        live_cursor=live_cursor,
+        busy_retry=livefeed.BUSY_RETRY,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+@bp.route("/admin/submissions/stream")
+@admin_required
+def admin_submissions_stream():
+    """Server-Sent Events: each newly verified submission plus the updated counters.
+
+    Starts after ``?after=`` (the id the page was rendered at) or, on a
+    reconnect, the Last-Event-ID header.
+    """
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    if last_id is None:
+        last_id = request.args.get("after", type=int)
+    subscriber = live_feed.subscribe()
+    if subscriber is None:
+        # This worker's stream threads are taken; the page tries again later
+        return Response(
+            f"retry: {livefeed.BUSY_RETRY * 1000}\n\n",
+            503,
+            {"Retry-After": str(livefeed.BUSY_RETRY), "Cache-Control": "no-cache"},
+            mimetype="text/event-stream",
+        )
+    # Replayed after subscribing: anything newer is already queued for us
+    try:
+        replay = live_feed.since(last_id) if last_id is not None else ()
+    except Exception:
+        live_feed.unsubscribe(subscriber)
+        raise
+    response = Response(
+        live_feed.stream(subscriber, replay, after=last_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Also frees the slot when the generator never started
+    response.call_on_close(lambda: live_feed.unsubscribe(subscriber))
+    return response
+
+
+@bp.route("/admin/search")
+@admin_required
+def admin_search():
+    query = request.args.get("q", "").strip()
+    per_page = request.args.get("per_page", current_app.config["ADMIN_PAGE_SIZE"], type=int)
+    per_page = max(1, min(per_page, current_app.config["ADMIN_MAX_PAGE_SIZE"]))
+    page = max(1, request.args.get("page", 1, type=int))
+
+    rows = []
+    has_more = False
+    search_note = None
+    if query:
+        window = {"limit": per_page + 1, "offset": (page - 1) * per_page}
+        if search.is_supported(db.engine):
+            ids = search.search_ids(db.session, query, **window)
+        else:
+            ids = search.substring_ids(db.session, Submission, query, **window)
+            search_note = "No full-text index on this database: showing submissions containing every word, newest first."
+        has_more = len(ids) > per_page
+        ids = ids[:per_page]
+        by_id = {
+            row.id: row
+            for row in db.session.query(*ADMIN_LIST_COLUMNS).filter(Submission.id.in_(ids))
+        }
+        rows = [by_id[i] for i in ids if i in by_id]
+
+    return render_template(
+        "admin_submissions.html",
+        submissions=rows,
+        stats=submission_stats(),
+        per_page=per_page,
+        query=query,
+        page=page,
+        has_more=has_more,
+        search_note=search_note,
+    )
 
 
-@app.route("/admin/submission/<public_id>")
+@bp.route("/admin/submission/<public_id>")
 @admin_required
 def admin_submission_detail(public_id):
-    submission = Submission.query.filter_by(public_id=public_id).first()
+    submission = find_submission(public_id)
     if not submission:
         return "Submission not found", 404
-    return render_template("admin_submission_detail.html", submission=submission)
+    return render_template(
+        "admin_submission_detail.html",
+        submission=submission,
+        archived=sa_inspect(submission).transient,
+    )
 
 
-@app.route("/intake-pdf/<public_id>")
+@bp.route("/admin/export")
+@admin_required
+def admin_export():
+    fmt = request.args.get("format", "csv")
+    if fmt not in export.FORMATS:
+        return f"Unsupported format: {fmt}", 400
+    try:
+        filters = {
+            "since": export.parse_timestamp(request.args.get("since")),
+            "until": export.parse_timestamp(request.args.get("until")),
+            "after_id": request.args.get("after_id", type=int),
+        }
+    except ValueError as e:
+        return f"Invalid date: {e}", 400
+
+    chunks = export.stream_export(
+        db.session, Submission, fmt, batch_size=current_app.config["EXPORT_BATCH_SIZE"], **filters
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return Response(
+        stream_with_context(chunks),
+        mimetype=export.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=submissions-{stamp}.{fmt}"},
+    )
+
+
+@bp.route("/admin/pdf-bundle", methods=["POST"])
+@admin_required
+def admin_pdf_bundle():
+    """ZIP of intake PDFs for the listed public ids, or for a submitted_at range."""
+    limit = current_app.config["PDF_BUNDLE_MAX_ITEMS"]
+    requested = list(dict.fromkeys(request.form.get("public_ids", "").replace(",", " ").split()))
+    try:
+        since = export.parse_timestamp(request.form.get("since"))
+        until = export.parse_timestamp(request.form.get("until"))
+    except ValueError as e:
+        return f"Invalid date: {e}", 400
+
+    if requested:
+        if len(requested) > limit:
+            return f"At most {limit} submissions per bundle.", 400
+        found = {
+            s.public_id: s
+            for s in Submission.query.filter(Submission.public_id.in_(requested))
+        }
+        submissions = [found.get(public_id) or cold_storage.load(public_id) for public_id in requested]
+        missing = [public_id for public_id, s in zip(requested, submissions) if s is None]
+        submissions = [s for s in submissions if s is not None]
+    elif since or until:
+        submissions = []
+        for model in (Submission, ArchivedSubmission):
+            query = model.query
+            if since:
+                query = query.filter(model.submitted_at >= since)
+            if until:
+                query = query.filter(model.submitted_at < until)
+            submissions.extend(query.order_by(model.submitted_at, model.id).limit(limit + 1))
+        if len(submissions) > limit:
+            return f"More than {limit} submissions in that range; narrow it down.", 400
+        # Archive rows only index the data; rehydrate those from cold storage
+        loaded = [
+            s if isinstance(s, Submission) else cold_storage.load(s.public_id) for s in submissions
+        ]
+        # An archive whose ZIP is gone or unreadable is reported, not fatal
+        missing = [s.public_id for s, found in zip(submissions, loaded) if found is None]
+        submissions = [s for s in loaded if s is not None]
+    else:
+        return "Give public ids or a date range.", 400
+
+    items = [(s.public_id, schema.pdf_data(s)) for s in submissions]
+    progress_dir = current_app.config["PDF_BUNDLE_DIR"]
+    bundle_id = request.form.get("bundle_id") or secrets.token_urlsafe(12)
+    pdf_bundle.purge_progress(progress_dir)
+    chunks = pdf_bundle.stream_bundle(
+        pdf_pool, items, missing,
+        bundle_id=bundle_id,
+        progress_dir=progress_dir,
+        timeout=current_app.config["PDF_RENDER_TIMEOUT"] * max(1, len(items)),
+    )
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return Response(
+        chunks,
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=intake-pdfs-{stamp}.zip",
+            "X-Bundle-Id": bundle_id,
+        },
+    )
+
+
+@bp.route("/admin/pdf-bundle/<bundle_id>")
+@admin_required
+def admin_pdf_bundle_progress(bundle_id):
+    progress = pdf_bundle.read_progress(current_app.config["PDF_BUNDLE_DIR"], bundle_id)
+    if progress is None:
+        return {"error": "Unknown bundle."}, 404
+    return progress
+
+
+@bp.route("/admin/metrics")
+@admin_required
+def admin_metrics():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@bp.route("/intake-pdf/<public_id>")
 def intake_pdf(public_id):
-    submission = Submission.query.filter_by(public_id=public_id).first()
-    if not submission:
-        print(f"Submission not found for public_id: {public_id}")
-        return "Not found", 404
-
-    print(f"Found submission: {submission.full_name}, {submission.public_id}")
-    data = {
-        "fullName": submission.full_name,
-        "preferredName": submission.preferred_name,
-        "profession": submission.profession,
-        "tagline": submission.tagline,
-        "email": submission.email,
-        "phone": submission.phone,
-        "whatsapp": submission.whatsapp,
-        "location": submission.location,
-        "timeZone": submission.time_zone,
-        "bioShort": submission.bio_short,
-        "bioLong": submission.bio_long,
-        "company": submission.company,
-        "industry": submission.industry,
-        "websitePurpose": submission.website_purpose,
-        "targetAudience": submission.target_audience,
-        "toneStyle": submission.tone_style,
-        "brandKeywords": submission.brand_keywords,
-        "colorPrefs": submission.color_prefs,
-        "dontUseColors": submission.dont_use_colors,
-        "inspiration": submission.inspiration,
-        "existingWebsite": submission.existing_website,
-        "likesExisting": submission.likes_existing,
-        "dislikesExisting": submission.dislikes_existing,
-        "experience": submission.experience,
-        "education": submission.education,
-        "skills": submission.skills,
-        "servicesOffered": submission.services_offered,
-        "achievements": submission.achievements,
-        "primaryCta": submission.primary_cta,
-        "secondaryCta": submission.secondary_cta,
-        "preferredContact": submission.preferred_contact,
-        "socialLinks": submission.social_links,
-        "projects": submission.projects,
-        "pages": submission.pages,
-        "features": submission.features,
-        "technicalPrefs": submission.technical_prefs,
-        "deadline": submission.deadline.strftime("%Y-%m-%d") if submission.deadline else None,
-        "budgetRange": submission.budget_range,
-        "contentReady": submission.content_ready,
-        "otherNotes": submission.other_notes,
-    }
-    generated_on = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    qr_url = "https://via.placeholder.com/120x120?text=QR+Code"
-    return render_template(
-        "intake_pdf.html",
-        public_id=public_id,
-        data=data,
-        generated_on=generated_on,
-        qr_url=qr_url,
+    # Submissions never change after insert, so the rendered page is cached for good
+    page = render_cache.get(public_id)
+    if page is None:
+        submission = find_submission(public_id)
+        if not submission:
+            print(f"Submission not found for public_id: {public_id}")
+            return "Not found", 404
+
+        data = schema.pdf_data(submission)
+        generated_on = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        qr_url = "https://via.placeholder.com/120x120?text=QR+Code"
+        body = render_template(
+            "intake_pdf.html",
+            public_id=public_id,
+            data=data,
+            generated_on=generated_on,
+            qr_url=qr_url,
+        )
+        page = render_cache.put(public_id, body.encode(), submission.submitted_at or datetime.utcnow())
+        schedule_pdf(public_id, data)
+
+    response = Response(page.body, mimetype="text/html")
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@bp.route("/intake-pdf/<public_id>/download")
+def intake_pdf_download(public_id):
+    path = pdf_pool.path_for(public_id)
+    if not os.path.exists(path):
+        submission = find_submission(public_id)
+        if not submission:
+            return "Not found", 404
+        future = schedule_pdf(public_id, schema.pdf_data(submission))
+        if future is not None:
+            try:
+                future.result(timeout=current_app.config["PDF_RENDER_TIMEOUT"])
+            except TimeoutError:
+                return Response(
+                    "PDF is being generated, please retry shortly.\n", 202, {"Retry-After": "5"}
+                )
+            except Exception as e:
+                # Render failed or the pool broke; the next request schedules a fresh job
+                print(f"Generating PDF for {public_id} failed: {e}")
+                return Response(
+                    "The PDF could not be generated right now. Please try again later.\n",
+                    503,
+                    {"Retry-After": "30"},
+                )
+    return send_file(
+        path,
+        mimetype="application/pdf",
+        download_name=f"intake-{public_id}.pdf",
+        conditional=True,
+        etag=True,
+        max_age=0,
+    )
+
+
+@bp.cli.command("init-db")
+def init_db_command():
+    """Create or upgrade the database schema."""
+    init_db()
+    print("Database ready.")
+
+
+@bp.cli.command("assets-build")
+@click.option("--prune", is_flag=True, help="Delete built files the new manifest no longer uses.")
+def assets_build(prune):
+    """Fingerprint and precompress the files under static/."""
+    manifest = assets.build()
+    print(f"Built {len(manifest)} asset(s) into {current_app.config['ASSETS_DIR']}.")
+    if prune:
+        print(f"Removed {prune_assets(current_app.config['ASSETS_DIR'], manifest)} stale file(s).")
+
+
+@bp.cli.command("mail-worker")
+@click.option("--once", is_flag=True, help="Send everything currently due, then exit.")
+@click.option("--workers", type=int, default=None, help="Number of sender threads.")
+def mail_worker(once, workers):
+    """Drain the mail outbox outside the web workers."""
+    if once:
+        print(f"Sent {outbox.drain()} message(s).")
+        metrics.flush()
+        return
+    outbox.start(workers)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        outbox.stop()
+
+
+@bp.cli.command("export-submissions")
+@click.option("--format", "fmt", type=click.Choice(sorted(export.FORMATS)), default="ndjson")
+@click.option("--since", help="Only rows submitted at/after this date or ISO timestamp.")
+@click.option("--until", help="Only rows submitted before this date or ISO timestamp.")
+@click.option("--after-id", type=int, help="Only rows with id greater than this (incremental sync).")
+@click.option("--output", type=click.File("wb"), default="-", help="Destination file (default stdout).")
+def export_submissions(fmt, since, until, after_id, output):
+    """Stream submissions as CSV or NDJSON."""
+    chunks = export.stream_export(
+        db.session, Submission, fmt,
+        batch_size=current_app.config["EXPORT_BATCH_SIZE"],
+        since=export.parse_timestamp(since),
+        until=export.parse_timestamp(until),
+        after_id=after_id,
     )
+    for chunk in chunks:
+        output.write(chunk)
+
+
+@bp.cli.command("rollups-rebuild")
+@click.option("--batch-size", type=int, default=1000)
+def rollups_rebuild(batch_size):
+    """Recompute the dashboard counters from the submissions table."""
+    count = rollups.rebuild(db.session, SubmissionRollup, Submission, batch_size=batch_size)
+    print(f"Counted {count} submission(s).")
+
+
+@bp.cli.command("facets-rebuild")
+@click.option("--batch-size", type=int, default=1000)
+def facets_rebuild(batch_size):
+    """Repopulate the project, page/feature and social link tables."""
+    count = facets.rebuild(db.session, Submission, FACET_MODELS, batch_size=batch_size)
+    print(f"Indexed {count} submission(s).")
+
+
+@bp.cli.command("archive-submissions")
+@click.option("--older-than", "days", type=int, default=None, help="Age in days (default ARCHIVE_AFTER_DAYS).")
+def archive_submissions(days):
+    """Move old submissions and their uploads into cold storage."""
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    total = 0
+    while True:
+        count = cold_storage.archive_batch(cutoff)
+        if not count:
+            break
+        total += count
+        print(f"Archived {total} submission(s)...")
+    print(f"Done: {total} submission(s) older than {days} days archived.")
+
+
+@bp.cli.command("archive-restore")
+@click.argument("public_id")
+def archive_restore(public_id):
+    """Move one archived submission back into the hot tables."""
+    if cold_storage.restore(public_id) is None:
+        raise click.ClickException(f"No archived submission {public_id}.")
+    print(f"Restored {public_id}.")
+
+
+@bp.cli.command("uploads-collect")
+def uploads_collect():
+    """Delete expired upload sessions and stored uploads nothing uses any more."""
+    print(f"Settled {chunked_uploads.purge_expired()} expired upload reference(s).")
+
+
+@bp.cli.command("search-rebuild")
+@click.option("--batch-size", type=int, default=1000)
+def search_rebuild(batch_size):
+    """Rebuild the full-text search index from the submissions table."""
+    if not search.is_supported(db.engine):
+        print("Full-text search needs the SQLite backend.")
+        return
+    count = search.rebuild(db.session, Submission, batch_size=batch_size)
+    print(f"Indexed {count} submission(s).")
+
+
+# -------------------------------------------------------------------
+# App factory
+# -------------------------------------------------------------------
+
 
+def create_app(config_object=Config):
+    """Build the app. Cheap enough to run in every worker: no schema work, no
+    directory creation and no network; run `flask init-db` to set up the database."""
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+
+    if app.config["PROXY_FIX_X_FOR"]:
+        # request.remote_addr (the rate-limit key) comes from X-Forwarded-For
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"], x_proto=1)
+
+    db.init_app(app)
+    metrics.init_app(app, db)
+    with app.app_context():
+        # Also drops pooled connections in forked children (gunicorn preload_app)
+        configure_engine(db.engine, busy_timeout=app.config["SQLITE_BUSY_TIMEOUT"])
+        if app.config["SQLITE_GROUP_COMMIT"] and db.engine.dialect.name == "sqlite":
+            app.extensions["group_committer"] = GroupCommitter(
+                sessionmaker(bind=db.engine, expire_on_commit=False),
+                max_batch=app.config["GROUP_COMMIT_MAX_BATCH"],
+                max_delay=app.config["GROUP_COMMIT_MAX_DELAY_MS"] / 1000,
+            )
+
+    outbox.init_app(app, db, OutboxMessage)
+    pending.init_app(app, db, PendingSubmission, payload_type=schema.IntakePayload)
+    limiter.init_app(app, db, RateLimitBucket)
+    uploads.init_app(app)
+    upload_references.init_app(app, db, UploadReference, uploads)
+    chunked_uploads.init_app(app, uploads, refs=upload_references)
+    cold_storage.init_app(app, db, Submission, ArchivedSubmission, uploads, upload_references)
+    render_cache.init_app(app, "intake_pdf.html")
+    pdf_pool.init_app(app)
+    assets.init_app(app)
+    page_cache.init_app(app)
+    live_feed.init_app(app, db, AdminEvent, counters=submission_stats)
+
+    app.register_blueprint(bp)
+    return app
 
-print("Registered routes:", [rule.rule for rule in app.url_map.iter_rules()])
 
 if __name__ == "__main__":
+    app = create_app()
+    with app.app_context():
+        init_db()
     app.run(debug=True, port=5001)
@@ -0,0 +1,275 @@
+"""
+Cold storage for old submissions and the uploads only they reference.
+
+``archive_batch()`` writes up to ``ARCHIVE_BATCH_SIZE`` submissions older
+than a cutoff into one compressed ZIP under ``ARCHIVE_DIR`` (one JSON member
+per submission, plus each referenced upload once), records them in the
+archive table and deletes them from the hot table. The deletes go through
+the ORM, so the search index, counters, facet tables and upload references
+drop them too; the dashboard describes the hot table. An archived upload is
+then removed from ``UPLOAD_FOLDER`` unless something still references it
+(upload_refs.py: another submission, a pending one, an unsubmitted chunked
+upload), which costs a lookup per archived file rather than a table scan.
+Rows from before the upload store list bare filenames; those files are
+copied into the ZIP by name and left in place, since nothing records which
+other submissions share them.
+
+``load()`` rehydrates an archived submission into a detached model instance
+for read-only views, keeping the last ``ARCHIVE_CACHE_SIZE`` in memory; it
+returns None if the archive file is missing or unreadable.
+``restore()`` moves one back into the hot tables; ``is_restore()`` tells
+mapper events that the insert is not a new submission.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from datetime import date, datetime
+
+import msgspec
+from sqlalchemy import Date, DateTime, select
+from sqlalchemy.orm import object_session
+
+_json = msgspec.json.Encoder()
+RESTORING = "archive_restoring"  # session.info flag while restore() flushes
+
+
+def is_restore(target) -> bool:
+    """Whether ``target`` is being inserted by ``ColdStorage.restore``."""
+    session = object_session(target)
+    return session is not None and session.info.get(RESTORING, False)
+
+
+def _member(public_id):
+    return f"submissions/{public_id}.json"
+
+
+def _file_member(digest):
+    return f"files/{digest}"
+
+
+def _legacy_member(filename):
+    return f"files/legacy/{filename}"
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class ColdStorage:
+    def __init__(self, app=None, db=None, model=None, archive_model=None, store=None, refs=None):
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db, model, archive_model, store, refs)
+
+    def init_app(self, app, db, model, archive_model, store, refs):
+        """``refs`` is the ``UploadReferences`` that says which stored files are in use."""
+        app.config.setdefault("ARCHIVE_DIR", os.path.join(app.instance_path, "archive"))
+        app.config.setdefault("ARCHIVE_AFTER_DAYS", 365)
+        app.config.setdefault("ARCHIVE_BATCH_SIZE", 500)
+        app.config.setdefault("ARCHIVE_CACHE_SIZE", 64)
+        self.app = app
+        self.db = db
+        self.model = model
+        self.archive_model = archive_model
+        self.store = store
+        self.refs = refs
+        with self._lock:
+            self._cache.clear()
+        app.extensions["cold_storage"] = self
+
+    # ---------------------------------------------------------------
+    # Serialization
+    # ---------------------------------------------------------------
+
+    def _dump(self, submission) -> bytes:
+        return _json.encode({
+            column.name: _encode_value(getattr(submission, column.key))
+            for column in self.model.__table__.columns
+        })
+
+    def _build(self, raw: bytes):
+        """Detached model instance from an archived JSON document."""
+        data = msgspec.json.decode(raw)
+        values = {}
+        for column in self.model.__table__.columns:
+            value = data.get(column.name)
+            if value is not None:
+                if isinstance(column.type, DateTime):
+                    value = datetime.fromisoformat(value)
+                elif isinstance(column.type, Date):
+                    value = date.fromisoformat(value)
+            values[column.key] = value
+        return self.model(**values)
+
+    # ---------------------------------------------------------------
+    # Archiving
+    # ---------------------------------------------------------------
+
+    def archive_batch(self, cutoff: datetime) -> int:
+        """Archive one batch of submissions submitted before ``cutoff``; returns how many."""
+        session = self.db.session
+        model = self.model
+        submissions = (
+            session.query(model)
+            .filter(model.submitted_at < cutoff)
+            .order_by(model.submitted_at, model.id)
+            .limit(self.app.config["ARCHIVE_BATCH_SIZE"])
+            .all()
+        )
+        if not submissions:
+            return 0
+
+        directory = self.app.config["ARCHIVE_DIR"]
+        os.makedirs(directory, exist_ok=True)
+        name = f"submissions-{datetime.utcnow():%Y%m%d-%H%M%S}-{submissions[0].id}.zip"
+        path = os.path.join(directory, name)
+        digests = self._write_archive(path, submissions)
+
+        now = datetime.utcnow()
+        try:
+            for submission in submissions:
+                session.add(self.archive_model(
+                    id=submission.id,
+                    public_id=submission.public_id,
+                    full_name=submission.full_name,
+                    email=submission.email,
+                    submitted_at=submission.submitted_at,
+                    archived_at=now,
+                    archive=name,
+                ))
+                session.delete(submission)
+            session.commit()
+        except BaseException:
+            session.rollback()
+            os.unlink(path)
+            raise
+
+        self._release_files(name, digests)
+        return len(submissions)
+
+    def _write_archive(self, path, submissions):
+        """Write the ZIP atomically; returns the upload digests it contains."""
+        digests, legacy = set(), set()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as bundle:
+                for submission in submissions:
+                    bundle.writestr(_member(submission.public_id), self._dump(submission))
+                    for meta in submission.files or ():
+                        if not isinstance(meta, dict):
+                            filename = os.path.basename(meta)
+                            legacy_path = self._legacy_path(filename)
+                            if filename not in legacy and os.path.isfile(legacy_path):
+                                bundle.write(legacy_path, _legacy_member(filename))
+                                legacy.add(filename)
+                            continue
+                        digest = meta.get("digest")
+                        if digest in digests or not digest or not self.store.exists(digest):
+                            continue
+                        bundle.write(self.store.path_for(digest), _file_member(digest))
+                        digests.add(digest)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digests
+
+    def _legacy_path(self, filename):
+        return os.path.join(self.store.root, os.path.basename(filename))
+
+    def _release_files(self, name, digests):
+        """Delete archived uploads that nothing references any more."""
+        if not digests:
+            return
+        unsettled = digests - self.refs.remove_unused(digests)
+        if unsettled:
+            # Written moments ago; let the next collect() look at them again
+            self.refs.hold(f"archive:{name}", [{"digest": d} for d in unsettled], datetime.utcnow())
+
+    # ---------------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------------
+
+    def load(self, public_id):
+        """The archived submission as a detached model instance, or None."""
+        with self._lock:
+            submission = self._cache.get(public_id)
+            if submission is not None:
+                self._cache.move_to_end(public_id)
+                return submission
+
+        record = self.db.session.execute(
+            select(self.archive_model).where(self.archive_model.public_id == public_id)
+        ).scalar_one_or_none()
+        if record is None:
+            return None
+        try:
+            with zipfile.ZipFile(os.path.join(self.app.config["ARCHIVE_DIR"], record.archive)) as bundle:
+                submission = self._build(bundle.read(_member(public_id)))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile, msgspec.DecodeError) as e:
+            print(f"Reading archived submission {public_id} from {record.archive} failed: {e}")
+            return None
+
+        with self._lock:
+            self._cache[public_id] = submission
+            while len(self._cache) > self.app.config["ARCHIVE_CACHE_SIZE"]:
+                self._cache.popitem(last=False)
+        return submission
+
+    def restore(self, public_id):
+        """Move an archived submission and its uploads back into the hot tables."""
+        session = self.db.session
+        record = session.execute(
+            select(self.archive_model).where(self.archive_model.public_id == public_id)
+        ).scalar_one_or_none()
+        if record is None:
+            return None
+
+        with zipfile.ZipFile(os.path.join(self.app.config["ARCHIVE_DIR"], record.archive)) as bundle:
+            submission = self._build(bundle.read(_member(public_id)))
+            members = set(bundle.namelist())
+            os.makedirs(self.store.tmp_dir, exist_ok=True)
+            for meta in submission.files or ():
+                if not isinstance(meta, dict):
+                    self._restore_legacy(bundle, members, meta)
+                    continue
+                digest = meta.get("digest")
+                if not digest or _file_member(digest) not in members:
+                    continue
+                fd, tmp_path = tempfile.mkstemp(dir=self.store.tmp_dir)
+                with os.fdopen(fd, "wb") as out, bundle.open(_file_member(digest)) as source:
+                    while True:
+                        chunk = source.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                self.store.commit(tmp_path, digest)
+
+        session.delete(record)
+        session.add(submission)
+        session.info[RESTORING] = True
+        try:
+            session.commit()
+        finally:
+            session.info.pop(RESTORING, None)
+        with self._lock:
+            self._cache.pop(public_id, None)
+        return submission
+
+    def _restore_legacy(self, bundle, members, filename):
+        path = self._legacy_path(filename)
+        member = _legacy_member(os.path.basename(filename))
+        if member not in members or os.path.exists(path):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.store.tmp_dir)
+        with os.fdopen(fd, "wb") as out, bundle.open(member) as source:
+            shutil.copyfileobj(source, out, 1024 * 1024)
+        os.replace(tmp_path, path)
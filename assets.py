@@ -0,0 +1,163 @@
+"""
+Fingerprinted, precompressed static assets.
+
+``build()`` copies every file under ``static/`` to ``ASSETS_DIR`` with a
+content hash in its name (``css/style.css`` -> ``css/style.1a2b3c4d5e6f.css``),
+writes ``.gz`` and ``.br`` siblings for text assets, and records the mapping
+in ``manifest.json``. ``brotli`` is pinned in requirements.txt; a checkout
+without it still builds, gzip only.
+
+``asset_url()`` (a Jinja global) turns a logical name into the fingerprinted
+URL, falling back to the plain ``static`` URL for files that were not built.
+Fingerprinted files never change, so ``/assets/`` serves them with a one-year
+``immutable`` Cache-Control and picks the precompressed variant the client
+accepts; workers never compress anything at request time.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import tempfile
+
+from flask import abort, request, send_file, url_for
+
+try:
+    import brotli
+except ImportError:  # e.g. a dev checkout without requirements.txt: gzip only
+    brotli = None
+
+MANIFEST = "manifest.json"
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+ONE_YEAR = 365 * 24 * 3600
+
+
+def fingerprinted_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:12]}{ext}"
+
+
+def _write(path, body):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _variants(name, body):
+    """(suffix, encoder) for every file built from one asset, compressed ones first."""
+    variants = []
+    if os.path.splitext(name)[1] in COMPRESSIBLE:
+        variants.append((".gz", lambda: gzip.compress(body, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            variants.append((".br", lambda: brotli.compress(body, quality=11)))
+    variants.append(("", lambda: body))
+    return variants
+
+
+def build(source_dir, output_dir):
+    """Fingerprint and precompress everything in ``source_dir``; returns the manifest."""
+    manifest = {}
+    for folder, _, files in os.walk(source_dir):
+        for filename in sorted(files):
+            source = os.path.join(folder, filename)
+            name = os.path.relpath(source, source_dir).replace(os.sep, "/")
+            with open(source, "rb") as fh:
+                body = fh.read()
+            built = fingerprinted_name(name, hashlib.sha256(body).hexdigest())
+            manifest[name] = built
+
+            target = os.path.join(output_dir, built)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Each file on its own: a variant that is missing (deleted, or brotli
+            # installed since the last build) is added next to the existing ones
+            for suffix, encode in _variants(name, body):
+                if not os.path.exists(target + suffix):
+                    _write(target + suffix, encode())
+
+    os.makedirs(output_dir, exist_ok=True)
+    _write(os.path.join(output_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def prune(output_dir, manifest):
+    """Remove built files no longer referenced by ``manifest``; returns how many."""
+    keep = {MANIFEST}
+    for built in manifest.values():
+        keep.update((built, built + ".gz", built + ".br"))
+    removed = 0
+    for folder, _, files in os.walk(output_dir):
+        for filename in files:
+            path = os.path.join(folder, filename)
+            if os.path.relpath(path, output_dir).replace(os.sep, "/") not in keep:
+                os.unlink(path)
+                removed += 1
+    return removed
+
+
+class Assets:
+    def __init__(self, app=None):
+        self._manifest = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ASSETS_DIR", os.path.join(app.instance_path, "assets"))
+        self.app = app
+        self._manifest = None
+        app.add_url_rule("/assets/<path:filename>", endpoint="asset", view_func=self.serve)
+        app.jinja_env.globals["asset_url"] = self.url
+        app.extensions["assets"] = self
+
+    @property
+    def manifest(self):
+        # Read on first use, once per process
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.app.config["ASSETS_DIR"], MANIFEST), "rb") as fh:
+                    self._manifest = json.load(fh)
+            except (OSError, ValueError):
+                self._manifest = {}
+        return self._manifest
+
+    def url(self, filename):
+        # Debug mode serves the live files so edits show up without a rebuild
+        built = None if self.app.debug else self.manifest.get(filename)
+        if built is None:
+            return url_for("static", filename=filename)
+        return url_for("asset", filename=built)
+
+    def build(self):
+        manifest = build(self.app.static_folder, self.app.config["ASSETS_DIR"])
+        self._manifest = manifest
+        return manifest
+
+    def serve(self, filename):
+        directory = self.app.config["ASSETS_DIR"]
+        path = os.path.realpath(os.path.join(directory, filename))
+        if not path.startswith(os.path.realpath(directory) + os.sep) or not os.path.isfile(path):
+            abort(404)
+        if filename == MANIFEST or filename.endswith((".gz", ".br")):
+            abort(404)  # variants are only served through negotiation
+
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        encoding = None
+        accepted = request.accept_encodings
+        for candidate, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if accepted[candidate] and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=ONE_YEAR)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
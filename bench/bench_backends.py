@@ -0,0 +1,75 @@
+"""
+SQLite vs MySQL under the multi-worker submit/verify load.
+
+Runs ``bench_flow.py --mode gunicorn`` once per backend with the same
+workers, seed, flows and concurrency: SQLite (the default file profile) and
+every ``--database-url`` given. It then prints the per-route latencies side
+by side. The server database is dropped and re-seeded for its run.
+
+A local MySQL-compatible server is enough, e.g.:
+
+    docker run -d --name intake-mysql -p 3306:3306 \\
+        -e MYSQL_ALLOW_EMPTY_PASSWORD=1 -e MYSQL_DATABASE=intake_bench mysql:8.4
+    python bench/bench_backends.py --workers 4 --seed 100000 --flows 500 \\
+        --database-url mysql://root@127.0.0.1:3306/intake_bench
+
+Prints one JSON object: the raw bench_flow result per backend plus a
+``compare`` table of p50/p95/p99 and throughput per route.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ("POST /submit", "POST /verify-email", "GET /admin/submissions", "GET /intake-pdf/<public_id>")
+
+
+def run_flow(args, database_url=None):
+    command = [
+        sys.executable, os.path.join(ROOT, "bench", "bench_flow.py"),
+        "--mode", "gunicorn",
+        "--workers", str(args.workers),
+        "--seed", str(args.seed),
+        "--flows", str(args.flows),
+        "--concurrency", str(args.concurrency),
+        "--uploads", str(args.uploads),
+    ]
+    if database_url:
+        command += ["--database-url", database_url]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", action="append", default=[], help="server database to compare (repeatable)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=10000)
+    parser.add_argument("--flows", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--uploads", type=int, default=0, help="files per submission (0 isolates the database)")
+    args = parser.parse_args()
+
+    results = {"sqlite": run_flow(args)}
+    for url in args.database_url:
+        result = run_flow(args, url)
+        results[url.rsplit("@", 1)[-1]] = result  # host/db only, never the password
+
+    compare = {}
+    for route in ROUTES + ("flows_per_sec",):
+        row = {}
+        for name, result in results.items():
+            if route == "flows_per_sec":
+                row[name] = result["flows_per_sec"]
+                continue
+            stats = result["routes"].get(route, {})
+            row[name] = {key: stats.get(key) for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "errors")}
+        compare[route] = row
+
+    print(json.dumps({"results": results, "compare": compare}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
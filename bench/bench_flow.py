@@ -0,0 +1,449 @@
+"""
+End-to-end load test of the intake flow.
+
+Each virtual user walks the whole path a real applicant and the admin take:
+
+  GET  /                         intake form
+  POST /submit                   multipart form with synthetic uploads
+       (OTP read from a local SMTP sink)
+  POST /verify-email             submits the captured OTP
+  GET  /admin/submissions        first page of the admin list
+  GET  /intake-pdf/<public_id>   rendered intake page
+
+against either the Flask test client (``--mode client``, in-process) or a
+real multi-worker gunicorn (``--mode gunicorn``, over HTTP). The database is
+a copy of a seeded file with ``--seed`` submissions (cached under
+``--cache-dir`` so 100k/1M seeds are only built once); uploads, caches and
+the database of a run live in a temporary directory.
+
+Usage:
+    python bench/bench_flow.py --mode client --seed 1000 --flows 200 --concurrency 8
+    python bench/bench_flow.py --mode gunicorn --workers 4 --seed 100000 --flows 500
+    python bench/bench_flow.py --mode gunicorn --database-url mysql://root@127.0.0.1/intake_bench
+Prints one JSON object: throughput plus p50/p95/p99 latency per route.
+"""
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from smtp_sink import SMTPSink  # noqa: E402
+
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-password"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+FORM = {
+    "fullName": "Bench Applicant",
+    "profession": "Designer",
+    "tagline": "Making things people use",
+    "bioLong": "Long biography. " * 60,
+    "bioShort": "Short bio.",
+    "skills": "Figma, Python, SQL",
+    "brandKeywords": "modern, clean, bold",
+    "projectTitle[]": ["Storefront", "Portfolio"],
+    "projectRole[]": ["Lead", "Solo"],
+    "projectDesc[]": ["Rebuilt checkout", "Personal site"],
+    "projectTech[]": ["React", "Flask"],
+    "projectResults[]": ["+20% conversion", ""],
+    "projectUrl[]": ["https://example.com/a", ""],
+    "pages[]": ["home", "about", "portfolio", "contact"],
+    "features[]": ["seo", "blog"],
+    "deadline": "2027-01-15",
+    "linkedin": "https://linkedin.com/in/bench",
+}
+
+
+# -------------------------------------------------------------------
+# Seed data
+# -------------------------------------------------------------------
+
+
+def seed_rows(start, count, now):
+    for i in range(start, start + count):
+        yield {
+            "public_id": f"S{i:07d}",
+            "full_name": f"Seed User {i}",
+            "email": f"seed{i}@bench.local",
+            "profession": random.choice(("Designer", "Developer", "Photographer", "Writer")),
+            "tagline": "Seeded submission",
+            "bio_long": "Seeded biography text. " * 20,
+            "skills": "Python, SQL, Figma",
+            "brand_keywords": "modern, clean",
+            "social_links": {"linkedin": f"https://linkedin.com/in/seed{i}"},
+            "projects": [{"title": "Seed project", "tech": "Flask"}],
+            "pages": ["home", "about"],
+            "features": ["seo"],
+            "technical_prefs": {},
+            "files": [],
+            "submitted_at": now - timedelta(seconds=i * 30),
+        }
+
+
+def seed_engine(engine, count, batch_size=5000):
+    """Create the schema on ``engine`` and insert ``count`` submissions (no FTS)."""
+    from app import Submission, db
+
+    db.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, count, batch_size):
+            rows = list(seed_rows(start, min(batch_size, count - start), now))
+            connection.execute(Submission.__table__.insert(), rows)
+    engine.dispose()
+
+
+def build_seed(path, count, batch_size=5000):
+    """Write a database file holding ``count`` submissions."""
+    from sqlalchemy import create_engine
+
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+    seed_engine(create_engine("sqlite:///" + tmp_path), count, batch_size)
+    os.replace(tmp_path, path)
+
+
+def prepare_server_database(url, seed):
+    """Drop and re-seed a server database (nothing to copy, so it is rebuilt every run)."""
+    from sqlalchemy import create_engine
+
+    from app import db
+    from database import normalize_url
+
+    engine = create_engine(normalize_url(url))
+    db.metadata.drop_all(engine)
+    started = time.perf_counter()
+    seed_engine(engine, seed)
+    print(f"Seeded {seed} submissions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def prepare_database(run_dir, seed, cache_dir, reseed):
+    os.makedirs(cache_dir, exist_ok=True)
+    seed_path = os.path.join(cache_dir, f"seed-{seed}.db")
+    if reseed or not os.path.exists(seed_path):
+        started = time.perf_counter()
+        build_seed(seed_path, seed)
+        print(f"Seeded {seed} submissions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    db_path = os.path.join(run_dir, "bench.db")
+    shutil.copyfile(seed_path, db_path)
+    return db_path
+
+
+# -------------------------------------------------------------------
+# Drivers
+# -------------------------------------------------------------------
+
+
+class ClientDriver:
+    """In-process: one Flask test client (own cookie jar) per virtual user."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def session(self):
+        client = self.app.test_client()
+
+        def request(method, path, data=None, files=None, headers=None):
+            if files:
+                data = dict(data or {})
+                for field, items in files.items():
+                    data[field] = [(io.BytesIO(body), name) for name, body in items]
+            response = client.open(
+                path, method=method, data=data, headers=headers,
+                content_type="multipart/form-data" if files else None,
+            )
+            response.close()
+            return response.status_code, response.headers.get("Location")
+
+        return request
+
+
+class HttpDriver:
+    """Over HTTP: one requests.Session per virtual user."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def session(self):
+        import requests
+
+        http = requests.Session()
+
+        def request(method, path, data=None, files=None, headers=None):
+            multipart = None
+            if files:
+                multipart = [(field, (name, body)) for field, items in files.items() for name, body in items]
+            response = http.request(
+                method, self.base_url + path, data=data, files=multipart,
+                headers=headers, allow_redirects=False,
+            )
+            return response.status_code, response.headers.get("Location")
+
+        return request
+
+
+# -------------------------------------------------------------------
+# Load
+# -------------------------------------------------------------------
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds, ok):
+        with self._lock:
+            if ok:
+                self.samples.setdefault(route, []).append(seconds)
+            else:
+                self.errors[route] = self.errors.get(route, 0) + 1
+                self.samples.setdefault(route, [])
+
+    def summary(self, wall):
+        def pct(values, p):
+            return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2)
+
+        routes = {}
+        for route, values in self.samples.items():
+            values = sorted(values)
+            stats = {"count": len(values), "errors": self.errors.get(route, 0)}
+            if values:
+                stats.update(
+                    throughput_rps=round(len(values) / wall, 1),
+                    p50_ms=pct(values, 0.50),
+                    p95_ms=pct(values, 0.95),
+                    p99_ms=pct(values, 0.99),
+                    mean_ms=round(statistics.mean(values) * 1000, 2),
+                )
+            routes[route] = stats
+        return routes
+
+
+def synthetic_files(upload_kb, upload_count):
+    # Random bodies so content-addressed storage cannot dedupe them away
+    size = max(upload_kb * 1024 - len(PNG_SIGNATURE), 0)
+    return {
+        "brandAssets": [
+            (f"asset-{n}.png", PNG_SIGNATURE + os.urandom(size)) for n in range(upload_count)
+        ]
+    }
+
+
+def run_flow(request, sink, recorder, flow_no, args):
+    email = f"user{flow_no}-{os.getpid()}@bench.local"
+    admin = {
+        "Authorization": "Basic "
+        + base64.b64encode(f"{ADMIN_USERNAME}:{ADMIN_PASSWORD}".encode()).decode()
+    }
+
+    def timed(route, method, path, expect, **kwargs):
+        started = time.perf_counter()
+        try:
+            status, location = request(method, path, **kwargs)
+        except Exception as e:
+            print(f"{route} failed: {e}", file=sys.stderr)
+            recorder.record(route, 0, False)
+            return None
+        recorder.record(route, time.perf_counter() - started, status in expect)
+        return location if status in expect else None
+
+    timed("GET /", "GET", "/", {200})
+
+    data = dict(FORM, email=email)
+    files = synthetic_files(args.upload_kb, args.uploads) if args.uploads else None
+    if timed("POST /submit", "POST", "/submit", {302}, data=data, files=files) is None:
+        return
+
+    started = time.perf_counter()
+    try:
+        otp = sink.wait_for_otp(email, timeout=args.otp_timeout)
+    except TimeoutError:
+        recorder.record("otp delivery", 0, False)
+        return
+    recorder.record("otp delivery", time.perf_counter() - started, True)
+
+    location = timed("POST /verify-email", "POST", "/verify-email", {302}, data={"otp": otp})
+    if not location or "/thank-you/" not in location:
+        return
+    public_id = location.rstrip("/").rsplit("/", 1)[1]
+
+    timed("GET /admin/submissions", "GET", "/admin/submissions", {200}, headers=admin)
+    timed("GET /intake-pdf/<public_id>", "GET", f"/intake-pdf/{public_id}", {200})
+
+
+def run_load(driver, sink, args):
+    recorder = Recorder()
+    counter = iter(range(args.flows))
+    counter_lock = threading.Lock()
+
+    def user():
+        request = driver.session()
+        while True:
+            with counter_lock:
+                flow_no = next(counter, None)
+            if flow_no is None:
+                return
+            run_flow(request, sink, recorder, flow_no, args)
+
+    started = time.perf_counter()
+    users = [threading.Thread(target=user) for _ in range(args.concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    wall = time.perf_counter() - started
+    return wall, recorder
+
+
+# -------------------------------------------------------------------
+# Gunicorn
+# -------------------------------------------------------------------
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(env, workers, port, timeout=60):
+    import requests
+
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "--config", os.path.join(ROOT, "gunicorn.conf.py"),
+            "--bind", f"127.0.0.1:{port}",
+            "--workers", str(workers),
+            "app:create_app()",
+        ],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited:\n" + process.stderr.read().decode())
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start listening")
+
+
+# -------------------------------------------------------------------
+# Main
+# -------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("client", "gunicorn"), default="client")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--seed", type=int, default=1000, help="submissions already in the database")
+    parser.add_argument("--flows", type=int, default=200, help="complete submit-to-PDF flows")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users")
+    parser.add_argument("--uploads", type=int, default=1, help="files per submission")
+    parser.add_argument("--upload-kb", type=int, default=256)
+    parser.add_argument("--otp-timeout", type=float, default=30)
+    parser.add_argument("--cache-dir", default=os.path.join(ROOT, "instance", "bench"))
+    parser.add_argument("--reseed", action="store_true", help="rebuild the cached seed database")
+    parser.add_argument(
+        "--database-url", default=None,
+        help="run against this server database (e.g. mysql://root@127.0.0.1/intake_bench); "
+        "it is dropped and re-seeded",
+    )
+    parser.add_argument("--output", type=argparse.FileType("w"), default="-")
+    args = parser.parse_args()
+
+    run_dir = tempfile.mkdtemp(prefix="bench-flow-")
+    sink = SMTPSink(port=0).start()
+    env = {
+        "SQLITE_PATH": os.path.join(run_dir, "bench.db"),
+        "UPLOAD_FOLDER": os.path.join(run_dir, "uploads"),
+        "RENDER_CACHE_DIR": os.path.join(run_dir, "render_cache"),
+        "PDF_CACHE_DIR": os.path.join(run_dir, "pdf_cache"),
+        "METRICS_DIR": os.path.join(run_dir, "metrics"),
+        "MAIL_SERVER": sink.host,
+        "MAIL_PORT": str(sink.port),
+        "MAIL_USE_TLS": "0",
+        "MAIL_USERNAME": "",
+        "MAIL_DEFAULT_SENDER": "bench@bench.local",
+        "MAIL_OUTBOX_EMBEDDED": "1",
+        # Every virtual user shares 127.0.0.1; measure the app, not the limiter
+        "RATELIMIT_ENABLED": "0",
+        "ADMIN_USERNAME": ADMIN_USERNAME,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+    }
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    # Config reads the environment at import time
+    os.environ.update(env)
+
+    process = None
+    try:
+        if args.database_url:
+            prepare_server_database(args.database_url, args.seed)
+        else:
+            prepare_database(run_dir, args.seed, args.cache_dir, args.reseed)
+
+        from app import create_app, init_db
+
+        app = create_app()
+        # Keep stdout for the JSON result
+        with app.app_context(), contextlib.redirect_stdout(sys.stderr):
+            init_db()
+
+        if args.mode == "gunicorn":
+            port = free_port()
+            process = start_gunicorn(dict(os.environ, INIT_DB_ON_START="0"), args.workers, port)
+            driver = HttpDriver(f"http://127.0.0.1:{port}")
+        else:
+            driver = ClientDriver(app)
+
+        wall, recorder = run_load(driver, sink, args)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        sink.stop()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    completed = len(recorder.samples.get("GET /intake-pdf/<public_id>", []))
+    result = {
+        "mode": args.mode,
+        "backend": args.database_url.split(":", 1)[0] if args.database_url else "sqlite",
+        "workers": args.workers if args.mode == "gunicorn" else 1,
+        "seed": args.seed,
+        "flows": args.flows,
+        "completed_flows": completed,
+        "concurrency": args.concurrency,
+        "upload_bytes": args.uploads * args.upload_kb * 1024,
+        "seconds": round(wall, 3),
+        "flows_per_sec": round(completed / wall, 2),
+        "routes": recorder.summary(wall),
+    }
+    args.output.write(json.dumps(result, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Concurrent insert benchmark for the SQLite engine profiles.
+
+Simulates verify_email under gunicorn: several processes, each with a few
+threads, insert submission-sized rows one transaction at a time. Each
+profile runs against a fresh database file:
+
+  baseline  rollback journal, pysqlite's default 5s timeout
+  wal       database.configure_engine() profile (WAL, busy timeout, caches)
+  group     wal + GroupCommitter batching concurrent inserts
+
+Usage:
+    python bench/bench_sqlite_concurrency.py --procs 4 --threads 8 --inserts 200
+Prints one JSON object per profile.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import configure_engine, sqlite_engine_options  # noqa: E402
+from group_commit import GroupCommitter  # noqa: E402
+
+Base = declarative_base()
+PROFILES = ("baseline", "wal", "group")
+
+
+class Row(Base):
+    __tablename__ = "bench_submissions"
+
+    id = Column(Integer, primary_key=True)
+    public_id = Column(String(16), unique=True)
+    full_name = Column(String(255))
+    bio_long = Column(Text)
+    submitted_at = Column(DateTime)
+
+
+def make_engine(profile, path):
+    url = "sqlite:///" + path
+    if profile == "baseline":
+        return create_engine(url)
+    engine = create_engine(url, **sqlite_engine_options(busy_timeout=30.0))
+    return configure_engine(engine)
+
+
+def worker(profile, path, threads, inserts, results):
+    engine = make_engine(profile, path)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    committer = GroupCommitter(Session) if profile == "group" else None
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def run(thread_no):
+        nonlocal errors
+        bio = "x" * 2000
+        for i in range(inserts):
+            row = Row(
+                public_id=f"{os.getpid()}-{thread_no}-{i}",
+                full_name="Bench User",
+                bio_long=bio,
+                submitted_at=None,
+            )
+            start = time.perf_counter()
+            try:
+                if committer is not None:
+                    committer.commit(add=[row])
+                else:
+                    session = Session()
+                    try:
+                        session.add(row)
+                        session.commit()
+                    finally:
+                        session.close()
+            except OperationalError:
+                with lock:
+                    errors += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    results.put((latencies, errors))
+
+
+def run_profile(profile, procs, threads, inserts):
+    tmp_dir = tempfile.mkdtemp(prefix="bench-sqlite-")
+    path = os.path.join(tmp_dir, "bench.db")
+    engine = make_engine(profile, path)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    started = time.perf_counter()
+    children = [
+        ctx.Process(target=worker, args=(profile, path, threads, inserts, results))
+        for _ in range(procs)
+    ]
+    for child in children:
+        child.start()
+    latencies, errors = [], 0
+    for _ in children:
+        lat, err = results.get()
+        latencies.extend(lat)
+        errors += err
+    for child in children:
+        child.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2) if latencies else None
+
+    return {
+        "profile": profile,
+        "procs": procs,
+        "threads": threads,
+        "attempted": procs * threads * inserts,
+        "committed": len(latencies),
+        "locked_errors": errors,
+        "seconds": round(wall, 3),
+        "inserts_per_sec": round(len(latencies) / wall, 1),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite concurrent insert benchmark")
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--inserts", type=int, default=100, help="inserts per thread")
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    args = parser.parse_args()
+
+    for profile in args.profiles.split(","):
+        print(json.dumps(run_profile(profile, args.procs, args.threads, args.inserts)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark: import-to-first-response time of the web app.
+
+Each run is a fresh interpreter that imports ``app``, builds the WSGI app
+(``create_app()`` if the tree has a factory, the module-level ``app``
+otherwise) and serves ``GET /`` through the test client. With ``--rev`` the
+same measurement is taken on another git revision, checked out into a
+temporary worktree, so a change can be compared against its baseline.
+
+Usage:
+    python bench/bench_startup.py --runs 10
+    python bench/bench_startup.py --runs 10 --rev HEAD~1
+Prints one JSON object per tree.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import app as module
+t1 = time.perf_counter()
+application = module.create_app() if hasattr(module, "create_app") else module.app
+t2 = time.perf_counter()
+status = application.test_client().get("/").status_code
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "build": t2 - t1, "first_response": t3 - t2, "status": status}))
+"""
+
+
+def run_once(tree):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    started = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=tree, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    total = time.perf_counter() - started
+    # Older trees print to stdout while importing; the timings are the last line
+    sample = json.loads(out.strip().splitlines()[-1])
+    sample["total"] = total
+    return sample
+
+
+def measure(tree, runs, label):
+    run_once(tree)  # warm the bytecode cache so every run compares like with like
+    samples = [run_once(tree) for _ in range(runs)]
+
+    def ms(key):
+        values = [s[key] * 1000 for s in samples]
+        return {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+
+    return {
+        "tree": label,
+        "runs": runs,
+        "status": samples[-1]["status"],
+        "import_ms": ms("import"),
+        "build_ms": ms("build"),
+        "first_response_ms": ms("first_response"),
+        "process_total_ms": ms("total"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--rev", help="Also measure this git revision for comparison.")
+    args = parser.parse_args()
+
+    if args.rev:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, "tree")
+            subprocess.run(
+                ["git", "worktree", "add", "--detach", worktree, args.rev],
+                cwd=ROOT, check=True, capture_output=True,
+            )
+            try:
+                print(json.dumps(measure(worktree, args.runs, args.rev)))
+            finally:
+                subprocess.run(
+                    ["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True
+                )
+    print(json.dumps(measure(ROOT, args.runs, "working tree")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Chunked, resumable uploads into the content-addressed ``UploadStore``.
+
+The browser opens an upload (name, size, form field), PUTs fixed-size
+chunks in any order and in parallel, then asks for it to be completed.
+State lives on disk under ``<UPLOAD_FOLDER>/.partial/<upload id>/`` so any
+gunicorn worker can take any chunk, and a client that lost its connection
+asks which chunks arrived and sends only the rest. Completion streams the
+chunks through the store's hasher in ``CHUNK_SIZE`` reads, so memory stays
+bounded whatever the file size. The form POST then carries only upload ids.
+
+Completion runs once: the first request creates a ``complete.lock`` marker
+and assembles; a concurrent one (a retry, a double click) gets the stored
+result if there is one, else 409. A finished upload holds its file in the
+store for ``UPLOAD_SESSION_TTL`` (upload_refs.py); unless a submission
+picks it up by then, the file is collected with the session.
+
+Collection never runs on a request: each process starts one background
+thread (``start_collector()``, on its first upload or form POST) that calls
+``purge_expired()`` every ``UPLOAD_COLLECT_INTERVAL`` seconds and logs its
+own errors. Set the interval to 0 to leave it to ``flask uploads-collect``.
+"""
+import hashlib
+import json
+import os
+import random
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from upload_store import CHUNK_SIZE, sniff_type
+
+STALE_LOCK = 600  # seconds; assembling even the largest upload takes far less
+
+
+class UploadError(Exception):
+    """Rejected upload request; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class ChunkedUploads:
+    def __init__(self, app=None, store=None, refs=None):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app, store, refs)
+
+    def init_app(self, app, store, refs=None):
+        """``refs`` (an ``UploadReferences``) tracks finished uploads until they are submitted."""
+        app.config.setdefault("UPLOAD_CHUNK_SIZE", 1024 * 1024)
+        app.config.setdefault("UPLOAD_MAX_FILE_SIZE", 64 * 1024 * 1024)
+        app.config.setdefault("UPLOAD_SESSION_TTL", 24 * 3600)
+        app.config.setdefault("UPLOAD_COLLECT_INTERVAL", 3600)
+        self.app = app
+        self.store = store
+        self.refs = refs
+        with self._lock:
+            self._thread = None  # a collector bound to an earlier app stops
+        app.extensions["chunked_uploads"] = self
+
+    @property
+    def root(self):
+        return os.path.join(self.store.root, ".partial")
+
+    def _dir(self, upload_id):
+        # Ids are token_urlsafe; anything else cannot name an upload
+        if not upload_id or not all(c.isalnum() or c in "-_" for c in upload_id):
+            raise UploadError("Unknown upload.", 404)
+        return os.path.join(self.root, upload_id)
+
+    def _read_json(self, path):
+        try:
+            with open(path, "rb") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return None
+
+    def _write_json(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp_path, path)
+
+    def _meta(self, upload_id):
+        meta = self._read_json(os.path.join(self._dir(upload_id), "meta.json"))
+        if meta is None:
+            raise UploadError("Unknown upload.", 404)
+        return meta
+
+    # ---------------------------------------------------------------
+    # API
+    # ---------------------------------------------------------------
+
+    def create(self, filename, size, field=None):
+        """Open an upload; returns its state (id, chunk size, chunk count, received)."""
+        max_size = self.app.config["UPLOAD_MAX_FILE_SIZE"]
+        if not isinstance(size, int) or size < 0:
+            raise UploadError("Missing or invalid file size.")
+        if size > max_size:
+            raise UploadError(f"File is larger than {max_size // (1024 * 1024)} MB.", 413)
+
+        self.start_collector()
+        chunk_size = self.app.config["UPLOAD_CHUNK_SIZE"]
+        upload_id = secrets.token_urlsafe(16)
+        directory = self._dir(upload_id)
+        os.makedirs(directory)
+        meta = {
+            "id": upload_id,
+            "name": filename,
+            "field": field,
+            "size": size,
+            "chunk_size": chunk_size,
+            "chunks": max(1, -(-size // chunk_size)),
+            "created": time.time(),
+        }
+        self._write_json(os.path.join(directory, "meta.json"), meta)
+        return self.status(upload_id)
+
+    def status(self, upload_id):
+        meta = self._meta(upload_id)
+        directory = self._dir(upload_id)
+        result = self._read_json(os.path.join(directory, "result.json"))
+        received = sorted(
+            int(name[:-5]) for name in os.listdir(directory) if name.endswith(".part")
+        )
+        return {
+            "id": upload_id,
+            "chunkSize": meta["chunk_size"],
+            "chunks": meta["chunks"],
+            "received": list(range(meta["chunks"])) if result else received,
+            "complete": result is not None,
+        }
+
+    def write_chunk(self, upload_id, index, stream, length):
+        """Store chunk ``index`` from ``stream``; re-sending a chunk replaces it."""
+        meta = self._meta(upload_id)
+        if not 0 <= index < meta["chunks"]:
+            raise UploadError("Chunk index out of range.")
+        last = index == meta["chunks"] - 1
+        expected = meta["size"] - index * meta["chunk_size"] if last else meta["chunk_size"]
+        if length is None or length != expected:
+            raise UploadError(f"Chunk {index} must be {expected} bytes.")
+
+        directory = self._dir(upload_id)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while written < expected:
+                    data = stream.read(min(CHUNK_SIZE, expected - written))
+                    if not data:
+                        break
+                    out.write(data)
+                    written += len(data)
+            if written != expected:
+                raise UploadError(f"Chunk {index} was cut short.")
+            os.replace(tmp_path, os.path.join(directory, f"{index}.part"))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def complete(self, upload_id):
+        """Assemble the chunks into the store; returns the file metadata (idempotent)."""
+        meta = self._meta(upload_id)
+        directory = self._dir(upload_id)
+        result_path = os.path.join(directory, "result.json")
+        result = self._read_json(result_path)
+        if result is not None:
+            return result
+
+        lock_path = os.path.join(directory, "complete.lock")
+        if not self._claim(lock_path):
+            result = self._read_json(result_path)
+            if result is not None:
+                return result
+            raise UploadError("Upload is already being completed.", 409)
+        try:
+            # The previous holder may have finished between our two reads
+            result = self._read_json(result_path)
+            if result is not None:
+                return result
+            return self._assemble(upload_id, meta, directory, result_path)
+        finally:
+            try:
+                os.unlink(lock_path)
+            except FileNotFoundError:
+                pass
+
+    def _claim(self, lock_path):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        # A worker killed mid-assembly leaves its marker behind
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < STALE_LOCK:
+                return False
+            os.unlink(lock_path)
+        except FileNotFoundError:
+            pass
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            return False
+
+    def _assemble(self, upload_id, meta, directory, result_path):
+        # An empty file has nothing to send
+        parts = [os.path.join(directory, f"{i}.part") for i in range(meta["chunks"])] if meta["size"] else []
+        missing = [i for i, path in enumerate(parts) if not os.path.exists(path)]
+        if missing:
+            raise UploadError(f"Missing chunks: {missing[:20]}", 409)
+
+        os.makedirs(self.store.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.store.tmp_dir)
+        hasher = hashlib.sha256()
+        mime = None
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for path in parts:
+                    with open(path, "rb") as part:
+                        while True:
+                            data = part.read(CHUNK_SIZE)
+                            if not data:
+                                break
+                            if mime is None:
+                                mime = sniff_type(data)
+                            hasher.update(data)
+                            out.write(data)
+            digest = hasher.hexdigest()
+            self.store.commit(tmp_path, digest)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        result = {
+            "name": meta["name"],
+            "digest": digest,
+            "size": meta["size"],
+            "type": mime or "application/octet-stream",
+            "field": meta["field"],
+        }
+        if self.refs is not None:
+            expires_at = datetime.utcnow() + timedelta(seconds=self.app.config["UPLOAD_SESSION_TTL"])
+            self.refs.hold(f"upload:{upload_id}", [result], expires_at)
+        self._write_json(result_path, result)
+        for path in parts:
+            if os.path.exists(path):
+                os.unlink(path)
+        return result
+
+    def result(self, upload_id):
+        """Metadata of a completed upload, or None if it is unknown or unfinished."""
+        try:
+            return self._read_json(os.path.join(self._dir(upload_id), "result.json"))
+        except UploadError:
+            return None
+
+    # ---------------------------------------------------------------
+    # Collection
+    # ---------------------------------------------------------------
+
+    def start_collector(self):
+        """Start the background collection thread once per process (safe after fork)."""
+        if not self.app.config["UPLOAD_COLLECT_INTERVAL"]:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="upload-collector", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = self.app.config["UPLOAD_COLLECT_INTERVAL"]
+        # Workers start together; spread their first passes over the interval
+        time.sleep(random.uniform(0, interval))
+        while self._thread is threading.current_thread():
+            with self.app.app_context():
+                self.collect()
+            time.sleep(interval)
+
+    def collect(self):
+        """One ``purge_expired()`` pass that logs its errors instead of raising them."""
+        try:
+            self.purge_expired()
+        except Exception as e:
+            print(f"Collecting expired uploads failed: {e}")
+
+    def purge_expired(self, now=None):
+        """Drop upload sessions older than UPLOAD_SESSION_TTL, and stored files nothing uses.
+
+        Returns the number of expired references settled.
+        """
+        settled = self.refs.collect() if self.refs is not None else 0
+        cutoff = (now or time.time()) - self.app.config["UPLOAD_SESSION_TTL"]
+        try:
+            entries = os.listdir(self.root)
+        except FileNotFoundError:
+            return settled
+        for name in entries:
+            path = os.path.join(self.root, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                continue
+        return settled
@@ -0,0 +1,76 @@
+"""
+Engine profiles for the two supported backends.
+
+SQLite (the default): every pooled connection gets WAL journaling (readers
+never block the writer), a busy timeout (writers queue instead of failing
+with "database is locked") and larger page/mmap caches.
+
+MySQL (``DATABASE_URL``): a QueuePool per process sized by ``DB_POOL_SIZE``
+and ``DB_POOL_OVERFLOW``, with pre-ping so connections the server dropped
+are replaced transparently and recycling below the server's idle timeout.
+
+Either way, pools inherited across fork() are dropped in the child so no
+two processes ever share a connection.
+"""
+import os
+
+from sqlalchemy import event
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",     # durable at checkpoints; safe with WAL
+    "cache_size": -64000,        # KiB, i.e. 64 MiB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+def sqlite_engine_options(busy_timeout=30.0, pool_size=5, max_overflow=10):
+    return {
+        "connect_args": {"timeout": busy_timeout, "check_same_thread": False},
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+    }
+
+
+def normalize_url(url):
+    """Pick the pinned PyMySQL driver for bare ``mysql://`` URLs (as hosts hand them out)."""
+    if url and url.startswith("mysql://"):
+        return "mysql+pymysql://" + url[len("mysql://"):]
+    return url
+
+
+def server_engine_options(pool_size=5, max_overflow=5, pool_recycle=1800, pool_timeout=30, pre_ping=True):
+    # Per process: gunicorn workers x (pool_size + max_overflow) must fit max_connections
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_recycle": pool_recycle,
+        "pool_timeout": pool_timeout,
+        "pool_pre_ping": pre_ping,
+        "connect_args": {"charset": "utf8mb4"},
+    }
+
+
+def configure_engine(engine, pragmas=None, busy_timeout=30.0):
+    """Install the per-connection PRAGMAs and fork handling on ``engine``."""
+    if engine.dialect.name == "sqlite":
+        pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+        pragmas.setdefault("busy_timeout", int(busy_timeout * 1000))
+
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+            cursor.close()
+
+    dispose_after_fork(engine)
+    return engine
+
+
+def dispose_after_fork(engine):
+    # close=False: the parent still owns those sockets/file handles
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
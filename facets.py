@@ -0,0 +1,154 @@
+"""
+Normalized child tables for cross-submission queries.
+
+The projects, requested pages/features and social links of a submission
+live in JSON columns, which SQL cannot filter without decoding every row.
+Mapper events copy them into indexed child tables on the same connection
+that writes the submission, so "projects using React" or "asked for a blog
+page" is an index lookup. Technologies and page/feature names are stored
+lowercased and filter values are lowercased too, so "Blog" finds "blog".
+``rebuild()`` repopulates the tables from the JSON columns, which is also
+how existing databases are backfilled.
+
+The child models are passed in as a dict with the keys ``projects``,
+``tech``, ``items`` and ``links``.
+"""
+import re
+
+from sqlalchemy import delete, event, func, inspect, select
+
+# JSON list column -> ``kind`` in the items table
+ITEM_COLUMNS = {"page": "pages", "feature": "features"}
+NETWORKS = ("linkedin", "github", "behance", "dribbble", "instagram", "twitter", "other")
+JSON_COLUMNS = ("projects", "social_links") + tuple(ITEM_COLUMNS.values())
+
+_TECH_SPLIT_RE = re.compile(r"[,;/|+\n]+")
+
+
+def _clip(value, length):
+    return None if value is None else str(value).strip()[:length]
+
+
+def normalize(value):
+    """Filter key form of a technology, page, feature or network name."""
+    return value.strip().lower()
+
+
+def split_tech(text):
+    """``"React, Node/Express"`` -> ``["react", "node", "express"]`` (lowercased, unique)."""
+    seen = []
+    for part in _TECH_SPLIT_RE.split(text or ""):
+        part = normalize(part)[:100]
+        if part and part not in seen:
+            seen.append(part)
+    return seen
+
+
+def rows_for(submission_id, projects, social_links, pages, features):
+    """Child rows for one submission, keyed like the models dict."""
+    rows = {"projects": [], "tech": [], "items": [], "links": []}
+    for position, project in enumerate(projects or ()):
+        rows["projects"].append({
+            "submission_id": submission_id,
+            "position": position,
+            "title": _clip(project.get("title"), 255),
+            "role": _clip(project.get("role"), 255),
+            "url": _clip(project.get("url"), 512),
+        })
+        for tech in split_tech(project.get("tech")):
+            rows["tech"].append({"submission_id": submission_id, "position": position, "tech": tech})
+    for kind, values in (("page", pages), ("feature", features)):
+        for value in dict.fromkeys(normalize(str(v))[:255] for v in values or () if v is not None):
+            if value:
+                rows["items"].append({"submission_id": submission_id, "kind": kind, "value": value})
+    for network in NETWORKS:
+        url = _clip((social_links or {}).get(network), 512)
+        if url:
+            rows["links"].append({"submission_id": submission_id, "network": network, "url": url})
+    return rows
+
+
+def _rows_for_target(submission):
+    return rows_for(
+        submission.id, submission.projects, submission.social_links,
+        submission.pages, submission.features,
+    )
+
+
+def _insert(connection, models, rows):
+    for key, model in models.items():
+        if rows[key]:
+            connection.execute(model.__table__.insert(), rows[key])
+
+
+def _delete(connection, models, submission_ids):
+    for model in models.values():
+        table = model.__table__
+        connection.execute(delete(table).where(table.c.submission_id.in_(submission_ids)))
+
+
+def register(model, models):
+    """Keep the child tables in step with inserts, updates and deletes of ``model``."""
+
+    @event.listens_for(model, "after_insert")
+    def _add(mapper, connection, target):
+        _insert(connection, models, _rows_for_target(target))
+
+    @event.listens_for(model, "after_update")
+    def _sync(mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[column].history.has_changes() for column in JSON_COLUMNS):
+            _delete(connection, models, [target.id])
+            _insert(connection, models, _rows_for_target(target))
+
+    @event.listens_for(model, "before_delete")
+    def _remove(mapper, connection, target):
+        _delete(connection, models, [target.id])
+
+
+def rebuild(session, model, models, batch_size=1000) -> int:
+    """Repopulate the child tables from ``model``'s JSON columns in one transaction."""
+    connection = session.connection()
+    for child in models.values():
+        connection.execute(delete(child.__table__))
+
+    columns = [model.id] + [getattr(model, column) for column in JSON_COLUMNS]
+    result = session.execute(select(*columns).order_by(model.id).execution_options(yield_per=batch_size))
+    count = 0
+    for batch in result.partitions():
+        pending = {key: [] for key in models}
+        for submission_id, projects, social_links, pages, features in batch:
+            for key, rows in rows_for(submission_id, projects, social_links, pages, features).items():
+                pending[key].extend(rows)
+            count += 1
+        _insert(connection, models, pending)
+    session.commit()
+    return count
+
+
+# -------------------------------------------------------------------
+# Queries
+# -------------------------------------------------------------------
+
+# admin filter name -> (models key, column, fixed conditions)
+FILTERS = {
+    "tech": ("tech", "tech", {}),
+    "page": ("items", "value", {"kind": "page"}),
+    "feature": ("items", "value", {"kind": "feature"}),
+    "network": ("links", "network", {}),
+}
+
+
+def matching_ids(models, name, value):
+    """SELECT of submission ids matching filter ``name`` (see FILTERS), for ``in_()``."""
+    key, column, fixed = FILTERS[name]
+    table = models[key].__table__
+    conditions = [table.c[column] == normalize(value)] + [table.c[c] == v for c, v in fixed.items()]
+    return select(table.c.submission_id).where(*conditions)
+
+
+def needs_rebuild(session, models) -> bool:
+    """True if the items table still has values written before they were lowercased."""
+    table = models["items"].__table__
+    query = select(table.c.value).where(table.c.value != func.lower(table.c.value)).limit(1)
+    return session.execute(query).first() is not None
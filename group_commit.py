@@ -0,0 +1,127 @@
+"""
+Group commit: fold inserts that arrive within a few milliseconds of each
+other into a single transaction.
+
+On SQLite every commit is a lock handover plus an fsync of the WAL, so with
+many threads writing at once the commits, not the inserts, are the cost.
+Request threads hand their rows to one writer thread per process and block
+until the batch containing them is durable. If a batch fails, its items are
+retried one by one so a single bad row only fails its own request.
+
+A caller that times out abandons its job only if the writer has not taken
+it yet; once taken, the caller waits for the real outcome, so a request
+never reports failure for rows that were in fact written.
+"""
+import os
+import queue
+import threading
+import time
+
+
+class _Job:
+    __slots__ = ("add", "delete", "done", "error", "state", "_lock")
+
+    def __init__(self, add, delete):
+        self.add = add
+        self.delete = delete
+        self.done = threading.Event()
+        self.error = None
+        self.state = "queued"
+        self._lock = threading.Lock()
+
+    def _move(self, state):
+        # queued -> claimed (writer) or queued -> abandoned (caller), never both
+        with self._lock:
+            if self.state != "queued":
+                return False
+            self.state = state
+            return True
+
+    def claim(self):
+        return self._move("claimed")
+
+    def abandon(self):
+        return self._move("abandoned")
+
+
+class GroupCommitter:
+    def __init__(self, session_factory, max_batch=64, max_delay=0.005):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def commit(self, add=(), delete=(), timeout=30):
+        """Persist ``add`` and delete ``delete`` (``(model, pk)`` pairs) in the next batch.
+
+        Blocks until the batch is committed and re-raises its error, if any.
+        Raises TimeoutError only if the writer did not pick the job up within
+        ``timeout``; nothing is written then. Objects in ``add`` must not
+        belong to another session.
+        """
+        self._ensure_started()
+        job = _Job(list(add), list(delete))
+        self._queue.put(job)
+        if not job.done.wait(timeout):
+            if job.abandon():
+                raise TimeoutError("group commit did not start in time")
+            # Already in a batch being written: its outcome is the answer
+            job.done.wait()
+        if job.error is not None:
+            raise job.error
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # New process (fork) or first use: the old thread does not exist here
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            batch = [job for job in batch if job.claim()]
+            if not batch:
+                continue
+            try:
+                self._commit_batch(batch)
+            except Exception:
+                for job in batch:
+                    try:
+                        self._commit_batch([job])
+                    except Exception as e:
+                        job.error = e
+            for job in batch:
+                job.done.set()
+
+    def _commit_batch(self, jobs):
+        session = self.session_factory()
+        try:
+            for job in jobs:
+                session.add_all(job.add)
+                for model, pk in job.delete:
+                    obj = session.get(model, pk)
+                    if obj is not None:
+                        session.delete(obj)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
@@ -0,0 +1,42 @@
+"""
+Gunicorn settings.
+
+The app is built once in the master (preload_app) and workers are forked
+from it, so each worker boots in milliseconds and shares the imported code
+pages. The master also runs the idempotent schema setup once per deploy
+(set INIT_DB_ON_START=0 to run `flask init-db` as a separate step), then
+drops its pooled connections; database.configure_engine() additionally
+discards any inherited pool in each child after fork. Before workers
+start, the master also clears the previous run's metrics snapshots and
+rebuilds the fingerprinted static assets.
+
+Workers are gthread: the live admin feed (/admin/submissions/stream) holds
+a thread per connected browser for as long as it stays open, which would
+pin a whole sync worker. Thread budget per worker: GUNICORN_THREADS in
+total, of which at most LIVE_FEED_MAX_SUBSCRIBERS (a quarter by default)
+serve streams; extra dashboards get a 503 and retry later, so the other
+threads always remain for the intake form and admin pages. Raise both
+together if more admins watch at once.
+"""
+import os
+
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+
+def on_starting(server):
+    from app import assets, db, init_db
+    from metrics import clear_snapshots
+
+    app = server.app.wsgi()
+    if app.config.get("METRICS_DIR"):
+        clear_snapshots(app.config["METRICS_DIR"])
+    # Before the fork, so every worker inherits the fresh manifest
+    assets.build()
+    if os.getenv("INIT_DB_ON_START", "1") != "1":
+        return
+    with app.app_context():
+        init_db()
+        db.engine.dispose()
@@ -0,0 +1,259 @@
+"""
+Live admin feed: newly verified submissions pushed over Server-Sent Events.
+
+A mapper event writes one row to the ``admin_events`` table in the same
+transaction that inserts a submission (the verify_email commit, group
+commit included), so the event exists exactly when the submission does.
+That table is the channel between gunicorn workers. In each process, one
+poller thread reads rows past the last id it has seen every
+``LIVE_FEED_POLL_INTERVAL`` seconds, attaches the current dashboard counters
+once per batch, and fans the events out to the in-process subscribers (one
+queue per connected browser).
+
+The poller runs only while the process has subscribers. It costs one
+indexed query per second per process, however many admins are watching.
+
+An open stream is a thread blocked on its queue that writes a comment line
+every ``LIVE_FEED_HEARTBEAT`` seconds; under gthread workers that is one of
+the worker's ``GUNICORN_THREADS`` for as long as the page stays open. So
+each process serves at most ``LIVE_FEED_MAX_SUBSCRIBERS`` streams (a
+quarter of the threads by default) and answers further ones with 503 and a
+retry hint; the rest of the threads stay free for the intake form.
+
+No event falls between the dashboard render and its stream: the page
+carries the newest event id it has seen (``cursor()``), the stream
+subscribes first and then replays everything after that id, and events the
+replay already sent are not sent again.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, select
+
+SUMMARY_COLUMNS = ("id", "public_id", "full_name", "email", "profession")
+LOOKBACK = 100
+BUSY_RETRY = 30  # seconds a refused browser waits before trying again
+
+
+def summary_for(submission) -> dict:
+    row = {column: getattr(submission, column) for column in SUMMARY_COLUMNS}
+    row["submitted_at"] = submission.submitted_at.isoformat() if submission.submitted_at else None
+    return row
+
+
+def register(model, event_model, skip=None):
+    """Record an event for every inserted ``model`` row, in its transaction.
+
+    ``skip(target)`` returning true suppresses it (rows that are not new, such
+    as archived submissions being restored).
+    """
+    table = event_model.__table__
+
+    @event.listens_for(model, "after_insert")
+    def _publish(mapper, connection, target):
+        if skip is not None and skip(target):
+            return
+        connection.execute(table.insert(), {
+            "created_at": datetime.utcnow(),
+            "payload": json.dumps(summary_for(target)),
+        })
+
+
+class Subscriber:
+    __slots__ = ("queue", "overflowed")
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+
+class LiveFeed:
+    def __init__(self, app=None, db=None, model=None, counters=None):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app, db, model, counters)
+
+    def init_app(self, app, db, model, counters=None):
+        """``model`` is the events table; ``counters()`` returns the dashboard stats."""
+        app.config.setdefault("LIVE_FEED_POLL_INTERVAL", 1.0)
+        app.config.setdefault("LIVE_FEED_HEARTBEAT", 15)
+        app.config.setdefault("LIVE_FEED_RETENTION", 3600)
+        app.config.setdefault("LIVE_FEED_REPLAY_LIMIT", 100)
+        app.config.setdefault("LIVE_FEED_MAX_SUBSCRIBERS", 2)
+        self.app = app
+        self.db = db
+        self.model = model
+        self.counters = counters
+        with self._lock:
+            self._subscribers = set()
+            self._thread = None  # a poller bound to an earlier app stops
+        app.extensions["live_feed"] = self
+
+    # ---------------------------------------------------------------
+    # Subscribers
+    # ---------------------------------------------------------------
+
+    def subscribe(self):
+        """A new subscriber, or None if this process already serves LIVE_FEED_MAX_SUBSCRIBERS.
+
+        Call inside an app context, before ``since()`` for the replay.
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.app.config["LIVE_FEED_MAX_SUBSCRIBERS"]:
+                return None
+            self._ensure_poller()
+            subscriber = Subscriber(maxsize=256)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber, replay=(), after=None):
+        """SSE text for one browser: ``replay`` first, then live events and heartbeats.
+
+        ``after`` is the browser's cursor; queued events at or below it, or
+        already in ``replay``, are skipped.
+        """
+        heartbeat = self.app.config["LIVE_FEED_HEARTBEAT"]
+        replayed = {item["id"] for item in replay}
+        floor = after or 0
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            for item in replay:
+                yield _format(item)
+            while not subscriber.overflowed:
+                try:
+                    item = subscriber.queue.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if item["id"] <= floor or item["id"] in replayed:
+                    continue
+                yield _format(item)
+            # Fell behind: end the stream, the browser reconnects with Last-Event-ID
+        finally:
+            self.unsubscribe(subscriber)
+
+    def cursor(self) -> int:
+        """Id of the newest event so far (0 if none); the dashboard renders it for its stream."""
+        table = self.model.__table__
+        with self.db.engine.connect() as connection:
+            return connection.execute(select(func.max(table.c.id))).scalar() or 0
+
+    def since(self, last_id):
+        """Events after ``last_id`` (the page cursor or Last-Event-ID), with current counters."""
+        table = self.model.__table__
+        with self.db.engine.connect() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.payload)
+                .where(table.c.id > last_id)
+                .order_by(table.c.id)
+                .limit(self.app.config["LIVE_FEED_REPLAY_LIMIT"])
+            ).all()
+        return self._with_counters(rows)
+
+    # ---------------------------------------------------------------
+    # Poller
+    # ---------------------------------------------------------------
+
+    def _ensure_poller(self):
+        # Called with the lock held and in an app context; one thread per process,
+        # restarted after fork. The starting point is read here, before the new
+        # subscriber's replay query, so every later event reaches one or the other
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        table = self.model.__table__
+        with self.db.engine.connect() as connection:
+            last_id = connection.execute(select(func.max(table.c.id))).scalar() or 0
+            seen = OrderedDict.fromkeys(row.id for row in _fetch(connection, table, last_id - LOOKBACK))
+        self._pid = os.getpid()
+        self._thread = threading.Thread(
+            target=self._run, args=(last_id, seen), name="live-feed", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, last_id, seen):
+        with self.app.app_context():
+            self._poll(last_id, seen)
+
+    def _poll(self, last_id, seen):
+        # Ids can commit out of order on a server database, so every poll looks
+        # LOOKBACK ids behind the newest one seen and skips what it delivered
+        table = self.model.__table__
+        interval = self.app.config["LIVE_FEED_POLL_INTERVAL"]
+        last_purge = time.monotonic()
+
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if self._thread is not threading.current_thread():
+                    return
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                with self.db.engine.connect() as connection:
+                    rows = [row for row in _fetch(connection, table, last_id - LOOKBACK) if row.id not in seen]
+                if rows:
+                    for row in rows:
+                        seen[row.id] = None
+                    while len(seen) > 10 * LOOKBACK:
+                        seen.popitem(last=False)
+                    last_id = max(last_id, rows[-1].id)
+                    self._fan_out(self._with_counters(rows))
+                if time.monotonic() - last_purge > 60:
+                    last_purge = time.monotonic()
+                    self._purge()
+            except Exception as e:
+                print(f"Live feed poll failed: {e}")
+
+    def _with_counters(self, rows):
+        if not rows:
+            return []
+        stats = None
+        if self.counters is not None:
+            with self.app.app_context():
+                stats = self.counters()
+                self.db.session.remove()
+        return [
+            {"id": row.id, "submission": json.loads(row.payload), "stats": stats}
+            for row in rows
+        ]
+
+    def _fan_out(self, items):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            for item in items:
+                try:
+                    subscriber.queue.put_nowait(item)
+                except queue.Full:
+                    subscriber.overflowed = True
+                    break
+
+    def _purge(self):
+        cutoff = datetime.utcnow() - timedelta(seconds=self.app.config["LIVE_FEED_RETENTION"])
+        table = self.model.__table__
+        with self.db.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.created_at < cutoff))
+
+
+def _fetch(connection, table, after):
+    return connection.execute(
+        select(table.c.id, table.c.payload).where(table.c.id > after).order_by(table.c.id)
+    ).all()
+
+
+def _format(item) -> str:
+    data = json.dumps({"submission": item["submission"], "stats": item["stats"]})
+    return f"id: {item['id']}\nevent: submission\ndata: {data}\n\n"
@@ -0,0 +1,318 @@
+"""
+In-process request, SQL, template, mail and upload instrumentation.
+
+``Metrics`` hooks Flask's request and template signals and the SQLAlchemy
+engine's cursor events and aggregates what it sees into histograms. Each
+worker writes its totals to ``METRICS_DIR`` (at most every
+``METRICS_FLUSH_INTERVAL`` seconds, after a request or a mail send, and from
+the outbox loop so a standalone ``flask mail-worker`` reports too) and the
+scrape endpoint merges every worker's file, so Prometheus sees one consistent view whichever gunicorn
+worker answers. Output is the Prometheus text exposition format.
+
+With ``PROFILE_REQUESTS`` on, a sample of requests (``PROFILE_SAMPLE_RATE``)
+runs under cProfile and the ones slower than ``PROFILE_SLOW_MS`` are saved
+to ``PROFILE_DIR`` as .prof files for ``python -m pstats`` / snakeviz.
+"""
+import cProfile
+import glob
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+
+import msgspec
+from flask import g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+THROUGHPUT_BUCKETS = (1e5, 1e6, 1e7, 5e7, 1e8, 2.5e8, 5e8, 1e9)
+
+_json = msgspec.json.Encoder()
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            data = self.series.get(labels)
+            if data is None:
+                data = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            else:
+                data[len(self.buckets)] += 1
+            data[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(data)] for labels, data in self.series.items()]
+
+    def render(self, series):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, data in sorted(series.items()):
+            base = _labels(self.labelnames, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), data):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {data[-1]}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *labels):
+        with self._lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), [value]] for labels, value in self.series.items()]
+
+    def render(self, series):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, data in sorted(series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {data[0]}")
+        return lines
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    def __init__(self, app=None, db=None):
+        self.request_seconds = Histogram(
+            "intake_http_request_duration_seconds", "Time spent in the route handler.",
+            ("method", "endpoint", "status"),
+        )
+        self.request_sql_queries = Histogram(
+            "intake_http_request_sql_queries", "SQL statements executed per request.",
+            ("endpoint",), COUNT_BUCKETS,
+        )
+        self.request_sql_seconds = Histogram(
+            "intake_http_request_sql_seconds", "Time spent in SQL per request.",
+            ("endpoint",), SQL_BUCKETS,
+        )
+        self.request_template_seconds = Histogram(
+            "intake_http_request_template_seconds", "Time spent rendering templates per request.",
+            ("endpoint",),
+        )
+        self.sql_seconds = Histogram(
+            "intake_sql_query_duration_seconds", "Duration of individual SQL statements.",
+            ("statement",), SQL_BUCKETS,
+        )
+        self.template_seconds = Histogram(
+            "intake_template_render_seconds", "Duration of individual template renders.",
+            ("template",),
+        )
+        self.mail_seconds = Histogram(
+            "intake_mail_send_duration_seconds", "SMTP send latency per message.",
+            ("outcome",),
+        )
+        self.upload_bytes = Counter("intake_upload_bytes_total", "Bytes written to the upload store.")
+        self.upload_throughput = Histogram(
+            "intake_upload_throughput_bytes_per_second", "Upload store write throughput per file.",
+            buckets=THROUGHPUT_BUCKETS,
+        )
+        self.registry = [
+            self.request_seconds, self.request_sql_queries, self.request_sql_seconds,
+            self.request_template_seconds, self.sql_seconds, self.template_seconds,
+            self.mail_seconds, self.upload_bytes, self.upload_throughput,
+        ]
+        self._last_flush = 0.0
+        self._template_starts = threading.local()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        config = app.config
+        config.setdefault("METRICS_ENABLED", True)
+        config.setdefault("METRICS_DIR", None)
+        config.setdefault("METRICS_FLUSH_INTERVAL", 5)
+        config.setdefault("PROFILE_REQUESTS", False)
+        config.setdefault("PROFILE_SAMPLE_RATE", 0.05)
+        config.setdefault("PROFILE_SLOW_MS", 500)
+        config.setdefault("PROFILE_DIR", None)
+        self.app = app
+        app.extensions["metrics"] = self
+        if not config["METRICS_ENABLED"]:
+            return
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        with app.app_context():
+            self.instrument_engine(db.engine)
+
+    # ---------------------------------------------------------------
+    # Hooks
+    # ---------------------------------------------------------------
+
+    def instrument_engine(self, engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._metrics_start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = time.perf_counter() - context._metrics_start
+            verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+            self.sql_seconds.observe(elapsed, verb)
+            if has_request_context() and "metrics" in g:
+                g.metrics["sql_count"] += 1
+                g.metrics["sql_seconds"] += elapsed
+
+    def _before_request(self):
+        g.metrics = {"start": time.perf_counter(), "sql_count": 0, "sql_seconds": 0.0, "template_seconds": 0.0}
+        config = self.app.config
+        if config["PROFILE_REQUESTS"] and random.random() < config["PROFILE_SAMPLE_RATE"]:
+            g.metrics["profiler"] = profiler = cProfile.Profile()
+            profiler.enable()
+
+    def _after_request(self, response):
+        data = g.pop("metrics", None)
+        if data is None:
+            return response
+        elapsed = time.perf_counter() - data["start"]
+        endpoint = request.endpoint or "unmatched"
+        self.request_seconds.observe(elapsed, request.method, endpoint, str(response.status_code))
+        self.request_sql_queries.observe(data["sql_count"], endpoint)
+        self.request_sql_seconds.observe(data["sql_seconds"], endpoint)
+        self.request_template_seconds.observe(data["template_seconds"], endpoint)
+
+        profiler = data.get("profiler")
+        if profiler is not None:
+            profiler.disable()
+            if elapsed * 1000 >= self.app.config["PROFILE_SLOW_MS"]:
+                self._save_profile(profiler, endpoint, elapsed)
+
+        self.flush_if_due()
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        stack = getattr(self._template_starts, "stack", None)
+        if stack is None:
+            stack = self._template_starts.stack = []
+        stack.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        stack = getattr(self._template_starts, "stack", None)
+        if not stack:
+            return
+        elapsed = time.perf_counter() - stack.pop()
+        self.template_seconds.observe(elapsed, template.name or "<string>")
+        if not stack and has_request_context() and "metrics" in g:
+            g.metrics["template_seconds"] += elapsed
+
+    def observe_mail(self, seconds, ok):
+        self.mail_seconds.observe(seconds, "sent" if ok else "failed")
+        self.flush_if_due()
+
+    def observe_upload(self, size, seconds):
+        self.upload_bytes.inc(size)
+        if seconds > 0:
+            self.upload_throughput.observe(size / seconds)
+
+    def _save_profile(self, profiler, endpoint, elapsed):
+        directory = self.app.config["PROFILE_DIR"]
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            name = f"{stamp}-{endpoint.replace('.', '-')}-{int(elapsed * 1000)}ms-{os.getpid()}.prof"
+            profiler.dump_stats(os.path.join(directory, name))
+        except OSError as e:
+            print(f"Saving request profile failed: {e}")
+
+    # ---------------------------------------------------------------
+    # Exposition
+    # ---------------------------------------------------------------
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self.registry}
+
+    def flush(self):
+        """Write this process's totals to METRICS_DIR for the other workers to merge."""
+        self._last_flush = time.monotonic()
+        directory = self.app.config["METRICS_DIR"]
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(_json.encode(self.snapshot()))
+            os.replace(tmp_path, os.path.join(directory, f"worker-{os.getpid()}.json"))
+        except OSError as e:
+            print(f"Writing metrics snapshot failed: {e}")
+
+    def flush_if_due(self):
+        if time.monotonic() - self._last_flush > self.app.config["METRICS_FLUSH_INTERVAL"]:
+            self.flush()
+
+    def render(self):
+        """Prometheus text format, merged across every worker that has flushed."""
+        snapshots = [self.snapshot()]
+        directory = self.app.config["METRICS_DIR"]
+        if directory:
+            self.flush()
+            own = os.path.join(directory, f"worker-{os.getpid()}.json")
+            for path in glob.glob(os.path.join(directory, "worker-*.json")):
+                if path == own:
+                    continue
+                try:
+                    with open(path, "rb") as fh:
+                        snapshots.append(msgspec.json.decode(fh.read()))
+                except (OSError, msgspec.DecodeError):
+                    continue
+
+        lines = []
+        for metric in self.registry:
+            merged = {}
+            for snapshot in snapshots:
+                for labels, data in snapshot.get(metric.name, ()):
+                    key = tuple(labels)
+                    current = merged.get(key)
+                    merged[key] = list(data) if current is None else [a + b for a, b in zip(current, data)]
+            lines.extend(metric.render(merged))
+        return "\n".join(lines) + "\n"
+
+
+def clear_snapshots(directory):
+    """Drop worker files from a previous server run (call once, before workers start)."""
+    for path in glob.glob(os.path.join(directory, "worker-*.json")):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,273 @@
+"""
+Durable mail outbox.
+
+Request handlers only insert a row into the outbox table; a small pool of
+background threads claims pending rows, sends them over long-lived SMTP
+connections and records the outcome (sent / retry with backoff / failed).
+Rows are claimed with a conditional UPDATE, so several gunicorn workers (or
+a standalone ``flask mail-worker``) can drain the same table safely.
+"""
+import os
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class MailOutbox:
+    def __init__(self, app=None, db=None, model=None, mail=None):
+        self._mail = mail
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        if app is not None:
+            self.init_app(app, db, model, mail)
+
+    def init_app(self, app, db, model, mail=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        if mail is not None:
+            self._mail = mail
+        app.config.setdefault("MAIL_OUTBOX_WORKERS", 2)
+        app.config.setdefault("MAIL_OUTBOX_EMBEDDED", True)
+        app.config.setdefault("MAIL_OUTBOX_BATCH_SIZE", 20)
+        app.config.setdefault("MAIL_OUTBOX_MAX_ATTEMPTS", 5)
+        app.config.setdefault("MAIL_OUTBOX_BACKOFF_BASE", 30)
+        app.config.setdefault("MAIL_OUTBOX_BACKOFF_MAX", 3600)
+        app.config.setdefault("MAIL_OUTBOX_POLL_INTERVAL", 5)
+        app.config.setdefault("MAIL_OUTBOX_IDLE_TIMEOUT", 60)
+        app.config.setdefault("MAIL_OUTBOX_LEASE", 300)
+        app.extensions["mail_outbox"] = self
+
+    @property
+    def mail(self):
+        # Flask-Mail (and the email package behind it) is only imported by
+        # the processes that actually send
+        if self._mail is None:
+            from flask_mail import Mail
+
+            self._mail = Mail(self.app)
+        return self._mail
+
+    # ---------------------------------------------------------------
+    # Producer side
+    # ---------------------------------------------------------------
+
+    def enqueue(self, recipient, subject, body=None, html=None, sender=None):
+        """Persist a message for delivery and wake the worker pool."""
+        message = self.model(
+            recipient=recipient,
+            subject=subject,
+            body=body,
+            html=html,
+            sender=sender,
+            status=STATUS_PENDING,
+            next_attempt_at=datetime.utcnow(),
+        )
+        self.db.session.add(message)
+        self.db.session.commit()
+
+        if self.app.config["MAIL_OUTBOX_EMBEDDED"]:
+            self.start()
+        self._wakeup.set()
+        return message
+
+    # ---------------------------------------------------------------
+    # Worker pool
+    # ---------------------------------------------------------------
+
+    def start(self, workers=None):
+        """Start the drain threads once per process (safe to call after fork)."""
+        with self._lock:
+            if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            count = workers or self.app.config["MAIL_OUTBOX_WORKERS"]
+            self._threads = [
+                threading.Thread(target=self._run, name=f"mail-outbox-{i}", daemon=True)
+                for i in range(count)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def drain(self):
+        """Send everything that is currently due on this thread; returns the number sent."""
+        with self.app.app_context():
+            sender = _SMTPSession(self.mail)
+            sent = 0
+            try:
+                while True:
+                    batch = self._claim_batch()
+                    if not batch:
+                        return sent
+                    sent += self._deliver(batch, sender)
+            finally:
+                sender.close()
+
+    def _run(self):
+        poll = self.app.config["MAIL_OUTBOX_POLL_INTERVAL"]
+        idle_timeout = self.app.config["MAIL_OUTBOX_IDLE_TIMEOUT"]
+        metrics = self.app.extensions.get("metrics")
+        with self.app.app_context():
+            sender = _SMTPSession(self.mail)
+            try:
+                while not self._stopping.is_set():
+                    try:
+                        batch = self._claim_batch()
+                    except Exception as e:
+                        print(f"Mail outbox claim failed: {e}")
+                        self.db.session.rollback()
+                        batch = []
+
+                    if batch:
+                        self._deliver(batch, sender)
+                        continue
+
+                    if sender.idle_for() > idle_timeout:
+                        sender.close()
+                    if metrics is not None:
+                        # The last sends of a burst, also in a standalone mail worker
+                        metrics.flush_if_due()
+                    self._wakeup.wait(poll)
+                    self._wakeup.clear()
+            finally:
+                sender.close()
+                self.db.session.remove()
+
+    def _claim_batch(self):
+        Outbox = self.model
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.app.config["MAIL_OUTBOX_LEASE"])
+        due = Outbox.status == STATUS_PENDING
+        candidates = (
+            self.db.session.query(Outbox.id)
+            .filter(
+                self.db.or_(
+                    due & (Outbox.next_attempt_at <= now),
+                    (Outbox.status == STATUS_SENDING) & (Outbox.claimed_at < stale),
+                )
+            )
+            .order_by(Outbox.next_attempt_at, Outbox.id)
+            .limit(self.app.config["MAIL_OUTBOX_BATCH_SIZE"])
+            .all()
+        )
+
+        claimed = []
+        for (message_id,) in candidates:
+            updated = (
+                self.db.session.query(Outbox)
+                .filter(
+                    Outbox.id == message_id,
+                    self.db.or_(due, (Outbox.status == STATUS_SENDING) & (Outbox.claimed_at < stale)),
+                )
+                .update({"status": STATUS_SENDING, "claimed_at": now}, synchronize_session=False)
+            )
+            if updated:
+                claimed.append(message_id)
+        self.db.session.commit()
+
+        if not claimed:
+            return []
+        return self.db.session.query(Outbox).filter(Outbox.id.in_(claimed)).all()
+
+    def _deliver(self, batch, sender):
+        sent = 0
+        metrics = self.app.extensions.get("metrics")
+        for message in batch:
+            started = time.perf_counter()
+            try:
+                sender.send(self._build_message(message))
+            except Exception as e:
+                if metrics is not None:
+                    metrics.observe_mail(time.perf_counter() - started, ok=False)
+                self._record_failure(message, e)
+            else:
+                if metrics is not None:
+                    metrics.observe_mail(time.perf_counter() - started, ok=True)
+                message.status = STATUS_SENT
+                message.sent_at = datetime.utcnow()
+                message.attempts += 1
+                message.last_error = None
+                sent += 1
+            self.db.session.commit()
+        return sent
+
+    def _build_message(self, message):
+        from flask_mail import Message
+
+        msg = Message(
+            message.subject,
+            sender=message.sender or self.app.config.get("MAIL_DEFAULT_SENDER") or "noreply@example.com",
+            recipients=[message.recipient],
+        )
+        msg.body = message.body
+        msg.html = message.html
+        return msg
+
+    def _record_failure(self, message, error):
+        config = self.app.config
+        message.attempts += 1
+        message.last_error = str(error)[:1000]
+        if message.attempts >= config["MAIL_OUTBOX_MAX_ATTEMPTS"]:
+            message.status = STATUS_FAILED
+            print(f"Mail outbox giving up on message {message.id}: {error}")
+            return
+        delay = min(
+            config["MAIL_OUTBOX_BACKOFF_BASE"] * 2 ** (message.attempts - 1),
+            config["MAIL_OUTBOX_BACKOFF_MAX"],
+        )
+        message.status = STATUS_PENDING
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        print(f"Mail outbox send failed for message {message.id} (retry in {delay}s): {error}")
+
+
+class _SMTPSession:
+    """One reusable SMTP connection, opened on demand and reopened if the server drops it."""
+
+    def __init__(self, mail):
+        self.mail = mail
+        self.connection = None
+        self.last_used = time.monotonic()
+
+    def idle_for(self):
+        return time.monotonic() - self.last_used
+
+    def send(self, msg):
+        try:
+            self._connect().send(msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Server closed an idle connection; one fresh attempt before counting a failure
+            self.close()
+            self._connect().send(msg)
+        self.last_used = time.monotonic()
+
+    def _connect(self):
+        if self.connection is None:
+            connection = self.mail.connect()
+            self.connection = connection.__enter__()
+        return self.connection
+
+    def close(self):
+        if self.connection is None:
+            return
+        connection, self.connection = self.connection, None
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
@@ -0,0 +1,132 @@
+"""
+Production render mode and a full-page cache for the static views.
+
+With ``PRODUCTION_RENDER`` on, Jinja stops stat()ing template files on
+every render (``auto_reload`` off), compiled templates are kept in a
+bytecode cache under ``TEMPLATE_CACHE_DIR``, and ``init_app`` compiles
+every template up front. Under gunicorn's ``preload_app`` that happens once
+in the master, so forked workers start with all templates compiled.
+
+Views decorated with ``PageCache.cached`` render once per process and set
+of URL arguments and are then served from a byte-capped in-memory LRU with
+a strong ETag, so repeat visitors get a 304. A request carrying flashed
+messages bypasses the cache (the page shows them, so it is not the shared
+copy). Entries are keyed by the release (``RELEASE_VERSION`` or a hash of
+the templates and asset manifest), so a deploy never serves a page from
+the previous one. In development the cache is off and templates reload.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, request, session
+from jinja2 import FileSystemBytecodeCache
+
+from render_cache import CachedPage
+
+
+class PageCache:
+    def __init__(self, app=None):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        config.setdefault("PRODUCTION_RENDER", False)
+        config.setdefault("TEMPLATE_CACHE_DIR", os.path.join(app.instance_path, "jinja_cache"))
+        config.setdefault("PAGE_CACHE_MAX_BYTES", 8 * 1024 * 1024)
+        config.setdefault("RELEASE_VERSION", None)
+        self.app = app
+        self.enabled = config["PRODUCTION_RENDER"]
+        self.max_bytes = config["PAGE_CACHE_MAX_BYTES"]
+        self.started = datetime.now(timezone.utc).replace(microsecond=0)
+        self.invalidate()
+
+        config["TEMPLATES_AUTO_RELOAD"] = not self.enabled
+        app.jinja_env.auto_reload = not self.enabled
+        if self.enabled:
+            os.makedirs(config["TEMPLATE_CACHE_DIR"], exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(config["TEMPLATE_CACHE_DIR"])
+            self.precompile()
+        app.extensions["page_cache"] = self
+
+    def precompile(self):
+        """Compile every template into Jinja's in-memory (and bytecode) cache."""
+        env = self.app.jinja_env
+        names = env.list_templates(extensions=("html", "txt", "xml"))
+        for name in names:
+            env.get_template(name)
+        return len(names)
+
+    def release(self):
+        """Identity of the deployed code: RELEASE_VERSION, else a hash of templates and assets."""
+        version = self.app.config["RELEASE_VERSION"]
+        if version:
+            return version
+        digest = hashlib.sha256()
+        env = self.app.jinja_env
+        for name in sorted(env.list_templates()):
+            source, _, _ = env.loader.get_source(env, name)
+            digest.update(name.encode() + b"\0" + source.encode())
+        assets = self.app.extensions.get("assets")
+        if assets is not None:
+            digest.update(repr(sorted(assets.manifest.items())).encode())
+        return digest.hexdigest()[:12]
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._release = None
+
+    # ---------------------------------------------------------------
+    # Serving
+    # ---------------------------------------------------------------
+
+    def cached(self, view):
+        """Serve ``view`` (which returns HTML text) from the page cache."""
+
+        @wraps(view)
+        def wrapper(**kwargs):
+            if not self.enabled or "_flashes" in session:
+                return view(**kwargs)
+            if self._release is None:
+                self._release = self.release()
+            key = (self._release, request.endpoint, tuple(sorted(kwargs.items())))
+            with self._lock:
+                page = self._entries.get(key)
+                if page is not None:
+                    self._entries.move_to_end(key)
+            if page is None:
+                page = CachedPage(view(**kwargs).encode(), self.started)
+                self._remember(key, page)
+
+            response = Response(page.body, mimetype="text/html")
+            response.set_etag(page.etag)
+            response.last_modified = page.last_modified
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            response.vary.add("Cookie")  # flashed messages make a different page
+            return response.make_conditional(request)
+
+        return wrapper
+
+    def _remember(self, key, page):
+        if len(page.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = page
+            self._size += len(page.body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
@@ -0,0 +1,165 @@
+"""
+Streamed ZIP bundles of intake PDFs.
+
+``stream_bundle()`` queues every PDF that is not already in the PDF cache on
+``PdfPool`` (so renders run in parallel in its worker processes), then
+writes the files into a ZIP as they become ready: cached ones first, the
+rest in completion order. The ZIP is produced incrementally into a small
+buffer that is yielded after every chunk of file data, so the response
+never holds the bundle, or even a whole PDF, in memory. A ``manifest.json``
+member at the end lists what each requested id produced.
+
+Progress (``total``/``done``/``failed``/``state``) is written to
+``<PDF_BUNDLE_DIR>/<bundle id>.json`` after every file, so any worker can
+answer the progress endpoint while another streams the bundle.
+"""
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import TimeoutError, as_completed
+from datetime import datetime
+
+import msgspec
+
+COPY_CHUNK = 256 * 1024
+
+_json = msgspec.json.Encoder()
+
+
+class _Sink:
+    """Write-only, unseekable file object; zipfile then uses data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def progress_path(directory, bundle_id):
+    # Ids come from the client; only token_urlsafe characters can name a file
+    if not bundle_id or not all(c.isalnum() or c in "-_" for c in bundle_id):
+        return None
+    return os.path.join(directory, bundle_id + ".json")
+
+
+def write_progress(directory, bundle_id, progress):
+    path = progress_path(directory, bundle_id)
+    if path is None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(_json.encode(progress))
+    os.replace(tmp_path, path)
+
+
+def read_progress(directory, bundle_id):
+    path = progress_path(directory, bundle_id)
+    try:
+        with open(path, "rb") as fh:
+            return msgspec.json.decode(fh.read())
+    except (TypeError, OSError, msgspec.DecodeError):
+        return None
+
+
+def purge_progress(directory, max_age=24 * 3600):
+    cutoff = time.time() - max_age
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.unlink(path)
+        except FileNotFoundError:
+            continue
+
+
+def stream_bundle(pool, items, missing=(), bundle_id=None, progress_dir=None, timeout=60):
+    """Yield a ZIP of the PDFs for ``items`` (``(public_id, pdf data)`` pairs).
+
+    ``missing`` are ids that matched no submission or whose archive could
+    not be read; they are only listed in the manifest.
+    """
+    generated_on = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    manifest = {public_id: "not found" for public_id in missing}
+    progress = {"total": len(items), "done": 0, "failed": 0, "state": "running"}
+
+    def report():
+        if bundle_id and progress_dir:
+            write_progress(progress_dir, bundle_id, progress)
+
+    ready, futures = [], {}
+    for public_id, data in items:
+        future = pool.ensure(public_id, data, generated_on)
+        if future is None:
+            ready.append(public_id)  # already in the PDF cache
+        else:
+            futures[future] = public_id
+    report()
+
+    sink = _Sink()
+
+    def flush():
+        data = sink.drain()
+        if data:  # an empty chunk would end a chunked response early
+            yield data
+
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as bundle:
+
+        def add(public_id):
+            info = zipfile.ZipInfo(f"intake-{public_id}.pdf", time.localtime()[:6])
+            with open(pool.path_for(public_id), "rb") as source, bundle.open(info, "w") as target:
+                while True:
+                    data = source.read(COPY_CHUNK)
+                    if not data:
+                        break
+                    target.write(data)
+                    yield from flush()
+            yield from flush()
+
+        def finished(public_id, status):
+            manifest[public_id] = status
+            progress["done" if status == "ok" else "failed"] += 1
+            report()
+
+        for public_id in ready:
+            try:
+                yield from add(public_id)
+                finished(public_id, "ok")
+            except OSError as e:
+                finished(public_id, f"failed: {e}")
+
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                public_id = futures.pop(future)
+                try:
+                    future.result()
+                    yield from add(public_id)
+                    finished(public_id, "ok")
+                except Exception as e:
+                    finished(public_id, f"failed: {e}")
+        except TimeoutError:
+            for public_id in futures.values():
+                finished(public_id, "timed out")
+
+        bundle.writestr("manifest.json", _json.encode({
+            "generated_on": generated_on,
+            "files": manifest,
+        }))
+    progress["state"] = "complete"
+    report()
+    yield from flush()
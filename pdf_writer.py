@@ -0,0 +1,253 @@
+"""
+Intake PDF generation.
+
+``build_pdf`` is a small dependency-free PDF writer: standard Helvetica
+fonts, word-wrapped text, automatic page breaks, Flate-compressed content
+streams. ``PdfPool`` runs it in a process pool so requests never pay for
+layout, and remembers in-flight jobs so one submission is generated once.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+MARGIN = 50
+
+# Helvetica advance widths (1/1000 em) for ASCII 32..126, from the Adobe AFM
+_HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+# Labels for the flat fields of the intake data, in document order
+SECTIONS = (
+    ("Personal Information", (
+        ("Full Name", "fullName"), ("Preferred Name", "preferredName"),
+        ("Profession", "profession"), ("Tagline", "tagline"), ("Email", "email"),
+        ("Phone", "phone"), ("WhatsApp", "whatsapp"), ("Location", "location"),
+        ("Time Zone", "timeZone"), ("Short Bio", "bioShort"), ("Detailed Bio", "bioLong"),
+    )),
+    ("Business & Brand", (
+        ("Company", "company"), ("Industry", "industry"),
+        ("Website Purpose", "websitePurpose"), ("Target Audience", "targetAudience"),
+        ("Tone & Style", "toneStyle"), ("Brand Keywords", "brandKeywords"),
+        ("Color Preferences", "colorPrefs"), ("Colors to Avoid", "dontUseColors"),
+        ("Inspiration", "inspiration"), ("Existing Website", "existingWebsite"),
+        ("Likes", "likesExisting"), ("Dislikes", "dislikesExisting"),
+    )),
+    ("Experience & Skills", (
+        ("Experience", "experience"), ("Education", "education"), ("Skills", "skills"),
+        ("Services Offered", "servicesOffered"), ("Achievements", "achievements"),
+        ("Primary CTA", "primaryCta"), ("Secondary CTA", "secondaryCta"),
+        ("Preferred Contact", "preferredContact"),
+    )),
+    ("Timeline & Budget", (
+        ("Deadline", "deadline"), ("Budget Range", "budgetRange"),
+        ("Content Ready", "contentReady"), ("Other Notes", "otherNotes"),
+    )),
+)
+
+
+def _text_width(text, size, bold=False):
+    width = sum(
+        _HELVETICA_WIDTHS[ord(ch) - 32] if 32 <= ord(ch) <= 126 else 556 for ch in text
+    )
+    return width * size / 1000 * (1.05 if bold else 1.0)
+
+
+def _wrap(text, size, max_width, bold=False):
+    lines = []
+    for paragraph in str(text).splitlines() or [""]:
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if _text_width(candidate, size, bold) <= max_width or not line:
+                line = candidate
+            else:
+                lines.append(line)
+                line = word
+        lines.append(line)
+    return lines
+
+
+def _escape(text):
+    text = text.encode("cp1252", "replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class _Layout:
+    def __init__(self):
+        self.pages = []
+        self._new_page()
+
+    def _new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def text(self, text, size=10, bold=False, indent=0, gap=3):
+        max_width = PAGE_WIDTH - 2 * MARGIN - indent
+        for line in _wrap(text, size, max_width, bold):
+            if self.y - size < MARGIN:
+                self._new_page()
+            self.y -= size + gap
+            font = "F2" if bold else "F1"
+            self.ops.append(
+                f"BT /{font} {size} Tf {MARGIN + indent} {self.y:.1f} Td ({_escape(line)}) Tj ET"
+            )
+
+    def space(self, amount):
+        self.y -= amount
+
+
+def build_pdf(public_id, data, generated_on):
+    """Lay out the intake ``data`` (camelCase keys, as in intake_pdf.html) as PDF bytes."""
+    layout = _Layout()
+    layout.text("Portfolio Intake Summary", size=18, bold=True)
+    layout.text(f"Reference ID: {public_id}    Generated on: {generated_on}", size=9)
+    layout.space(8)
+
+    def section(title):
+        layout.space(10)
+        layout.text(title, size=13, bold=True)
+        layout.space(2)
+
+    def field(label, value):
+        if value in (None, "", [], {}):
+            return
+        layout.text(label, size=10, bold=True, gap=2)
+        layout.text(value, size=10, indent=12)
+
+    for title, fields in SECTIONS:
+        section(title)
+        for label, key in fields:
+            field(label, data.get(key))
+
+    section("Projects")
+    for project in data.get("projects") or []:
+        layout.text(project.get("title") or "Untitled project", size=11, bold=True)
+        for label, key in (("Role", "role"), ("Tech", "tech"), ("Description", "description"),
+                           ("Results", "results"), ("URL", "url")):
+            field(label, project.get(key))
+        layout.space(4)
+
+    section("Website Requirements")
+    field("Pages", ", ".join(data.get("pages") or []))
+    field("Features", ", ".join(data.get("features") or []))
+    for key, value in (data.get("technicalPrefs") or {}).items():
+        field(key, value)
+
+    links = {k: v for k, v in (data.get("socialLinks") or {}).items() if v}
+    if links:
+        section("Social Links")
+        for platform, url in links.items():
+            field(platform.title(), url)
+
+    return _serialize(layout.pages)
+
+
+def _serialize(pages):
+    objects = [
+        None,  # catalog, filled in below
+        None,  # page tree
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_refs = []
+    for ops in pages:
+        stream = zlib.compress("\n".join(ops).encode("latin-1"))
+        objects.append(
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        )
+        content_ref = len(objects)
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_ref} 0 R >>"
+            ).encode()
+        )
+        page_refs.append(f"{len(objects)} 0 R")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(page_refs)}] /Count {len(page_refs)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def write_pdf(path, public_id, data, generated_on):
+    """Render and atomically write the PDF; runs inside the pool's worker processes."""
+    body = build_pdf(public_id, data, generated_on)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(body)
+    os.replace(tmp_path, path)
+    return path
+
+
+class PdfPool:
+    def __init__(self, directory=None, max_workers=2):
+        self.directory = directory
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._pending = {}
+        # Reentrant: a job that is already done runs its callback immediately
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        self.directory = app.config["PDF_CACHE_DIR"]
+        self.max_workers = app.config["PDF_POOL_WORKERS"]
+        app.extensions["pdf_pool"] = self
+
+    def path_for(self, public_id):
+        return os.path.join(self.directory, public_id[:2], public_id + ".pdf")
+
+    def ensure(self, public_id, data, generated_on):
+        """Schedule generation unless the file exists or a job is already running.
+
+        Returns a Future resolving to the file path, or None if it already exists.
+        """
+        path = self.path_for(public_id)
+        if os.path.exists(path):
+            return None
+        with self._lock:
+            future = self._pending.get(public_id)
+            if future is None:
+                future = self._get_executor().submit(write_pdf, path, public_id, data, generated_on)
+                self._pending[public_id] = future
+                future.add_done_callback(lambda _: self._forget(public_id))
+            return future
+
+    def _forget(self, public_id):
+        with self._lock:
+            self._pending.pop(public_id, None)
+
+    def _get_executor(self):
+        # One pool per process, created lazily so it never crosses a fork,
+        # and replaced if a worker died and broke it
+        broken = getattr(self._executor, "_broken", False)
+        if self._executor is None or self._pid != os.getpid() or broken:
+            self._pid = os.getpid()
+            self._pending = {}
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
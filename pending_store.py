@@ -0,0 +1,69 @@
+"""
+Server-side store for submissions waiting on email verification.
+
+The browser only carries an opaque token in its session cookie; the form
+payload lives in the ``pending_submissions`` table as msgpack and expires
+together with the OTP. Expired rows are evicted whenever a new one is
+written, so the table never holds much more than one OTP window of data.
+"""
+import secrets
+from datetime import datetime, timedelta
+
+import msgspec
+
+_encoder = msgspec.msgpack.Encoder()
+
+
+class PendingStore:
+    def __init__(self, app=None, db=None, model=None, payload_type=None):
+        if app is not None:
+            self.init_app(app, db, model, payload_type)
+
+    def init_app(self, app, db, model, payload_type=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self._decoder = msgspec.msgpack.Decoder(payload_type) if payload_type else msgspec.msgpack.Decoder()
+        app.config.setdefault("PENDING_SUBMISSION_TTL", 600)
+        app.extensions["pending_store"] = self
+
+    def put(self, payload, otp, email):
+        """Store ``payload`` and return the token to keep in the session."""
+        now = datetime.utcnow()
+        self.purge_expired(now)
+        entry = self.model(
+            token=secrets.token_urlsafe(16),
+            email=email,
+            otp=otp,
+            payload=_encoder.encode(payload),
+            created_at=now,
+            expires_at=now + timedelta(seconds=self.app.config["PENDING_SUBMISSION_TTL"]),
+        )
+        self.db.session.add(entry)
+        self.db.session.commit()
+        return entry.token
+
+    def get(self, token):
+        """Return the live entry for ``token``, or None if missing or expired."""
+        if not token:
+            return None
+        entry = self.db.session.get(self.model, token)
+        if entry is None or entry.expires_at <= datetime.utcnow():
+            return None
+        return entry
+
+    def load(self, entry):
+        """Decode the stored payload; None if it no longer fits the payload type."""
+        try:
+            return self._decoder.decode(entry.payload)
+        except (msgspec.DecodeError, msgspec.ValidationError):
+            return None
+
+    def discard(self, entry):
+        """Mark ``entry`` for deletion; the caller's commit makes it final."""
+        self.db.session.delete(entry)
+
+    def purge_expired(self, now=None):
+        self.model.query.filter(self.model.expires_at <= (now or datetime.utcnow())).delete(
+            synchronize_session=False
+        )
@@ -0,0 +1,164 @@
+"""
+Token-bucket rate limiting shared by every worker through the database.
+
+Each bucket is one row (name, tokens, updated_at). On SQLite taking a token
+is a single upsert that refills the bucket for the time elapsed and spends
+the token only if one is available; other backends lock the row
+(``SELECT ... FOR UPDATE``) for the same read-refill-spend. Either way
+concurrent workers can never overspend a bucket and no process keeps state
+of its own. A limit is written as
+``"<count>/<period>"`` (``"10/hour"``): the bucket holds ``count`` tokens
+and refills at ``count`` per period. ``"5/0"`` never refills, which makes
+it an attempt cap. ``refund()`` gives back tokens spent on work that then
+failed; the next refill caps the bucket at its capacity again.
+"""
+import random
+import time
+from collections import namedtuple
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+TABLE = "rate_limits"
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+Rate = namedtuple("Rate", "capacity per_second")
+
+_REFILLED = f"MIN(:capacity, {TABLE}.tokens + (:now - {TABLE}.updated_at) * :rate)"
+_SQLITE_TAKE = text(
+    f"INSERT INTO {TABLE} (name, tokens, updated_at) VALUES (:name, :capacity - :cost, :now) "
+    f"ON CONFLICT (name) DO UPDATE SET tokens = {_REFILLED} - :cost, updated_at = :now "
+    f"WHERE {_REFILLED} >= :cost"
+)
+
+
+def parse_rate(value) -> Rate:
+    """``"10/hour"``, ``"3/60"`` (seconds) or ``"5/0"`` (no refill) -> Rate."""
+    count, _, period = str(value).partition("/")
+    count = int(count)
+    seconds = PERIODS.get(period.strip()) if not period.strip().isdigit() else int(period)
+    if seconds is None:
+        raise ValueError(f"Unknown rate period in {value!r}")
+    return Rate(count, count / seconds if seconds else 0.0)
+
+
+class RateLimiter:
+    def __init__(self, app=None, db=None, model=None):
+        if app is not None:
+            self.init_app(app, db, model)
+
+    def init_app(self, app, db, model):
+        app.config.setdefault("RATELIMIT_ENABLED", True)
+        app.config.setdefault("RATELIMIT_RETENTION", 86400)
+        self.app = app
+        self.db = db
+        self.model = model
+        app.extensions["rate_limiter"] = self
+
+    def hit(self, key, rate, cost=1):
+        """Spend ``cost`` tokens from ``key``'s bucket.
+
+        Returns ``(allowed, retry_after)``; ``retry_after`` is seconds until
+        enough tokens are back, or None if the bucket never refills.
+        """
+        if not self.app.config["RATELIMIT_ENABLED"]:
+            return True, 0
+        if isinstance(rate, str):
+            rate = parse_rate(rate)
+        now = time.time()
+        params = {"name": key[:255], "capacity": rate.capacity, "rate": rate.per_second, "cost": cost, "now": now}
+
+        try:
+            allowed, tokens = self._take(params)
+        except IntegrityError:
+            # Another worker created the same bucket first; now it exists
+            allowed, tokens = self._take(params)
+
+        if random.random() < 0.005:
+            self.purge(now - self.app.config["RATELIMIT_RETENTION"])
+        if allowed:
+            return True, 0
+        return False, self._retry_after(rate, tokens, cost)
+
+    def peek(self, key, rate, cost=1):
+        """Whether ``hit()`` would allow ``cost`` now, spending nothing; same return value."""
+        if not self.app.config["RATELIMIT_ENABLED"]:
+            return True, 0
+        if isinstance(rate, str):
+            rate = parse_rate(rate)
+        params = {"name": key[:255], "capacity": rate.capacity, "rate": rate.per_second, "now": time.time()}
+        with self.db.engine.connect() as connection:
+            row = connection.execute(
+                text(f"SELECT tokens, updated_at FROM {TABLE} WHERE name = :name"), params
+            ).first()
+        tokens = rate.capacity if row is None else self._refill(row, params)
+        if tokens >= cost:
+            return True, 0
+        return False, self._retry_after(rate, tokens, cost)
+
+    def refund(self, key, cost=1):
+        """Give back ``cost`` tokens taken by ``hit()`` for work that did not happen."""
+        if not self.app.config["RATELIMIT_ENABLED"]:
+            return
+        with self.db.engine.begin() as connection:
+            connection.execute(
+                text(f"UPDATE {TABLE} SET tokens = tokens + :cost WHERE name = :name"),
+                {"name": key[:255], "cost": cost},
+            )
+
+    @staticmethod
+    def _retry_after(rate, tokens, cost):
+        if not rate.per_second:
+            return None
+        return max(1, int((cost - tokens) / rate.per_second + 0.999))
+
+    def _take(self, params):
+        """Returns ``(allowed, tokens left before the attempt)``."""
+        with self.db.engine.begin() as connection:
+            if connection.dialect.name == "sqlite":
+                if connection.execute(_SQLITE_TAKE, params).rowcount:
+                    return True, None
+                row = connection.execute(
+                    text(f"SELECT tokens, updated_at FROM {TABLE} WHERE name = :name"), params
+                ).first()
+                return False, self._refill(row, params)
+
+            # Portable path: lock the row, refill and spend in Python
+            table = self.model.__table__
+            if connection.dialect.name == "mysql":
+                # Create the bucket full first: locking a missing row takes a gap
+                # lock, and two of those followed by inserts deadlock
+                connection.execute(table.insert().prefix_with("IGNORE"), {
+                    "name": params["name"], "tokens": params["capacity"], "updated_at": params["now"],
+                })
+            row = connection.execute(
+                table.select().where(table.c.name == params["name"]).with_for_update()
+            ).first()
+            if row is None:
+                connection.execute(table.insert(), {
+                    "name": params["name"],
+                    "tokens": params["capacity"] - params["cost"],
+                    "updated_at": params["now"],
+                })
+                return True, None
+            tokens = self._refill(row, params)
+            if tokens < params["cost"]:
+                return False, tokens
+            connection.execute(
+                table.update().where(table.c.name == params["name"]),
+                {"tokens": tokens - params["cost"], "updated_at": params["now"]},
+            )
+            return True, None
+
+    @staticmethod
+    def _refill(row, params):
+        return min(params["capacity"], row.tokens + (params["now"] - row.updated_at) * params["rate"])
+
+    def reset(self, key):
+        with self.db.engine.begin() as connection:
+            connection.execute(text(f"DELETE FROM {TABLE} WHERE name = :name"), {"name": key[:255]})
+
+    def purge(self, before):
+        """Drop buckets idle since ``before``; they would be full again anyway."""
+        with self.db.engine.begin() as connection:
+            connection.execute(text(f"DELETE FROM {TABLE} WHERE updated_at < :before"), {"before": before})
@@ -0,0 +1,120 @@
+"""
+Two-tier cache for rendered pages that never change once produced.
+
+Entries live in a byte-capped in-memory LRU and are written through to disk,
+so a worker that misses in memory (fresh process, evicted entry) can still
+serve the page without touching the database or Jinja. Each entry carries a
+strong ETag and a Last-Modified time for conditional GETs.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+
+class CachedPage:
+    __slots__ = ("body", "etag", "last_modified")
+
+    def __init__(self, body: bytes, last_modified: datetime):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.last_modified = last_modified
+
+
+class RenderCache:
+    def __init__(self, directory=None, max_bytes=32 * 1024 * 1024, version="1"):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            self.directory = os.path.join(directory, version)
+
+    def init_app(self, app, *templates):
+        """Configure from ``app``; the cache is versioned by the given templates' sources."""
+        self.max_bytes = app.config["RENDER_CACHE_MAX_BYTES"]
+        version = template_version(app, *templates) if templates else "1"
+        self.directory = os.path.join(app.config["RENDER_CACHE_DIR"], version)
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        app.extensions["render_cache"] = self
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".html")
+
+    def get(self, key: str):
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None:
+                self._entries.move_to_end(key)
+                return page
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fh:
+                body = fh.read()
+            mtime = os.stat(path).st_mtime
+        except FileNotFoundError:
+            return None
+        page = CachedPage(body, datetime.fromtimestamp(mtime, timezone.utc))
+        self._remember(key, page)
+        return page
+
+    def put(self, key: str, body: bytes, last_modified: datetime) -> CachedPage:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        # Whole seconds: that is all Last-Modified / If-Modified-Since can carry
+        page = CachedPage(body, last_modified.replace(microsecond=0))
+        self._write(key, page)
+        self._remember(key, page)
+        return page
+
+    def discard(self, key: str):
+        with self._lock:
+            page = self._entries.pop(key, None)
+            if page is not None:
+                self._size -= len(page.body)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _remember(self, key, page):
+        if len(page.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._entries[key] = page
+            self._size += len(page.body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.body)
+
+    def _write(self, key, page):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(page.body)
+            stamp = page.last_modified.timestamp()
+            os.utime(tmp_path, (stamp, stamp))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+def template_version(app, *names) -> str:
+    """Short hash of the given templates' sources, so edits start a fresh cache."""
+    digest = hashlib.sha256()
+    for name in names:
+        source, _, _ = app.jinja_loader.get_source(app.jinja_env, name)
+        digest.update(source.encode())
+    return digest.hexdigest()[:12]
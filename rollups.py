@@ -0,0 +1,198 @@
+"""
+Precomputed dashboard counters.
+
+``submission_rollups`` holds one ``(dimension, bucket) -> count`` row per
+thing the dashboard counts: the total, per-day counts, and submissions per
+profession / budget range / industry / requested page / requested feature.
+Mapper events upsert the affected counters on the same connection that
+inserts (or deletes) a submission, so the counters commit or roll back with
+the row itself. Reads are a handful of primary-key or per-dimension lookups,
+independent of how many submissions exist. ``rebuild()`` recomputes
+everything from the submissions table.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, select
+
+TOTAL = "total"
+ACTIVE = "active"
+DAY = "day"
+
+# dimension -> Submission column, one bucket per value
+SCALAR_DIMENSIONS = {
+    "profession": "profession",
+    "budget_range": "budget_range",
+    "industry": "industry",
+}
+# dimension -> JSON list column, one bucket per distinct item
+LIST_DIMENSIONS = {
+    "page": "pages",
+    "feature": "features",
+}
+
+
+def _bucket(value):
+    return "" if value is None else str(value)[:255]
+
+
+def _day(submitted_at):
+    return submitted_at.date().isoformat()
+
+
+def counters_for(submission) -> Counter:
+    """The ``(dimension, bucket)`` counters one submission contributes to."""
+    counters = Counter({(TOTAL, ""): 1})
+    if submission.submitted_at is not None:
+        counters[(ACTIVE, "")] += 1
+        counters[(DAY, _day(submission.submitted_at))] += 1
+    for dimension, column in SCALAR_DIMENSIONS.items():
+        counters[(dimension, _bucket(getattr(submission, column)))] += 1
+    for dimension, column in LIST_DIMENSIONS.items():
+        for item in set(getattr(submission, column) or ()):
+            counters[(dimension, _bucket(item))] += 1
+    return counters
+
+
+def apply(connection, table, counters, sign=1):
+    """Add ``sign * count`` to each counter, creating missing rows."""
+    rows = [
+        {"dimension": dimension, "bucket": bucket, "count": sign * count}
+        for (dimension, bucket), count in counters.items()
+    ]
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.dimension, table.c.bucket],
+            set_={"count": table.c.count + stmt.excluded["count"]},
+        )
+        connection.execute(stmt, rows)
+        return
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+
+        stmt = insert(table)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + stmt.inserted["count"])
+        connection.execute(stmt, rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(
+            table.update()
+            .where(table.c.dimension == row["dimension"], table.c.bucket == row["bucket"])
+            .values(count=table.c.count + row["count"])
+        )
+        if not updated.rowcount:
+            connection.execute(table.insert(), row)
+
+
+def register(model, rollup_model):
+    """Keep the counters in step with inserts and deletes of ``model``."""
+    table = rollup_model.__table__
+
+    @event.listens_for(model, "after_insert")
+    def _count(mapper, connection, target):
+        apply(connection, table, counters_for(target))
+
+    @event.listens_for(model, "after_delete")
+    def _uncount(mapper, connection, target):
+        apply(connection, table, counters_for(target), sign=-1)
+
+
+def rebuild(session, rollup_model, model, batch_size=1000) -> int:
+    """Recompute every counter from ``model`` rows in one transaction; returns rows counted."""
+    table = rollup_model.__table__
+    session.execute(delete(table))
+
+    counters = Counter()
+    total, active = session.execute(
+        select(func.count(model.id), func.count(model.submitted_at))
+    ).one()
+    counters[(TOTAL, "")] = total
+    counters[(ACTIVE, "")] = active
+
+    day = func.date(model.submitted_at)
+    for bucket, count in session.execute(
+        select(day, func.count()).where(model.submitted_at.isnot(None)).group_by(day)
+    ):
+        counters[(DAY, str(bucket))] = count
+
+    for dimension, column in SCALAR_DIMENSIONS.items():
+        attr = getattr(model, column)
+        for value, count in session.execute(select(attr, func.count()).group_by(attr)):
+            counters[(dimension, _bucket(value))] += count
+
+    columns = [getattr(model, column) for column in LIST_DIMENSIONS.values()]
+    rows = session.execute(select(*columns).execution_options(yield_per=batch_size))
+    for row in rows:
+        for dimension, items in zip(LIST_DIMENSIONS, row):
+            for item in set(items or ()):
+                counters[(dimension, _bucket(item))] += 1
+
+    counters = Counter({key: count for key, count in counters.items() if count})
+    apply(session.connection(), table, counters)
+    session.commit()
+    return total
+
+
+def is_empty(session, rollup_model) -> bool:
+    return session.execute(select(rollup_model.dimension).limit(1)).first() is None
+
+
+# -------------------------------------------------------------------
+# Reads
+# -------------------------------------------------------------------
+
+
+def totals(session, rollup_model, today=None):
+    """``{"total", "active", "today"}`` for the dashboard stat cards."""
+    today = (today or datetime.utcnow()).date().isoformat()
+    wanted = {(TOTAL, ""): "total", (ACTIVE, ""): "active", (DAY, today): "today"}
+    stats = dict.fromkeys(wanted.values(), 0)
+    rows = session.execute(
+        select(rollup_model.dimension, rollup_model.bucket, rollup_model.count).where(
+            rollup_model.dimension.in_([TOTAL, ACTIVE, DAY]),
+            rollup_model.bucket.in_(["", today]),
+        )
+    )
+    for dimension, bucket, count in rows:
+        key = wanted.get((dimension, bucket))
+        if key:
+            stats[key] = count
+    return stats
+
+
+def breakdown(session, rollup_model, dimension, limit=10):
+    """Top ``limit`` ``(bucket, count)`` pairs for ``dimension``, largest first."""
+    rows = session.execute(
+        select(rollup_model.bucket, rollup_model.count)
+        .where(rollup_model.dimension == dimension, rollup_model.count > 0)
+        .order_by(rollup_model.count.desc(), rollup_model.bucket)
+        .limit(limit)
+    )
+    return [(bucket, count) for bucket, count in rows]
+
+
+def daily(session, rollup_model, days=14, today=None):
+    """Submissions per day for the last ``days`` days, oldest first, zero-filled."""
+    today = (today or datetime.utcnow()).date()
+    start = today - timedelta(days=days - 1)
+    counts = dict(
+        session.execute(
+            select(rollup_model.bucket, rollup_model.count).where(
+                rollup_model.dimension == DAY,
+                rollup_model.bucket >= start.isoformat(),
+            )
+        ).all()
+    )
+    return [
+        ((start + timedelta(days=i)).isoformat(), counts.get((start + timedelta(days=i)).isoformat(), 0))
+        for i in range(days)
+    ]
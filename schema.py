@@ -0,0 +1,185 @@
+"""
+Typed schema for the intake payload.
+
+``IntakePayload`` is the one description of the intake fields. Its encoded
+(camelCase) names are the form field names and the keys intake_pdf.html
+reads; its attribute names are the ``Submission`` column names. The form is
+decoded into it in a single pass, it is what the pending store serializes,
+and the model kwargs and PDF data are both derived from it.
+"""
+from datetime import date
+from itertools import zip_longest
+from typing import List, Optional
+
+import msgspec
+
+
+class Project(msgspec.Struct):
+    title: str
+    role: Optional[str] = None
+    description: Optional[str] = None
+    tech: Optional[str] = None
+    results: Optional[str] = None
+    url: Optional[str] = None
+
+
+class SocialLinks(msgspec.Struct):
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+    behance: Optional[str] = None
+    dribbble: Optional[str] = None
+    instagram: Optional[str] = None
+    twitter: Optional[str] = None
+    other: Optional[str] = None
+
+
+class TechnicalPrefs(msgspec.Struct):
+    cms: Optional[str] = None
+    blog: Optional[str] = None
+    ongoing_support: Optional[str] = msgspec.field(default=None, name="ongoingSupport")
+    seo: Optional[str] = None
+    analytics: Optional[str] = None
+
+
+class UploadedFile(msgspec.Struct):
+    name: str
+    digest: str
+    size: int
+    type: str
+    field: Optional[str] = None
+
+
+class IntakePayload(msgspec.Struct, rename="camel"):
+    email: str
+    full_name: Optional[str] = None
+    preferred_name: Optional[str] = None
+    profession: Optional[str] = None
+    tagline: Optional[str] = None
+    phone: Optional[str] = None
+    whatsapp: Optional[str] = None
+    location: Optional[str] = None
+    time_zone: Optional[str] = None
+    bio_long: Optional[str] = None
+    bio_short: Optional[str] = None
+    company: Optional[str] = None
+    industry: Optional[str] = None
+    website_purpose: Optional[str] = None
+    target_audience: Optional[str] = None
+    tone_style: Optional[str] = None
+    brand_keywords: Optional[str] = None
+    color_prefs: Optional[str] = None
+    dont_use_colors: Optional[str] = None
+    inspiration: Optional[str] = None
+    existing_website: Optional[str] = None
+    likes_existing: Optional[str] = None
+    dislikes_existing: Optional[str] = None
+    experience: Optional[str] = None
+    education: Optional[str] = None
+    skills: Optional[str] = None
+    services_offered: Optional[str] = None
+    achievements: Optional[str] = None
+    primary_cta: Optional[str] = None
+    secondary_cta: Optional[str] = None
+    preferred_contact: Optional[str] = None
+    social_links: SocialLinks = msgspec.field(default_factory=SocialLinks)
+    projects: List[Project] = []
+    pages: List[str] = []
+    features: List[str] = []
+    technical_prefs: TechnicalPrefs = msgspec.field(default_factory=TechnicalPrefs)
+    deadline: Optional[date] = None
+    budget_range: Optional[str] = None
+    content_ready: Optional[str] = None
+    other_notes: Optional[str] = None
+    files: List[UploadedFile] = []
+
+    def model_kwargs(self) -> dict:
+        """Keyword arguments for ``Submission(...)``; JSON columns become plain data."""
+        kwargs = {}
+        for name in FIELD_NAMES:
+            value = getattr(self, name)
+            kwargs[name] = value if name in SCALAR_FIELDS else msgspec.to_builtins(value)
+        return kwargs
+
+
+# Form inputs that feed nested structs rather than top-level fields
+SOCIAL_INPUTS = {
+    "linkedin": "linkedin",
+    "github": "github",
+    "behance": "behance",
+    "dribbble": "dribbble",
+    "instagram": "instagram",
+    "twitter": "twitter",
+    "otherSocial": "other",
+}
+PREF_INPUTS = {
+    "cmsPreference": "cms",
+    "blogPreference": "blog",
+    "ongoingSupport": "ongoingSupport",
+    "seoLevel": "seo",
+    "analytics": "analytics",
+}
+PROJECT_INPUTS = {
+    "projectTitle[]": "title",
+    "projectRole[]": "role",
+    "projectDesc[]": "description",
+    "projectTech[]": "tech",
+    "projectResults[]": "results",
+    "projectUrl[]": "url",
+}
+LIST_INPUTS = {"pages[]": "pages", "features[]": "features"}
+
+_FIELDS = msgspec.structs.fields(IntakePayload)
+_NESTED_FIELDS = ("social_links", "projects", "pages", "features", "technical_prefs", "files")
+FIELD_NAMES = tuple(f.name for f in _FIELDS)
+SCALAR_FIELDS = frozenset(FIELD_NAMES) - frozenset(_NESTED_FIELDS)
+ENCODE_NAMES = {f.name: f.encode_name for f in _FIELDS}
+_TOP_LEVEL_INPUTS = frozenset(ENCODE_NAMES[name] for name in SCALAR_FIELDS)
+
+
+def from_form(form) -> IntakePayload:
+    """Decode a submitted intake form (a werkzeug MultiDict) in one pass.
+
+    Raises ``msgspec.ValidationError`` if a field has the wrong shape.
+    """
+    raw, social, prefs, project_columns = {}, {}, {}, {}
+    for key, values in form.lists():
+        if key in PROJECT_INPUTS:
+            project_columns[PROJECT_INPUTS[key]] = values
+        elif key in LIST_INPUTS:
+            raw[LIST_INPUTS[key]] = values
+        elif key in SOCIAL_INPUTS:
+            social[SOCIAL_INPUTS[key]] = values[0]
+        elif key in PREF_INPUTS:
+            prefs[PREF_INPUTS[key]] = values[0]
+        elif key in _TOP_LEVEL_INPUTS:
+            raw[key] = values[0]
+
+    names = list(project_columns)
+    projects = []
+    for row in zip_longest(*project_columns.values(), fillvalue=""):
+        project = dict(zip(names, row))
+        project["title"] = (project.get("title") or "").strip()
+        if project["title"]:
+            projects.append(project)
+
+    if not raw.get("deadline"):
+        raw["deadline"] = None
+    raw["projects"] = projects
+    raw["socialLinks"] = social
+    raw["technicalPrefs"] = prefs
+    return msgspec.convert(raw, IntakePayload)
+
+
+def attach_files(payload, uploaded) -> None:
+    payload.files = msgspec.convert(uploaded, List[UploadedFile])
+
+
+def pdf_data(submission) -> dict:
+    """camelCase data for intake_pdf.html / the PDF writer, read off a Submission row."""
+    data = {}
+    for name, key in ENCODE_NAMES.items():
+        value = getattr(submission, name)
+        if name == "deadline" and value is not None:
+            value = value.strftime("%Y-%m-%d")
+        data[key] = value
+    return data
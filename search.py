@@ -0,0 +1,172 @@
+"""
+Full-text search over submissions backed by an SQLite FTS5 table.
+
+``submissions_fts`` shares its rowid with ``submissions.id`` and is kept in
+step by mapper events, so the row is indexed in the same transaction that
+inserts the submission. ``rebuild()`` repopulates it from scratch, which is
+also how existing databases get their index.
+
+Server databases have no FTS5; ``substring_ids()`` answers the same query
+there with a LIKE scan (every word somewhere in the text columns, newest
+first). Slower and unranked, but search keeps working on every backend.
+"""
+import re
+
+from sqlalchemy import event, or_, select, text
+
+FTS_TABLE = "submissions_fts"
+
+# Column order matters: it is the order of the bm25() weights below
+FTS_COLUMNS = (
+    "full_name",
+    "email",
+    "profession",
+    "company",
+    "skills",
+    "services_offered",
+    "bio_long",
+    "projects",
+)
+BM25_WEIGHTS = (10.0, 6.0, 4.0, 3.0, 3.0, 2.0, 1.0, 1.0)
+# The plain-text ones, for the LIKE fallback
+LIKE_COLUMNS = FTS_COLUMNS[:-1]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_INSERT_SQL = text(
+    f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) "
+    f"VALUES (:rowid, {', '.join(':' + c for c in FTS_COLUMNS)})"
+)
+_DELETE_SQL = text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :rowid")
+
+
+def is_supported(bind) -> bool:
+    return bind.dialect.name == "sqlite"
+
+
+def create_index(connection):
+    """Create the FTS5 table (no-op if it exists) and set its ranking weights."""
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first()
+    if exists:
+        return False
+    connection.execute(text(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+    ))
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    connection.execute(
+        text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', :rank)"),
+        {"rank": f"bm25({weights})"},
+    )
+    return True
+
+
+def document_for(submission) -> dict:
+    projects = submission.projects or []
+    return {
+        "rowid": submission.id,
+        "full_name": submission.full_name,
+        "email": submission.email,
+        "profession": submission.profession,
+        "company": submission.company,
+        "skills": submission.skills,
+        "services_offered": submission.services_offered,
+        "bio_long": submission.bio_long,
+        "projects": " ".join(
+            f"{p.get('title') or ''} {p.get('description') or ''}" for p in projects
+        ),
+    }
+
+
+def index_submission(connection, submission):
+    connection.execute(_DELETE_SQL, {"rowid": submission.id})
+    connection.execute(_INSERT_SQL, document_for(submission))
+
+
+def rebuild(session, model, batch_size=1000) -> int:
+    """Drop and repopulate the index from ``model`` rows; returns rows indexed."""
+    connection = session.connection()
+    connection.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+    create_index(connection)
+
+    count = 0
+    columns = [model.id] + [getattr(model, name) for name in FTS_COLUMNS]
+    rows = session.execute(
+        select(*columns).order_by(model.id).execution_options(yield_per=batch_size)
+    )
+    batch = []
+    for submission in rows:
+        batch.append(document_for(submission))
+        if len(batch) >= batch_size:
+            connection.execute(_INSERT_SQL, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        connection.execute(_INSERT_SQL, batch)
+        count += len(batch)
+    connection.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+    session.commit()
+    return count
+
+
+def match_expression(query: str):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_ids(session, query, limit=50, offset=0):
+    """Return submission ids for ``query``, best match first."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    rows = session.execute(
+        text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+            "ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"q": expression, "limit": limit, "offset": offset},
+    )
+    return [row[0] for row in rows]
+
+
+def substring_ids(session, model, query, limit=50, offset=0):
+    """Ids of ``model`` rows containing every word of ``query``, newest first (no FTS5)."""
+    tokens = _TOKEN_RE.findall(query or "")
+    if not tokens:
+        return []
+    conditions = []
+    for token in tokens:
+        # \w tokens can carry LIKE's "_" wildcard, nothing else
+        pattern = "%" + token.replace("_", "\\_") + "%"
+        conditions.append(or_(*(
+            getattr(model, column).ilike(pattern, escape="\\") for column in LIKE_COLUMNS
+        )))
+    rows = session.execute(
+        select(model.id)
+        .where(*conditions)
+        .order_by(model.submitted_at.desc(), model.id.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [row[0] for row in rows]
+
+
+def register(model):
+    """Keep the index in step with inserts, updates and deletes of ``model``."""
+
+    @event.listens_for(model, "after_insert")
+    @event.listens_for(model, "after_update")
+    def _index(mapper, connection, target):
+        if is_supported(connection):
+            index_submission(connection, target)
+
+    @event.listens_for(model, "after_delete")
+    def _unindex(mapper, connection, target):
+        if is_supported(connection):
+            connection.execute(_DELETE_SQL, {"rowid": target.id})
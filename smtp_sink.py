@@ -0,0 +1,164 @@
+"""
+Local debug SMTP server that accepts every message and keeps it in memory.
+
+Run it next to the app when working on the mail path:
+
+    python smtp_sink.py --port 1025
+    MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_USE_TLS=0 flask run
+
+Every delivered message is printed (and optionally written to ``--maildir``
+as .eml). ``SMTPSink`` can also be started in-process by scripts that need
+to read the OTP out of the captured mail.
+"""
+import argparse
+import os
+import re
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+
+OTP_RE = re.compile(r"verification code is:\s*(\d{6})")
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 smtp-sink ready")
+        mail_from, rcpt_to = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, arg = line.decode("utf-8", "replace").strip().partition(" ")
+            command = command.upper()
+
+            if command == "EHLO":
+                self.reply("250-smtp-sink")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 smtp-sink")
+            elif command == "AUTH":
+                if arg.upper().startswith("LOGIN"):
+                    for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                        self.reply(f"334 {prompt}")
+                        self.rfile.readline()
+                self.reply("235 authenticated")
+            elif command == "MAIL":
+                mail_from, rcpt_to = arg.partition(":")[2].strip(" <>"), []
+                self.reply("250 ok")
+            elif command == "RCPT":
+                rcpt_to.append(arg.partition(":")[2].strip(" <>"))
+                self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 end data with <CR><LF>.<CR><LF>")
+                self.server.sink.deliver(mail_from, rcpt_to, self._read_data())
+                self.reply("250 queued")
+            elif command == "RSET":
+                mail_from, rcpt_to = None, []
+                self.reply("250 ok")
+            elif command == "NOOP":
+                self.reply("250 ok")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("502 command not implemented")
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            if line.startswith(b".."):
+                line = line[1:]
+            lines.append(line)
+        return b"".join(lines)
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    def __init__(self, host="127.0.0.1", port=1025, maildir=None, verbose=False):
+        self.messages = []
+        self.maildir = maildir
+        self.verbose = verbose
+        self._cond = threading.Condition()
+        self.server = _ThreadingSMTPServer((host, port), _SMTPHandler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def deliver(self, mail_from, rcpt_to, data):
+        message = message_from_bytes(data, policy=policy.default)
+        with self._cond:
+            self.messages.append(message)
+            self._cond.notify_all()
+
+        if self.maildir:
+            os.makedirs(self.maildir, exist_ok=True)
+            name = f"{time.time():.6f}-{len(self.messages)}.eml"
+            with open(os.path.join(self.maildir, name), "wb") as fh:
+                fh.write(data)
+        if self.verbose:
+            print(f"[smtp-sink] {mail_from} -> {', '.join(rcpt_to)}: {message['subject']}")
+
+    def wait_for(self, recipient, timeout=10):
+        """Block until a message to ``recipient`` arrives and return it."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for message in reversed(self.messages):
+                    if recipient in (message["to"] or ""):
+                        return message
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"no mail for {recipient} within {timeout}s")
+                self._cond.wait(remaining)
+
+    def wait_for_otp(self, recipient, timeout=10):
+        message = self.wait_for(recipient, timeout)
+        return extract_otp(message)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def extract_otp(message):
+    part = message.get_body(preferencelist=("plain",)) if message.is_multipart() else message
+    match = OTP_RE.search(part.get_content())
+    return match.group(1) if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--maildir", help="also write each message to this directory as .eml")
+    args = parser.parse_args()
+
+    sink = SMTPSink(args.host, args.port, maildir=args.maildir, verbose=True)
+    print(f"smtp-sink listening on {sink.host}:{sink.port}")
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
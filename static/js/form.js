@@ -83,8 +83,195 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
-    // Optional: simple required-field check before final submit
-    form.addEventListener("submit", (e) => {
-        // Let HTML required handle most validation
-    });
+    // -------------------------------------------------------------
+    // Chunked, resumable uploads: files go up as soon as they are
+    // picked, in parallel chunks; the form POST only carries their ids
+    // -------------------------------------------------------------
+    const uploadUrl = form.dataset.uploadUrl;
+    const CHUNK_CONCURRENCY = 3;
+    const CHUNK_RETRIES = 5;
+    const uploadsByInput = new Map();
+
+    function storageKey(file, field) {
+        return `upload:${field}:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function remember(key, value) {
+        try {
+            if (value) localStorage.setItem(key, value);
+            else localStorage.removeItem(key);
+        } catch (err) {
+            // Storage unavailable (private mode): uploads just are not resumable
+        }
+    }
+
+    function recall(key) {
+        try {
+            return localStorage.getItem(key);
+        } catch (err) {
+            return null;
+        }
+    }
+
+    async function requestJSON(method, url, body) {
+        const res = await fetch(url, {
+            method,
+            headers: body ? { "Content-Type": "application/json" } : {},
+            body: body ? JSON.stringify(body) : undefined,
+        });
+        const data = await res.json().catch(() => ({}));
+        if (!res.ok) {
+            const error = new Error(data.error || `Upload failed (${res.status})`);
+            error.status = res.status;
+            throw error;
+        }
+        return data;
+    }
+
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+    async function putChunk(state, file, index) {
+        const start = index * state.chunkSize;
+        const blob = file.slice(start, Math.min(start + state.chunkSize, file.size));
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const res = await fetch(`${uploadUrl}/${state.id}/chunks/${index}`, {
+                    method: "PUT",
+                    headers: { "Content-Type": "application/octet-stream" },
+                    body: blob,
+                });
+                if (res.ok) return;
+                // 429: throttled, worth another try after the backoff
+                if (res.status < 500 && res.status !== 429) {
+                    throw Object.assign(new Error(`Chunk ${index} rejected`), { final: true });
+                }
+            } catch (err) {
+                if (err.final || attempt >= CHUNK_RETRIES) throw err;
+            }
+            await sleep(Math.min(1000 * 2 ** attempt, 15000));
+        }
+    }
+
+    async function completeUpload(state) {
+        for (let attempt = 0; ; attempt++) {
+            try {
+                return await requestJSON("POST", `${uploadUrl}/${state.id}/complete`);
+            } catch (err) {
+                // 409: another request is assembling this upload; 429: throttled
+                if ((err.status !== 409 && err.status !== 429) || attempt >= CHUNK_RETRIES) throw err;
+            }
+            await sleep(Math.min(1000 * 2 ** attempt, 15000));
+        }
+    }
+
+    async function uploadFile(file, field, onProgress) {
+        const key = storageKey(file, field);
+        let state = null;
+        const savedId = recall(key);
+        if (savedId) {
+            // Resume: only the chunks the server has not seen are sent
+            state = await requestJSON("GET", `${uploadUrl}/${savedId}`).catch(() => null);
+        }
+        if (!state) {
+            state = await requestJSON("POST", uploadUrl, { filename: file.name, size: file.size, field });
+            remember(key, state.id);
+        }
+
+        if (!state.complete) {
+            const pending = [];
+            const received = new Set(state.received);
+            for (let i = 0; i < state.chunks; i++) {
+                if (!received.has(i)) pending.push(i);
+            }
+            let done = received.size;
+            onProgress(done / state.chunks);
+            const worker = async () => {
+                while (pending.length) {
+                    await putChunk(state, file, pending.shift());
+                    onProgress(++done / state.chunks);
+                }
+            };
+            await Promise.all(
+                Array.from({ length: Math.min(CHUNK_CONCURRENCY, pending.length) }, worker)
+            );
+        }
+
+        await completeUpload(state);
+        remember(key, null);
+        return state.id;
+    }
+
+    function statusLine(input) {
+        let line = input.parentElement.querySelector(".upload-status");
+        if (!line) {
+            line = document.createElement("small");
+            line.className = "upload-status";
+            input.insertAdjacentElement("afterend", line);
+        }
+        return line;
+    }
+
+    function startUploads(input) {
+        const files = Array.from(input.files);
+        const line = statusLine(input);
+        const progress = files.map(() => 0);
+        const render = () => {
+            const percent = Math.round((progress.reduce((a, b) => a + b, 0) / files.length) * 100);
+            line.textContent = `Uploading… ${percent}%`;
+        };
+        const jobs = files.map((file, i) =>
+            uploadFile(file, input.name, (fraction) => {
+                progress[i] = fraction;
+                render();
+            }).catch((err) => {
+                // Rejected files (type/size) are skipped, as the form always did
+                if (err.status && err.status < 500 && err.status !== 409) {
+                    line.textContent = `${file.name}: ${err.message}`;
+                    return null;
+                }
+                throw err;
+            })
+        );
+        const all = Promise.all(jobs).then((ids) => {
+            const ok = ids.filter(Boolean);
+            if (ok.length) line.textContent = `Uploaded ${ok.length} file${ok.length === 1 ? "" : "s"}`;
+            return ok;
+        });
+        uploadsByInput.set(input, all);
+        all.catch(() => {
+            line.textContent = "Upload failed — pick the file again to resume.";
+        });
+        if (files.length) render();
+    }
+
+    if (uploadUrl && window.fetch && window.Blob && Blob.prototype.slice) {
+        form.addEventListener("change", (e) => {
+            const input = e.target;
+            if (input.type === "file" && input.files.length) startUploads(input);
+        });
+
+        form.addEventListener("submit", async (e) => {
+            if (!uploadsByInput.size) return;
+            e.preventDefault();
+            const submitButton = form.querySelector("[type=submit]");
+            if (submitButton) submitButton.disabled = true;
+            try {
+                const groups = await Promise.all(uploadsByInput.values());
+                form.querySelectorAll("input[name='uploadIds[]']").forEach((el) => el.remove());
+                groups.flat().forEach((id) => {
+                    const hidden = document.createElement("input");
+                    hidden.type = "hidden";
+                    hidden.name = "uploadIds[]";
+                    hidden.value = id;
+                    form.appendChild(hidden);
+                });
+                // The bytes are already on the server; keep them out of the POST
+                uploadsByInput.forEach((_, input) => { input.disabled = true; });
+                form.submit();
+            } catch (err) {
+                if (submitButton) submitButton.disabled = false;
+                alert("Some files did not finish uploading. Please check your connection and try again.");
+            }
+        });
+    }
 });
@@ -0,0 +1,137 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import (  # noqa: E402
+    ADMIN_PASSWORD, ADMIN_USERNAME, PendingSubmission, Submission, create_app, db,
+    generate_public_id, init_db,
+)
+from config import Config  # noqa: E402
+
+# A complete form; intake_pdf.html splits the comma-separated fields
+FORM = {
+    "fullName": "Jane Doe",
+    "email": "jane@example.com",
+    "profession": "Developer",
+    "skills": "Python, SQL",
+    "brandKeywords": "calm, modern",
+    "colorPrefs": "navy",
+    "dontUseColors": "orange",
+    "projectTitle[]": ["Shop"],
+    "projectRole[]": ["Lead"],
+    "projectDesc[]": ["Storefront"],
+    "projectTech[]": ["React, Flask"],
+    "projectResults[]": [""],
+    "projectUrl[]": [""],
+    "pages[]": ["Home", "Blog"],
+    "features[]": ["SEO"],
+    "linkedin": "https://linkedin.example/jane",
+}
+
+
+def make_config(tmp_path, **overrides):
+    instance = tmp_path / "instance"
+    settings = {
+        "TESTING": True,
+        "SECRET_KEY": "test",
+        "SQLITE_PATH": str(instance / "test.db"),
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(instance / "test.db"),
+        "SQLITE_GROUP_COMMIT": False,
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+        "ARCHIVE_DIR": str(instance / "archive"),
+        "RENDER_CACHE_DIR": str(instance / "render_cache"),
+        "PDF_CACHE_DIR": str(instance / "pdf_cache"),
+        "PDF_BUNDLE_DIR": str(instance / "pdf_bundles"),
+        "ASSETS_DIR": str(instance / "assets"),
+        "TEMPLATE_CACHE_DIR": str(instance / "jinja_cache"),
+        "METRICS_ENABLED": False,
+        "METRICS_DIR": str(instance / "metrics"),
+        "PRODUCTION_RENDER": False,
+        "MAIL_SERVER": None,
+        "MAIL_OUTBOX_EMBEDDED": False,
+        "UPLOAD_COLLECT_INTERVAL": 0,
+        "PROXY_FIX_X_FOR": 0,
+    }
+    settings.update(overrides)
+    return type("TestConfig", (Config,), settings)
+
+
+@pytest.fixture
+def app_factory(tmp_path):
+    """``app_factory(**config)`` builds an app with its own database and directories."""
+    apps = []
+
+    def build(**overrides):
+        app = create_app(make_config(tmp_path, **overrides))
+        with app.app_context():
+            init_db()
+        apps.append(app)
+        return app
+
+    yield build
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(app_factory):
+    return app_factory()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_auth():
+    return (ADMIN_USERNAME, ADMIN_PASSWORD)
+
+
+def submit_and_verify(client, app, **fields):
+    """Post the form and enter the OTP; returns the verify response."""
+    data = dict(FORM, **fields)
+    response = client.post("/submit", data=data, content_type="multipart/form-data")
+    assert response.status_code == 302, response.data
+    with client.session_transaction() as session:
+        token = session["pending_token"]
+    with app.app_context():
+        otp = db.session.get(PendingSubmission, token).otp
+    return client.post("/verify-email", data={"otp": otp})
+
+
+def add_submission(**fields):
+    """Insert a Submission directly (inside an app context); returns it."""
+    values = {"public_id": generate_public_id(), "full_name": "Jane Doe", "email": "jane@example.com"}
+    values.update(fields)
+    submission = Submission(**values)
+    db.session.add(submission)
+    db.session.commit()
+    return submission
+
+
+class FakeMail:
+    """Stands in for Flask-Mail: records sent messages, or raises ``fail`` when set."""
+
+    def __init__(self):
+        self.sent = []
+        self.fail = None
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, msg):
+        if self.fail is not None:
+            raise self.fail
+        self.sent.append(msg)
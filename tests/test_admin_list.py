@@ -0,0 +1,51 @@
+import html
+import re
+from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlparse
+
+from conftest import add_submission
+
+BASE = datetime(2024, 5, 1, 12, 0)
+
+
+def listing(client, admin_auth, query=""):
+    page = client.get("/admin/submissions?per_page=2" + query, auth=admin_auth).data.decode()
+    ids = re.findall(r'<tr data-public-id="([^"]+)">', page)
+    links = {}
+    for href, _label in re.findall(r'<a href="([^"]+)" class="btn btn-\w+">([^<]+)</a>', page):
+        params = parse_qs(urlparse(html.unescape(href)).query)
+        for name in ("after", "before"):
+            if name in params:
+                links[name] = params[name][0]
+    return ids, links
+
+
+def test_keyset_pages_walk_forward_and_back(app, client, admin_auth):
+    with app.app_context():
+        # Two rows share a timestamp: the id breaks the tie
+        stamps = [BASE, BASE + timedelta(minutes=1), BASE + timedelta(minutes=1), BASE + timedelta(minutes=2), BASE + timedelta(minutes=3)]
+        expected = [add_submission(submitted_at=stamp).public_id for stamp in stamps][::-1]
+
+    pages, links = [], {}
+    query = ""
+    while True:
+        ids, links = listing(client, admin_auth, query)
+        pages.append(ids)
+        if "after" not in links:
+            break
+        query = "&after=" + links["after"]
+    assert pages == [expected[0:2], expected[2:4], expected[4:]]
+
+    # Back from the last page
+    ids, links = listing(client, admin_auth, "&before=" + links["before"])
+    assert ids == expected[2:4]
+    ids, links = listing(client, admin_auth, "&before=" + links["before"])
+    assert ids == expected[0:2]
+    assert "before" not in links
+
+
+def test_bad_cursor_shows_first_page(app, client, admin_auth):
+    with app.app_context():
+        newest = [add_submission(submitted_at=BASE + timedelta(minutes=i)).public_id for i in range(3)][::-1]
+    ids, _ = listing(client, admin_auth, "&after=not-a-cursor")
+    assert ids == newest[:2]
@@ -0,0 +1,99 @@
+import io
+import json
+import os
+import zipfile
+from datetime import datetime, timedelta
+
+import app as app_module
+import upload_refs
+from app import ArchivedSubmission, Submission, UploadReference, db
+from conftest import add_submission
+
+OLD = datetime(2020, 1, 1)
+
+
+def stored_file(body, name):
+    meta = app_module.uploads.save(io.BytesIO(body), name)
+    # Older than the grace period that protects files just written
+    past = (datetime.utcnow() - timedelta(seconds=2 * upload_refs.GRACE)).timestamp()
+    os.utime(app_module.uploads.path_for(meta["digest"]), (past, past))
+    return meta
+
+
+def test_archive_and_restore_round_trip(app, client, admin_auth):
+    with app.app_context():
+        shared = stored_file(b"%PDF-1.4 shared", "shared.pdf")
+        own = stored_file(b"%PDF-1.4 own", "own.pdf")
+        old = add_submission(full_name="Old Timer", submitted_at=OLD, files=[shared, own])
+        add_submission(full_name="Newcomer", files=[shared])
+        public_id = old.public_id
+
+        assert app_module.cold_storage.archive_batch(datetime(2021, 1, 1)) == 1
+        assert Submission.query.filter_by(public_id=public_id).first() is None
+        assert db.session.query(UploadReference).filter_by(digest=own["digest"]).count() == 0
+
+    # Only the file no other submission uses leaves the hot store
+    assert app_module.uploads.exists(shared["digest"])
+    assert not app_module.uploads.exists(own["digest"])
+
+    page = client.get(f"/admin/submission/{public_id}", auth=admin_auth)
+    assert page.status_code == 200
+    assert b"Archived" in page.data and b"Old Timer" in page.data
+
+    with app.app_context():
+        restored = app_module.cold_storage.restore(public_id)
+        assert restored.submitted_at == OLD
+        assert restored.files == [shared, own]
+        assert ArchivedSubmission.query.count() == 0
+        owners = {r.owner for r in db.session.query(UploadReference).filter_by(digest=own["digest"])}
+        assert owners == {f"submission:{restored.id}"}
+    assert app_module.uploads.exists(own["digest"])
+
+
+def test_pending_reference_keeps_archived_file(app):
+    with app.app_context():
+        meta = stored_file(b"%PDF-1.4 pending", "p.pdf")
+        add_submission(submitted_at=OLD, files=[meta])
+        app_module.upload_references.hold("pending:abc", [meta], datetime.utcnow() + timedelta(minutes=10))
+        app_module.cold_storage.archive_batch(datetime(2021, 1, 1))
+    assert app_module.uploads.exists(meta["digest"])
+
+
+def test_bundle_reports_unreadable_archive(app, client, admin_auth):
+    with app.app_context():
+        public_id = add_submission(submitted_at=OLD).public_id
+        app_module.cold_storage.archive_batch(datetime(2021, 1, 1))
+        archive = ArchivedSubmission.query.one().archive
+    os.unlink(os.path.join(app.config["ARCHIVE_DIR"], archive))
+
+    response = client.post(
+        "/admin/pdf-bundle", data={"since": "2019-01-01", "until": "2021-01-01"}, auth=admin_auth
+    )
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.data)) as bundle:
+        manifest = json.loads(bundle.read("manifest.json"))
+    assert manifest["files"] == {public_id: "not found"}
+    assert client.get(f"/admin/submission/{public_id}", auth=admin_auth).status_code == 404
+
+
+def test_legacy_filename_rows_round_trip(app):
+    # Rows from before the upload store list bare filenames under UPLOAD_FOLDER
+    legacy_path = os.path.join(app.config["UPLOAD_FOLDER"], "20200101_120000_brief.pdf")
+    with open(legacy_path, "wb") as fh:
+        fh.write(b"%PDF-1.4 legacy")
+    with app.app_context():
+        public_id = add_submission(submitted_at=OLD, files=["20200101_120000_brief.pdf", "gone.pdf"]).public_id
+        assert app_module.cold_storage.archive_batch(datetime(2021, 1, 1)) == 1
+        (name,) = os.listdir(app.config["ARCHIVE_DIR"])
+
+    with zipfile.ZipFile(os.path.join(app.config["ARCHIVE_DIR"], name)) as bundle:
+        assert bundle.read("files/legacy/20200101_120000_brief.pdf") == b"%PDF-1.4 legacy"
+    # Left in place: nothing records who else uses it
+    assert os.path.exists(legacy_path)
+
+    os.unlink(legacy_path)
+    with app.app_context():
+        restored = app_module.cold_storage.restore(public_id)
+        assert restored.files == ["20200101_120000_brief.pdf", "gone.pdf"]
+    with open(legacy_path, "rb") as fh:
+        assert fh.read() == b"%PDF-1.4 legacy"
@@ -0,0 +1,62 @@
+import gzip
+import os
+import types
+
+import pytest
+
+import assets
+
+
+def make_source(tmp_path):
+    source = tmp_path / "static"
+    (source / "css").mkdir(parents=True)
+    (source / "css" / "site.css").write_text("body { color: navy; }\n" * 50)
+    (source / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\nxxxx")
+    return source
+
+
+def test_build_fingerprints_and_compresses(tmp_path):
+    output = tmp_path / "built"
+    manifest = assets.build(str(make_source(tmp_path)), str(output))
+
+    css = output / manifest["css/site.css"]
+    assert css.exists()
+    assert gzip.decompress((output / (manifest["css/site.css"] + ".gz")).read_bytes()) == css.read_bytes()
+    assert not (output / (manifest["logo.png"] + ".gz")).exists()
+
+
+def test_rebuild_restores_missing_variants(tmp_path, monkeypatch):
+    source, output = make_source(tmp_path), tmp_path / "built"
+    monkeypatch.setattr(assets, "brotli", None)
+    manifest = assets.build(str(source), str(output))
+    css = str(output / manifest["css/site.css"])
+    os.unlink(css + ".gz")
+
+    # brotli installed after the first build
+    monkeypatch.setattr(assets, "brotli", types.SimpleNamespace(compress=lambda body, quality: b"br:" + body))
+    assert assets.build(str(source), str(output)) == manifest
+    assert os.path.exists(css + ".gz")
+    with open(css + ".br", "rb") as fh:
+        assert fh.read().startswith(b"br:")
+
+
+def test_serve_negotiates_precompressed_variant(app, client):
+    with app.app_context():
+        manifest = app.extensions["assets"].build()
+    url = "/assets/" + manifest["css/style.css"]
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    assert client.get(url + ".gz").status_code == 404
+
+
+def test_build_writes_brotli_variant(tmp_path):
+    brotli = pytest.importorskip("brotli")
+    output = tmp_path / "built"
+    manifest = assets.build(str(make_source(tmp_path)), str(output))
+    css = output / manifest["css/site.css"]
+    assert brotli.decompress((output / (manifest["css/site.css"] + ".br")).read_bytes()) == css.read_bytes()
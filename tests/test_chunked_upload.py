@@ -0,0 +1,166 @@
+import io
+import os
+import threading
+from datetime import datetime, timedelta
+
+import app as app_module
+import upload_refs
+from app import UploadReference, db
+from conftest import FORM, add_submission, submit_and_verify
+
+BODY = b"%PDF-1.4\n" + os.urandom(2500)
+
+
+def open_upload(client, body=BODY, name="brief.pdf"):
+    response = client.post("/uploads", json={"filename": name, "size": len(body), "field": "brandAssets"})
+    assert response.status_code == 201, response.data
+    return response.get_json()
+
+
+def put_chunks(client, state, body=BODY, indexes=None):
+    size = state["chunkSize"]
+    for index in range(state["chunks"]) if indexes is None else indexes:
+        chunk = body[index * size:(index + 1) * size]
+        response = client.put(f"/uploads/{state['id']}/chunks/{index}", data=chunk)
+        assert response.status_code == 204, response.data
+
+
+def test_resume_sends_only_missing_chunks(app_factory):
+    app = app_factory(UPLOAD_CHUNK_SIZE=1024)
+    client = app.test_client()
+    state = open_upload(client)
+    assert state["chunks"] == 3
+
+    put_chunks(client, state, indexes=[0, 2])
+    status = client.get(f"/uploads/{state['id']}").get_json()
+    assert status["received"] == [0, 2] and not status["complete"]
+    assert client.post(f"/uploads/{state['id']}/complete").status_code == 409
+
+    put_chunks(client, state, indexes=[1])
+    done = client.post(f"/uploads/{state['id']}/complete")
+    assert done.status_code == 200
+    assert done.get_json()["type"] == "application/pdf"
+    # Completing again returns the same result
+    assert client.post(f"/uploads/{state['id']}/complete").get_json() == done.get_json()
+
+    digest = app_module.chunked_uploads.result(state["id"])["digest"]
+    with open(app_module.uploads.path_for(digest), "rb") as fh:
+        assert fh.read() == BODY
+
+
+def test_concurrent_completes_assemble_once(app_factory, monkeypatch):
+    app = app_factory(UPLOAD_CHUNK_SIZE=1024)
+    client = app.test_client()
+    state = open_upload(client)
+    put_chunks(client, state)
+
+    entered, release = threading.Event(), threading.Event()
+    assemble = app_module.chunked_uploads._assemble
+
+    def slow_assemble(*args):
+        entered.set()
+        release.wait(5)
+        return assemble(*args)
+
+    monkeypatch.setattr(app_module.chunked_uploads, "_assemble", slow_assemble)
+    results = {}
+    first = threading.Thread(
+        target=lambda: results.setdefault("first", app.test_client().post(f"/uploads/{state['id']}/complete"))
+    )
+    first.start()
+    assert entered.wait(5)
+
+    # The double click while the first request is still assembling
+    assert client.post(f"/uploads/{state['id']}/complete").status_code == 409
+    release.set()
+    first.join(5)
+    assert results["first"].status_code == 200
+    assert client.post(f"/uploads/{state['id']}/complete").get_json() == results["first"].get_json()
+
+
+def test_unsubmitted_upload_is_collected_after_ttl(app_factory):
+    app = app_factory(UPLOAD_CHUNK_SIZE=1024)
+    client = app.test_client()
+    kept, dropped = open_upload(client), open_upload(client, b"%PDF-1.4 other", "other.pdf")
+    put_chunks(client, kept)
+    put_chunks(client, dropped, b"%PDF-1.4 other")
+    client.post(f"/uploads/{kept['id']}/complete")
+    client.post(f"/uploads/{dropped['id']}/complete")
+    kept_digest = app_module.chunked_uploads.result(kept["id"])["digest"]
+    dropped_digest = app_module.chunked_uploads.result(dropped["id"])["digest"]
+
+    assert submit_and_verify(client, app, **{"uploadIds[]": [kept["id"]]}).status_code == 302
+
+    # A day later, past the upload TTL and the grace for fresh files
+    later = datetime.utcnow() + timedelta(seconds=app.config["UPLOAD_SESSION_TTL"] + 1)
+    past = (datetime.utcnow() - timedelta(seconds=2 * upload_refs.GRACE)).timestamp()
+    for digest in (kept_digest, dropped_digest):
+        os.utime(app_module.uploads.path_for(digest), (past, past))
+    with app.app_context():
+        app_module.upload_references.collect(now=later)
+        owners = {row.owner for row in db.session.query(UploadReference)}
+
+    assert app_module.uploads.exists(kept_digest)
+    assert not app_module.uploads.exists(dropped_digest)
+    assert all(owner.startswith("submission:") for owner in owners)
+
+
+def test_fresh_files_survive_collection(app):
+    with app.app_context():
+        digest = app_module.uploads.save(io.BytesIO(b"%PDF-1.4 fresh"), "fresh.pdf")["digest"]
+        app_module.upload_references.hold("upload:x", [{"digest": digest}], datetime.utcnow())
+        app_module.upload_references.collect(now=datetime.utcnow() + timedelta(seconds=1))
+        # Written moments ago: left for a later pass, reference kept for it
+        assert app_module.uploads.exists(digest)
+        assert db.session.query(UploadReference).count() == 1
+
+
+def test_chunk_puts_are_rate_limited(app_factory):
+    app = app_factory(UPLOAD_CHUNK_SIZE=1024, RATELIMIT_UPLOAD_CHUNK_IP="2/hour")
+    client = app.test_client()
+    state = open_upload(client)
+    put_chunks(client, state, indexes=[0, 1])
+    response = client.put(f"/uploads/{state['id']}/chunks/2", data=BODY[2048:])
+    assert response.status_code == 429
+    assert response.get_json()["error"]
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_form_posted_files_are_held_while_pending(app, client):
+    data = dict(FORM, brandAssets=(io.BytesIO(b"%PDF-1.4 notes"), "notes.pdf"))
+    assert client.post("/submit", data=data, content_type="multipart/form-data").status_code == 302
+    with app.app_context():
+        (reference,) = db.session.query(UploadReference).all()
+    assert reference.owner.startswith("pending:")
+    assert reference.expires_at > datetime.utcnow()
+
+
+def test_legacy_filename_rows_are_skipped(app):
+    # Rows written before the upload store list bare filenames
+    with app.app_context():
+        digest = app_module.uploads.save(io.BytesIO(b"%PDF-1.4 new"), "new.pdf")["digest"]
+        submission_id = add_submission(files=["20200101_120000_brief.pdf", {"digest": digest}]).id
+        UploadReference.__table__.drop(db.engine)
+        app_module.init_db()
+        owners = {(row.digest, row.owner) for row in db.session.query(UploadReference)}
+    assert owners == {(digest, f"submission:{submission_id}")}
+
+
+def test_requests_never_run_collection(app, client, monkeypatch):
+    def broken_collect(now=None):
+        raise OSError("disk went away")
+
+    monkeypatch.setattr(app_module.upload_references, "collect", broken_collect)
+    open_upload(client)
+    assert client.post("/submit", data=FORM, content_type="multipart/form-data").status_code == 302
+    # The background pass logs the error instead of raising it
+    with app.app_context():
+        app_module.chunked_uploads.collect()
+
+
+def test_background_collector_runs_per_process(app_factory, monkeypatch):
+    app = app_factory(UPLOAD_COLLECT_INTERVAL=0.05)
+    ran = threading.Event()
+    monkeypatch.setattr(app_module.chunked_uploads, "purge_expired", lambda now=None: ran.set())
+    open_upload(app.test_client())
+    assert ran.wait(5)
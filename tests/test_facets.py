@@ -0,0 +1,35 @@
+import facets
+from app import FACET_MODELS, SubmissionItem, db, init_db
+from conftest import add_submission
+
+
+def test_rows_are_lowercased():
+    rows = facets.rows_for(1, [{"title": "Shop", "tech": "React, Node/Express"}], {}, ["Home", "Blog", "blog"], ["SEO"])
+    assert [row["tech"] for row in rows["tech"]] == ["react", "node", "express"]
+    assert [(row["kind"], row["value"]) for row in rows["items"]] == [
+        ("page", "home"), ("page", "blog"), ("feature", "seo"),
+    ]
+
+
+def test_filters_ignore_case(app, client, admin_auth):
+    with app.app_context():
+        add_submission(full_name="Blogger", pages=["Blog"], features=["Newsletter"],
+                       projects=[{"title": "Site", "tech": "React"}])
+        add_submission(full_name="Shopkeeper", pages=["Shop"])
+
+    for query in ("page=blog", "page=BLOG", "feature=newsletter", "tech=REACT"):
+        page = client.get(f"/admin/submissions?{query}", auth=admin_auth).get_data(as_text=True)
+        assert "Blogger" in page and "Shopkeeper" not in page, query
+
+
+def test_init_db_lowercases_existing_items(app):
+    with app.app_context():
+        submission = add_submission(pages=["Blog"])
+        # As written before values were normalized
+        db.session.query(SubmissionItem).update({"value": "Blog"})
+        db.session.commit()
+        assert facets.needs_rebuild(db.session, FACET_MODELS)
+
+        init_db()
+        assert not facets.needs_rebuild(db.session, FACET_MODELS)
+        assert db.session.query(SubmissionItem.value).filter_by(submission_id=submission.id).scalar() == "blog"
@@ -0,0 +1,85 @@
+import threading
+
+import pytest
+from sqlalchemy import Column, Integer, create_engine, select
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from group_commit import GroupCommitter
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Integer, primary_key=True)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'gc.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def stored_ids(engine):
+    with engine.connect() as connection:
+        return sorted(connection.execute(select(Row.id)).scalars())
+
+
+class GatedSessions:
+    """Session factory whose first commit waits until ``release`` is set."""
+
+    def __init__(self, engine):
+        self.factory = sessionmaker(bind=engine, expire_on_commit=False)
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.first = True
+
+    def __call__(self):
+        session = self.factory()
+        if self.first:
+            self.first = False
+            commit = session.commit
+
+            def gated_commit():
+                self.entered.set()
+                self.release.wait(5)
+                commit()
+
+            session.commit = gated_commit
+        return session
+
+
+def test_commit_writes_rows(engine):
+    committer = GroupCommitter(sessionmaker(bind=engine, expire_on_commit=False))
+    committer.commit(add=[Row(id=1)])
+    committer.commit(add=[Row(id=2)], delete=[(Row, 1)])
+    assert stored_ids(engine) == [2]
+
+
+def test_timed_out_job_is_never_written(engine):
+    sessions = GatedSessions(engine)
+    committer = GroupCommitter(sessions, max_delay=0)
+    blocker = threading.Thread(target=committer.commit, kwargs={"add": [Row(id=1)]})
+    blocker.start()
+    assert sessions.entered.wait(5)
+
+    # The writer is stuck on the first batch, so this job is still queued
+    with pytest.raises(TimeoutError):
+        committer.commit(add=[Row(id=2)], timeout=0.05)
+
+    sessions.release.set()
+    blocker.join(5)
+    committer.commit(add=[Row(id=3)])
+    assert stored_ids(engine) == [1, 3]
+
+
+def test_timeout_after_pickup_waits_for_the_outcome(engine):
+    sessions = GatedSessions(engine)
+    committer = GroupCommitter(sessions, max_delay=0)
+    threading.Timer(0.2, sessions.release.set).start()
+
+    # Times out while its own batch is being written: reports success, not failure
+    committer.commit(add=[Row(id=1)], timeout=0.05)
+    assert stored_ids(engine) == [1]
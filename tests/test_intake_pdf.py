@@ -0,0 +1,39 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import app as app_module
+from conftest import submit_and_verify
+
+
+def public_id_of(response):
+    return response.location.rstrip("/").rsplit("/", 1)[-1]
+
+
+def test_intake_page_is_cached_with_etag(app, client):
+    public_id = public_id_of(submit_and_verify(client, app))
+
+    first = client.get(f"/intake-pdf/{public_id}")
+    assert first.status_code == 200
+    assert first.headers["ETag"]
+    assert b"Jane Doe" in first.data
+
+    again = client.get(f"/intake-pdf/{public_id}", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert app_module.render_cache.get(public_id).etag == first.headers["ETag"].strip('"')
+
+
+def test_intake_page_unknown_id(client):
+    assert client.get("/intake-pdf/NOPE1234").status_code == 404
+
+
+def test_download_reports_failed_render_as_503(app, client, monkeypatch):
+    public_id = public_id_of(submit_and_verify(client, app))
+    failed = Future()
+    failed.set_exception(BrokenProcessPool("worker died"))
+    monkeypatch.setattr(app_module.pdf_pool, "path_for", lambda _: str(app.instance_path) + "/missing.pdf")
+    monkeypatch.setattr(app_module.pdf_pool, "ensure", lambda *args: failed)
+
+    response = client.get(f"/intake-pdf/{public_id}/download")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
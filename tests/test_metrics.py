@@ -0,0 +1,24 @@
+import glob
+import os
+
+import msgspec
+
+import app as app_module
+from conftest import FakeMail
+
+
+def test_mail_worker_writes_its_snapshot(app_factory, tmp_path, monkeypatch):
+    metrics_dir = str(tmp_path / "metrics")
+    app = app_factory(METRICS_DIR=metrics_dir, METRICS_FLUSH_INTERVAL=0)
+    monkeypatch.setattr(app_module.outbox, "_mail", FakeMail())
+    with app.app_context():
+        app_module.outbox.enqueue(recipient="a@example.com", subject="Code", body="123456")
+
+    # `flask mail-worker --once`: no request ever runs in this process
+    result = app.test_cli_runner().invoke(args=["mail-worker", "--once"])
+    assert "Sent 1 message(s)." in result.output
+    (path,) = glob.glob(os.path.join(metrics_dir, "worker-*.json"))
+    with open(path, "rb") as fh:
+        snapshot = msgspec.json.decode(fh.read())
+    ((labels, data),) = snapshot["intake_mail_send_duration_seconds"]
+    assert labels == ["sent"] and sum(data[:-1]) == 1
@@ -0,0 +1,87 @@
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+import outbox
+from app import OutboxMessage, db
+from conftest import FakeMail
+
+
+@pytest.fixture
+def mail(monkeypatch):
+    fake = FakeMail()
+    monkeypatch.setattr(app_module.outbox, "_mail", fake)
+    return fake
+
+
+def enqueue(subject="Code"):
+    return app_module.outbox.enqueue(recipient="a@example.com", subject=subject, body="123456").id
+
+
+def make_due(message_id):
+    db.session.get(OutboxMessage, message_id).next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_failures_back_off_then_give_up(app_factory, mail):
+    app = app_factory(MAIL_OUTBOX_BACKOFF_BASE=30, MAIL_OUTBOX_BACKOFF_MAX=100, MAIL_OUTBOX_MAX_ATTEMPTS=4)
+    mail.fail = smtplib.SMTPRecipientsRefused({})
+    with app.app_context():
+        message_id = enqueue()
+        delays = []
+        for _ in range(3):
+            started = datetime.utcnow()
+            assert app_module.outbox.drain() == 0
+            message = db.session.get(OutboxMessage, message_id)
+            assert message.status == outbox.STATUS_PENDING and message.last_error
+            delays.append(round((message.next_attempt_at - started).total_seconds()))
+            # Not due yet: a drain now leaves it alone
+            assert app_module.outbox.drain() == 0
+            assert db.session.get(OutboxMessage, message_id).attempts == len(delays)
+            make_due(message_id)
+        assert delays == [30, 60, 100]
+
+        app_module.outbox.drain()
+        message = db.session.get(OutboxMessage, message_id)
+        assert (message.status, message.attempts) == (outbox.STATUS_FAILED, 4)
+
+
+def test_retry_succeeds_and_clears_the_error(app, mail):
+    with app.app_context():
+        message_id = enqueue()
+        mail.fail = ConnectionRefusedError("smtp down")
+        app_module.outbox.drain()
+        make_due(message_id)
+        mail.fail = None
+        assert app_module.outbox.drain() == 1
+        message = db.session.get(OutboxMessage, message_id)
+        assert (message.status, message.attempts, message.last_error) == (outbox.STATUS_SENT, 2, None)
+        assert message.sent_at is not None
+    assert [msg.subject for msg in mail.sent] == ["Code"]
+
+
+def test_claimed_rows_are_leased(app_factory, mail):
+    app = app_factory(MAIL_OUTBOX_LEASE=300)
+    with app.app_context():
+        message_id = enqueue()
+        (claimed,) = app_module.outbox._claim_batch()
+        assert claimed.status == outbox.STATUS_SENDING
+        # Another sender finds nothing while the lease holds
+        assert app_module.outbox._claim_batch() == []
+        assert app_module.outbox.drain() == 0
+
+        # A sender that died mid-send: the lease runs out and the row is sent again
+        db.session.get(OutboxMessage, message_id).claimed_at = datetime.utcnow() - timedelta(seconds=301)
+        db.session.commit()
+        assert app_module.outbox.drain() == 1
+    assert len(mail.sent) == 1
+
+
+def test_claim_takes_due_rows_in_order_up_to_batch(app_factory, mail):
+    app = app_factory(MAIL_OUTBOX_BATCH_SIZE=2)
+    with app.app_context():
+        first, second, third = enqueue("1"), enqueue("2"), enqueue("3")
+        assert [m.id for m in app_module.outbox._claim_batch()] == [first, second]
+        assert [m.id for m in app_module.outbox._claim_batch()] == [third]
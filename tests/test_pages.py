@@ -0,0 +1,64 @@
+import app as app_module
+
+
+def count_renders(monkeypatch):
+    calls = []
+    render = app_module.render_template
+
+    def counting(name, **context):
+        calls.append(name)
+        return render(name, **context)
+
+    monkeypatch.setattr(app_module, "render_template", counting)
+    return calls
+
+
+def test_static_page_renders_once_and_revalidates(app_factory, monkeypatch):
+    app = app_factory(PRODUCTION_RENDER=True, RELEASE_VERSION="r1")
+    client = app.test_client()
+    calls = count_renders(monkeypatch)
+
+    first = client.get("/")
+    assert first.status_code == 200 and first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    second = client.get("/")
+    assert second.data == first.data
+    assert calls == ["intake_form.html"]
+
+    again = client.get("/", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.data == b""
+
+    # URL arguments are part of the key
+    client.get("/thank-you/ABC")
+    client.get("/thank-you/XYZ")
+    assert calls.count("thank_you.html") == 2
+
+
+def test_flashed_messages_bypass_the_cache(app_factory):
+    app = app_factory(PRODUCTION_RENDER=True, RELEASE_VERSION="r1")
+    client = app.test_client()
+    cached = client.get("/")
+
+    with client.session_transaction() as session:
+        session["_flashes"] = [("danger", "Something went wrong")]
+    flashed = client.get("/", headers={"If-None-Match": cached.headers["ETag"]})
+    assert flashed.status_code == 200
+    assert b"Something went wrong" in flashed.data
+    # The shared copy never saw the message
+    assert b"Something went wrong" not in client.get("/").data
+
+
+def test_pages_over_the_byte_cap_are_not_kept(app_factory, monkeypatch):
+    app = app_factory(PRODUCTION_RENDER=True, RELEASE_VERSION="r1", PAGE_CACHE_MAX_BYTES=100)
+    client = app.test_client()
+    calls = count_renders(monkeypatch)
+    client.get("/")
+    client.get("/")
+    assert calls == ["intake_form.html"] * 2
+
+
+def test_cache_is_off_in_development(app, client, monkeypatch):
+    calls = count_renders(monkeypatch)
+    client.get("/")
+    client.get("/")
+    assert len(calls) == 2
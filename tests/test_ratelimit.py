@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+import ratelimit
+from conftest import FORM
+from ratelimit import Rate, parse_rate
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "time", clock)
+    return clock
+
+
+def test_parse_rate():
+    assert parse_rate("10/hour") == Rate(10, 10 / 3600)
+    assert parse_rate("3/60") == Rate(3, 0.05)
+    assert parse_rate("5/0") == Rate(5, 0.0)
+    with pytest.raises(ValueError):
+        parse_rate("5/fortnight")
+
+
+def test_bucket_spends_and_refills(app, clock):
+    limiter = app_module.limiter
+    with app.app_context():
+        assert [limiter.hit("k", "3/60")[0] for _ in range(3)] == [True] * 3
+        # Empty: one token comes back every 20 seconds
+        assert limiter.hit("k", "3/60") == (False, 20)
+        clock.now += 15
+        assert limiter.hit("k", "3/60") == (False, 5)
+        clock.now += 5
+        assert limiter.hit("k", "3/60") == (True, 0)
+        # Refill is capped at capacity
+        clock.now += 3600
+        assert [limiter.hit("k", "3/60")[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_attempt_cap_never_refills(app, clock):
+    limiter = app_module.limiter
+    with app.app_context():
+        assert limiter.hit("cap", "2/0")[0] and limiter.hit("cap", "2/0")[0]
+        clock.now += 10 ** 6
+        assert limiter.hit("cap", "2/0") == (False, None)
+
+
+def test_peek_spends_nothing(app, clock):
+    limiter = app_module.limiter
+    with app.app_context():
+        assert limiter.peek("p", "1/60") == (True, 0)
+        assert limiter.peek("p", "1/60") == (True, 0)
+        limiter.hit("p", "1/60")
+        assert limiter.peek("p", "1/60") == (False, 60)
+
+
+def submit(client):
+    return client.post("/submit", data=FORM, content_type="multipart/form-data")
+
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return [message for _, message in session.pop("_flashes", [])]
+
+
+def test_failed_enqueue_does_not_start_the_cooldown(app, client, monkeypatch):
+    def broken_enqueue(**kwargs):
+        raise RuntimeError("mail table locked")
+
+    monkeypatch.setattr(app_module.outbox, "enqueue", broken_enqueue)
+    submit(client)
+    assert "Failed to send verification email" in flashes(client)[0]
+
+    monkeypatch.undo()
+    submit(client)
+    assert flashes(client)[0].startswith("Verification code sent")
+
+
+def test_cooldown_and_address_limit_have_their_own_messages(app_factory):
+    app = app_factory(OTP_RESEND_COOLDOWN=60, RATELIMIT_SUBMIT_EMAIL="2/hour")
+    client = app.test_client()
+    submit(client)
+    flashes(client)
+    submit(client)
+    assert "already sent" in flashes(client)[0]
+
+    app.config["OTP_RESEND_COOLDOWN"] = 0
+    submit(client)
+    flashes(client)
+    submit(client)
+    assert "Too many submissions" in flashes(client)[0]
+
+
+def test_zero_cooldown_is_off(app_factory):
+    app = app_factory(OTP_RESEND_COOLDOWN=0, RATELIMIT_SUBMIT_EMAIL="10/hour")
+    client = app.test_client()
+    for _ in range(3):
+        submit(client)
+        assert flashes(client)[0].startswith("Verification code sent")
+
+
+def test_concurrent_submits_queue_one_code(app_factory, monkeypatch):
+    app = app_factory(OTP_RESEND_COOLDOWN=60, RATELIMIT_SUBMIT_IP="100/hour")
+    enqueue = app_module.outbox.enqueue
+    queued = []
+
+    def slow_enqueue(**kwargs):
+        time.sleep(0.3)  # widens the gap a peek-then-spend check would lose
+        queued.append(kwargs["recipient"])
+        return enqueue(**kwargs)
+
+    monkeypatch.setattr(app_module.outbox, "enqueue", slow_enqueue)
+    threads = [threading.Thread(target=lambda: submit(app.test_client())) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert queued == [FORM["email"]]
+
+
+def test_refund_returns_the_token(app, clock):
+    limiter = app_module.limiter
+    with app.app_context():
+        assert limiter.hit("r", "1/60") == (True, 0)
+        limiter.refund("r")
+        assert limiter.hit("r", "1/60") == (True, 0)
+        assert limiter.hit("r", "1/60") == (False, 60)
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import rollups
+from app import Submission, SubmissionRollup, db
+from conftest import add_submission
+
+TODAY = datetime(2024, 6, 10, 9, 30)
+
+
+def counters():
+    rows = db.session.query(SubmissionRollup.dimension, SubmissionRollup.bucket, SubmissionRollup.count)
+    return {(dimension, bucket): count for dimension, bucket, count in rows if count}
+
+
+def seed():
+    add_submission(submitted_at=TODAY, profession="Designer", budget_range="1-5k",
+                   pages=["Home", "Blog", "Home"], features=["seo"])
+    add_submission(submitted_at=TODAY - timedelta(days=1), profession="Designer", industry="Retail",
+                   pages=["Home"], features=["seo", "blog"])
+    add_submission(submitted_at=TODAY - timedelta(days=3), profession=None, pages=None)
+    add_submission(submitted_at=TODAY, profession="Developer", features=["shop"])
+
+
+def test_incremental_counters_match_rebuild(app):
+    with app.app_context():
+        seed()
+        for submission in Submission.query.filter_by(profession="Developer"):
+            db.session.delete(submission)
+        db.session.delete(Submission.query.filter_by(industry="Retail").one())
+        db.session.commit()
+        incremental = counters()
+
+        assert rollups.rebuild(db.session, SubmissionRollup, Submission) == 2
+        assert counters() == incremental
+        assert incremental[(rollups.TOTAL, "")] == 2
+        # A page listed twice on one submission counts once
+        assert incremental[("page", "Home")] == 1
+        assert ("feature", "shop") not in incremental
+
+
+def test_rolled_back_insert_leaves_counters_alone(app):
+    with app.app_context():
+        seed()
+        before = counters()
+        db.session.add(Submission(public_id="ROLLBACK", submitted_at=TODAY, profession="Designer"))
+        db.session.flush()
+        db.session.rollback()
+        assert counters() == before
+
+
+def test_dashboard_reads(app):
+    with app.app_context():
+        seed()
+        assert rollups.totals(db.session, SubmissionRollup, today=TODAY) == {"total": 4, "active": 4, "today": 2}
+        assert rollups.breakdown(db.session, SubmissionRollup, "profession", limit=2) == [
+            ("Designer", 2), ("", 1),
+        ]
+        days = rollups.daily(db.session, SubmissionRollup, days=4, today=TODAY)
+        assert days == [("2024-06-07", 1), ("2024-06-08", 0), ("2024-06-09", 1), ("2024-06-10", 2)]
@@ -0,0 +1,65 @@
+from datetime import date
+
+import msgspec
+import pytest
+from werkzeug.datastructures import MultiDict
+
+import schema
+from app import Submission
+
+
+def form(**fields):
+    data = MultiDict({"email": "jane@example.com", "fullName": "Jane Doe"})
+    for key, value in fields.items():
+        if isinstance(value, list):
+            data.setlist(key, value)
+        else:
+            data[key] = value
+    return data
+
+
+def test_from_form_maps_nested_inputs():
+    payload = schema.from_form(form(**{
+        "budgetRange": "1-5k",
+        "deadline": "2024-07-01",
+        "linkedin": "https://linkedin.example/jane",
+        "otherSocial": "https://mastodon.example/@jane",
+        "ongoingSupport": "yes",
+        "pages[]": ["Home", "Blog"],
+        "projectTitle[]": ["Shop", "  ", "Blog"],
+        "projectRole[]": ["Lead", "ignored"],
+        "projectTech[]": ["React", "", "Hugo"],
+        "unknownField": "dropped",
+    }))
+    assert payload.full_name == "Jane Doe"
+    assert payload.budget_range == "1-5k"
+    assert payload.deadline == date(2024, 7, 1)
+    assert payload.social_links.other == "https://mastodon.example/@jane"
+    assert payload.technical_prefs.ongoing_support == "yes"
+    assert payload.pages == ["Home", "Blog"]
+    # Blank titles drop their row; shorter columns are padded
+    assert [(p.title, p.role, p.tech) for p in payload.projects] == [("Shop", "Lead", "React"), ("Blog", "", "Hugo")]
+
+
+def test_from_form_defaults_and_rejects_bad_values():
+    payload = schema.from_form(form(deadline=""))
+    assert payload.deadline is None and payload.projects == [] and payload.features == []
+    with pytest.raises(msgspec.ValidationError):
+        schema.from_form(form(deadline="next week"))
+    with pytest.raises(msgspec.ValidationError):
+        schema.from_form(MultiDict({"fullName": "No Email"}))
+
+
+def test_model_kwargs_and_pdf_data_round_trip():
+    payload = schema.from_form(form(**{"projectTitle[]": ["Shop"], "github": "gh", "deadline": "2024-07-01"}))
+    schema.attach_files(payload, [{"name": "a.pdf", "digest": "ab" * 32, "size": 3, "type": "application/pdf"}])
+    kwargs = payload.model_kwargs()
+    assert kwargs["projects"][0]["title"] == "Shop"
+    assert kwargs["social_links"]["github"] == "gh"
+    assert kwargs["files"][0]["digest"] == "ab" * 32
+    assert set(kwargs) <= {column.key for column in Submission.__table__.columns}
+
+    data = schema.pdf_data(Submission(**kwargs))
+    assert data["fullName"] == "Jane Doe"
+    assert data["deadline"] == "2024-07-01"
+    assert data["socialLinks"]["github"] == "gh"
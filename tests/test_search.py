@@ -0,0 +1,67 @@
+import app as app_module
+import search
+from app import PendingSubmission, Submission, db
+from conftest import FORM, add_submission
+
+
+def names(response):
+    page = response.get_data(as_text=True)
+    return {name for name in ("Ada Lovelace", "Grace Hopper", "Alan Turing") if name in page}
+
+
+def seed(app):
+    with app.app_context():
+        add_submission(full_name="Ada Lovelace", skills="analytical engines, python")
+        add_submission(full_name="Grace Hopper", skills="compilers, COBOL")
+        add_submission(full_name="Alan Turing", skills="python_scripts")
+
+
+def test_fts_search(app, client, admin_auth):
+    seed(app)
+    response = client.get("/admin/search?q=pyth", auth=admin_auth)
+    assert names(response) == {"Ada Lovelace", "Alan Turing"}
+    assert b"No full-text index" not in response.data
+
+
+def test_substring_fallback_without_fts(app, client, admin_auth, monkeypatch):
+    seed(app)
+    monkeypatch.setattr(search, "is_supported", lambda bind: False)
+
+    response = client.get("/admin/search?q=Grace+compilers", auth=admin_auth)
+    assert names(response) == {"Grace Hopper"}
+    assert b"No full-text index" in response.data
+    # "_" is matched literally, not as a wildcard
+    assert names(client.get("/admin/search?q=python_", auth=admin_auth)) == {"Alan Turing"}
+    assert names(client.get("/admin/search?q=PYTHON", auth=admin_auth)) == {"Ada Lovelace", "Alan Turing"}
+
+
+def test_substring_ids_newest_first(app):
+    seed(app)
+    with app.app_context():
+        ids = search.substring_ids(db.session, Submission, "python")
+        assert ids == sorted(ids, reverse=True) and len(ids) == 2
+
+
+def test_failed_pending_write_is_reported(app, client, monkeypatch):
+    def broken_put(*args):
+        raise RuntimeError("Data too long for column 'payload'")
+
+    monkeypatch.setattr(app_module.pending, "put", broken_put)
+    response = client.post("/submit", data=FORM, content_type="multipart/form-data")
+    assert response.status_code == 302 and response.location.endswith("/")
+    with client.session_transaction() as session:
+        assert "pending_token" not in session
+        assert "could not be saved" in session["_flashes"][0][1]
+    with app.app_context():
+        assert PendingSubmission.query.count() == 0
+
+
+def test_init_db_indexes_existing_rows(app, client, admin_auth):
+    seed(app)
+    # A database from before the search index
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(f"DROP TABLE {search.FTS_TABLE}")
+        app_module.init_db()
+    response = client.get("/admin/search?q=pyth", auth=admin_auth)
+    assert names(response) == {"Ada Lovelace", "Alan Turing"}
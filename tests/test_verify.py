@@ -0,0 +1,27 @@
+from app import PendingSubmission, Submission, db
+from conftest import FORM
+
+
+def start(client, app):
+    client.post("/submit", data=FORM, content_type="multipart/form-data")
+    with client.session_transaction() as session:
+        token = session["pending_token"]
+    with app.app_context():
+        return db.session.get(PendingSubmission, token).otp
+
+
+def test_non_ascii_code_is_just_wrong(app, client):
+    start(client, app)
+    response = client.post("/verify-email", data={"otp": "é12345"})
+    assert response.status_code == 200
+    assert b"Invalid verification code" in response.data
+
+
+def test_right_code_saves_the_submission(app, client):
+    otp = start(client, app)
+    client.post("/verify-email", data={"otp": "000000" if otp != "000000" else "111111"})
+    response = client.post("/verify-email", data={"otp": otp})
+    assert response.status_code == 302 and "/thank-you/" in response.headers["Location"]
+    with app.app_context():
+        assert db.session.query(Submission).count() == 1
+        assert db.session.query(PendingSubmission).count() == 0
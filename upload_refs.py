@@ -0,0 +1,164 @@
+"""
+Which stored uploads are still in use.
+
+``UploadStore`` keeps one file per content digest however many submissions
+share it, so a file may only be deleted once nothing points at it.
+``upload_references`` holds one ``(digest, owner)`` row per use:
+
+* ``submission:<id>`` for each file on a hot submission, written and removed
+  by mapper events on the connection that writes the submission, so
+  archiving or restoring a submission moves its references with it;
+* ``pending:<token>`` for the files of a submission waiting on its OTP and
+  ``upload:<id>`` for a finished chunked upload. These carry ``expires_at``
+  (the OTP window, the upload session TTL) and lapse on their own.
+
+``collect()`` looks only at digests whose references have expired, deletes
+the files among them that have no live reference left, then drops those
+rows, so uploads that are never submitted do not stay in the store. The
+store itself is never walked. Files written within ``GRACE`` seconds are
+left for a later pass: their reference may not be recorded yet.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, event, or_, select
+
+SUBMISSION = "submission:"
+GRACE = 3600
+_BATCH = 500  # digests per IN (...) list
+
+
+def _insert(table):
+    # Holding a digest again for the same owner is a no-op
+    return table.insert().prefix_with("OR IGNORE", dialect="sqlite").prefix_with("IGNORE", dialect="mysql")
+
+
+def _batches(values):
+    values = list(values)
+    for start in range(0, len(values), _BATCH):
+        yield values[start:start + _BATCH]
+
+
+def rows_for(owner, files, expires_at=None):
+    """One reference row per distinct digest in ``files`` (upload metadata dicts).
+
+    Rows from before the upload store hold bare filenames instead; those have
+    no digest and are skipped.
+    """
+    digests = dict.fromkeys(meta.get("digest") for meta in files or () if isinstance(meta, dict))
+    return [
+        {"digest": digest, "owner": owner, "expires_at": expires_at}
+        for digest in digests if digest
+    ]
+
+
+def register(model, ref_model):
+    """Keep ``submission:<id>`` references in step with inserts and deletes of ``model``."""
+    table = ref_model.__table__
+
+    @event.listens_for(model, "after_insert")
+    def _hold(mapper, connection, target):
+        rows = rows_for(f"{SUBMISSION}{target.id}", target.files)
+        if rows:
+            connection.execute(_insert(table), rows)
+
+    @event.listens_for(model, "before_delete")
+    def _release(mapper, connection, target):
+        connection.execute(delete(table).where(table.c.owner == f"{SUBMISSION}{target.id}"))
+
+
+def rebuild(session, model, ref_model, batch_size=1000) -> int:
+    """Recreate the submission references from ``model.files``; expiring ones are kept."""
+    table = ref_model.__table__
+    connection = session.connection()
+    connection.execute(delete(table).where(table.c.owner.startswith(SUBMISSION)))
+    result = session.execute(
+        select(model.id, model.files)
+        .where(model.files.isnot(None))
+        .order_by(model.id)
+        .execution_options(yield_per=batch_size)
+    )
+    count = 0
+    for batch in result.partitions():
+        rows = []
+        for submission_id, files in batch:
+            rows.extend(rows_for(f"{SUBMISSION}{submission_id}", files))
+            count += 1
+        if rows:
+            connection.execute(_insert(table), rows)
+    session.commit()
+    return count
+
+
+class UploadReferences:
+    def __init__(self, app=None, db=None, model=None, store=None):
+        if app is not None:
+            self.init_app(app, db, model, store)
+
+    def init_app(self, app, db, model, store):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.store = store
+        app.extensions["upload_refs"] = self
+
+    def hold(self, owner, files, expires_at):
+        """Mark ``files`` as used by ``owner`` until ``expires_at``; committed at once."""
+        rows = rows_for(owner, files, expires_at)
+        if rows:
+            with self.db.engine.begin() as connection:
+                connection.execute(_insert(self.model.__table__), rows)
+
+    def in_use(self, digests, now=None) -> set:
+        """The subset of ``digests`` with at least one live reference."""
+        table = self.model.__table__
+        now = now or datetime.utcnow()
+        live = set()
+        with self.db.engine.connect() as connection:
+            for batch in _batches(digests):
+                live.update(connection.execute(
+                    select(table.c.digest).distinct().where(
+                        table.c.digest.in_(batch),
+                        or_(table.c.expires_at.is_(None), table.c.expires_at > now),
+                    )
+                ).scalars())
+        return live
+
+    def remove_unused(self, digests, now=None) -> set:
+        """Delete the stored files of ``digests`` that nothing uses any more.
+
+        Returns the digests that are settled: still in use, removed, or
+        already gone. Files written within GRACE are left and not settled.
+        """
+        now = now or datetime.utcnow()
+        digests = set(digests)
+        settled = self.in_use(digests, now)
+        threshold = (now - timedelta(seconds=GRACE)).replace(tzinfo=timezone.utc).timestamp()
+        for digest in digests - settled:
+            path = self.store.path_for(digest)
+            try:
+                if os.stat(path).st_mtime >= threshold:
+                    continue
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            settled.add(digest)
+        return settled
+
+    def collect(self, now=None) -> int:
+        """Drop expired references and the files they leave unused; returns digests settled."""
+        table = self.model.__table__
+        now = now or datetime.utcnow()
+        with self.db.engine.connect() as connection:
+            expired = connection.execute(
+                select(table.c.digest).distinct().where(table.c.expires_at <= now)
+            ).scalars().all()
+        if not expired:
+            return 0
+        settled = self.remove_unused(expired, now)
+        with self.db.engine.begin() as connection:
+            for batch in _batches(settled):
+                connection.execute(
+                    delete(table).where(table.c.expires_at <= now, table.c.digest.in_(batch))
+                )
+        return len(settled)